@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union, Literal
 from enum import Enum
 
 class VoiceType(str, Enum):
@@ -11,10 +11,22 @@ class VoiceType(str, Enum):
 class QueryRequest(BaseModel):
     """Request model for text queries"""
     query: str = Field(..., description="The user's query text")
-    user_context: Optional[List[Dict[str, Any]]] = Field(
+    user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]] = Field(
         default=None, 
         description="Conversation history or additional user context"
     )
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Conversation identifier used to keep a rolling summary of older turns"
+    )
+
+class ProgramQueryRequest(BaseModel):
+    """Request model for the standard detailed-information question about a program"""
+    program: str = Field(..., description="Program name, e.g. 'SNAP'")
+    location: Optional[str] = Field(
+        default=None,
+        description="Where the caller lives, if known"
+    )
 
 class QueryResponse(BaseModel):
     """Response model for processed queries"""
@@ -29,6 +41,14 @@ class QueryResponse(BaseModel):
         le=1.0,
         description="Confidence score of the response"
     )
+    intent: Optional[str] = Field(
+        default=None,
+        description="Intent answered with its static response, when the query skipped RAG"
+    )
+    degraded: bool = Field(
+        default=False,
+        description="True when the response came from retrieved text or a fallback, not the LLM"
+    )
 
 class VoiceQueryRequest(BaseModel):
     """Request model for voice processing"""
@@ -43,9 +63,47 @@ class VoiceQueryRequest(BaseModel):
         le=2.0,
         description="Speech speed multiplier"
     )
-    user_context: Optional[Dict[str, Any]] = Field(
+    user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]] = Field(
+        default=None,
+        description="Conversation history or additional user context"
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Conversation identifier used to keep a rolling summary of older turns"
+    )
+    pipelined: bool = Field(
+        default=False,
+        description="Stream audio sentence by sentence while the response is still being generated"
+    )
+    output_format: Optional[Literal["mulaw"]] = Field(
+        default=None,
+        description="'mulaw' for 8 kHz mu-law WAV (telephony); defaults to the TTS engine's format"
+    )
+
+class VoiceTurnRequest(BaseModel):
+    """Request model for one recorded phone turn, handled in a single hop"""
+    call_sid: str = Field(..., description="Call identifier; also keys the conversation memory")
+    recording_url: Optional[str] = Field(
+        default=None,
+        description="Recording to fetch; omit when the audio is sent as the request body"
+    )
+    voice: VoiceType = Field(
+        default=VoiceType.NEUTRAL,
+        description="Voice type for speech synthesis"
+    )
+    speed: float = Field(
+        default=1.0,
+        ge=0.5,
+        le=2.0,
+        description="Speech speed multiplier"
+    )
+    synthesize: bool = Field(
+        default=True,
+        description="Synthesize the answer and return its audio_url"
+    )
+    output_format: Optional[Literal["mulaw"]] = Field(
         default=None,
-        description="Additional user context"
+        description="'mulaw' for 8 kHz mu-law WAV (telephony); defaults to the TTS engine's format"
     )
 
 class DocumentSource(BaseModel):
@@ -68,8 +126,9 @@ class TranscriptionResponse(BaseModel):
     language: Optional[str] = Field(None, description="Detected language")
 
 class SynthesisResponse(BaseModel):
-    """Response model for speech synthesis"""
-    audio_data: bytes = Field(..., description="Audio data in bytes")
-    format: str = Field(default="mp3", description="Audio format")
+    """Metadata for synthesized speech; the audio is fetched from audio_url"""
+    audio_id: str = Field(..., description="Content address of the audio")
+    audio_url: str = Field(..., description="Path serving the audio")
+    format: str = Field(default="mp3", description="Audio format (mp3, wav or mulaw)")
     duration: float = Field(..., description="Audio duration in seconds")
-    word_count: int = Field(..., description="Number of words synthesized") 
\ No newline at end of file
+    size: int = Field(..., description="Audio size in bytes") 
\ No newline at end of file
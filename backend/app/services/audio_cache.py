@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import asyncio
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+AUDIO_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class AudioCache:
+    """
+    Content-addressed cache for synthesized audio.
+
+    Entries are keyed by a hash of everything that affects the audio (text,
+    language, voice, speed, engine, format). Recently used entries are kept
+    in memory; all entries are stored on disk, and both tiers are
+    size-bounded with least-recently-used eviction. Disk entries can be
+    served directly as files. Concurrent misses for the same key share one
+    synthesis (see `create`).
+    """
+
+    def __init__(self):
+        default_dir = Path(__file__).parent.parent.parent / "cache" / "tts"
+        self.cache_dir = Path(os.getenv("TTS_CACHE_DIR", str(default_dir)))
+        self.max_disk_bytes = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+        self.max_memory_bytes = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+
+        # audio_id -> bytes / file size, least recently used first
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.disk: "OrderedDict[str, int]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self._creating: Dict[str, asyncio.Task] = {}
+        self.stats_counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(text: str, language: str, voice: str, speed: float, engine: str, audio_format: str = "mp3") -> str:
+        """Content address for a synthesis request"""
+        voice = getattr(voice, "value", voice)
+        payload = json.dumps([text, language, voice, round(float(speed), 2), engine, audio_format])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def initialize(self):
+        """Create the cache directory and index existing entries by last use"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.cache_dir.iterdir():
+                if path.is_file() and path.suffix == ".tmp":
+                    # Left behind by an interrupted write
+                    path.unlink(missing_ok=True)
+                elif path.is_file() and AUDIO_ID_PATTERN.match(path.name):
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.name, stat.st_size))
+
+            for _, audio_id, size in sorted(entries):
+                self.disk[audio_id] = size
+                self.disk_bytes += size
+
+            self._evict_disk()
+            logger.info(f"TTS cache ready at {self.cache_dir}: {len(self.disk)} entries, {self.disk_bytes} bytes")
+
+        except Exception as e:
+            logger.warning(f"TTS disk cache unavailable, using memory only: {str(e)}")
+            self.max_disk_bytes = 0
+
+    def path_for(self, audio_id: str) -> Optional[Path]:
+        """Path of a cached entry on disk (for serving the file directly), if present"""
+        if not AUDIO_ID_PATTERN.match(audio_id) or audio_id not in self.disk:
+            return None
+        self.disk.move_to_end(audio_id)
+        return self.cache_dir / audio_id
+
+    async def get(self, audio_id: str) -> Optional[bytes]:
+        """Look up audio, promoting disk hits into memory"""
+        data = self.memory.get(audio_id)
+        if data is not None:
+            self.memory.move_to_end(audio_id)
+            self._record_hit("memory_hits", len(data))
+            return data
+
+        path = self.path_for(audio_id)
+        if path is not None:
+            try:
+                data = await asyncio.to_thread(self._read_file, path)
+                self._remember(audio_id, data)
+                self._record_hit("disk_hits", len(data))
+                return data
+            except FileNotFoundError:
+                self.disk_bytes -= self.disk.pop(audio_id, 0)
+
+        self.stats_counters["misses"] += 1
+        return None
+
+    async def create(self, audio_id: str, synthesize: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Synthesize and store a missing entry, once per key however many
+        requests miss it concurrently. A caller that gives up (e.g. on its
+        deadline) doesn't cancel the synthesis for the others.
+        """
+        task = self._creating.get(audio_id)
+        if task is None:
+            task = asyncio.create_task(self._create(audio_id, synthesize))
+            self._creating[audio_id] = task
+            task.add_done_callback(lambda _: self._creating.pop(audio_id, None))
+        return await asyncio.shield(task)
+
+    async def _create(self, audio_id: str, synthesize: Callable[[], Awaitable[bytes]]) -> bytes:
+        data = await synthesize()
+        await self.put(audio_id, data)
+        return data
+
+    async def put(self, audio_id: str, data: bytes):
+        """Store audio in memory and on disk"""
+        if not data:
+            return
+        self._remember(audio_id, data)
+
+        if self.max_disk_bytes and audio_id not in self.disk:
+            try:
+                await asyncio.to_thread(self._write_file, self.cache_dir / audio_id, data)
+                # Another put of the same key may have finished while this one was writing
+                if audio_id in self.disk:
+                    self.disk.move_to_end(audio_id)
+                    return
+                self.disk[audio_id] = len(data)
+                self.disk_bytes += len(data)
+                self._evict_disk()
+            except Exception as e:
+                logger.warning(f"Failed to write TTS cache entry: {str(e)}")
+
+    def _record_hit(self, tier: str, size: int):
+        self.stats_counters[tier] += 1
+        self.stats_counters["bytes_saved"] += size
+
+    def _remember(self, audio_id: str, data: bytes):
+        """Insert into the memory tier, evicting least recently used entries"""
+        if len(data) > self.max_memory_bytes:
+            return
+        if audio_id in self.memory:
+            self.memory.move_to_end(audio_id)
+            return
+        self.memory[audio_id] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        """Delete least recently used files until the disk tier fits its budget"""
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            audio_id, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            self.stats_counters["evictions"] += 1
+            try:
+                (self.cache_dir / audio_id).unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _read_file(path: Path) -> bytes:
+        data = path.read_bytes()
+        os.utime(path)  # keep last-use order across restarts
+        return data
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes):
+        # Write to a uniquely named temp file, then rename, so readers never
+        # see a partial file and concurrent writers never share one
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False) as temp:
+            temp.write(data)
+        try:
+            os.replace(temp.name, path)
+        except Exception:
+            os.unlink(temp.name)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache effectiveness for health reporting"""
+        return {
+            **self.stats_counters,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_entries": len(self.disk),
+            "disk_bytes": self.disk_bytes,
+            "synthesizing": len(self._creating),
+        }
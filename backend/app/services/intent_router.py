@@ -0,0 +1,200 @@
+import os
+import re
+import math
+import logging
+from pathlib import Path
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Same features as the Rasa pipeline's char_wb CountVectorsFeaturizer (rasa/config.yml)
+MIN_NGRAM = 1
+MAX_NGRAM = 4
+
+# Rasa entity annotations in training examples: [text](entity) or [text]{"entity": ...}
+ENTITY_ANNOTATION = re.compile(r"\[([^\]]*)\](?:\([^)]*\)|\{[^}]*\})")
+WORD = re.compile(r"[a-z0-9']+")
+
+
+def char_ngrams(text: str) -> Counter:
+    """Character n-grams within word boundaries, like Rasa's char_wb analyzer"""
+    counts = Counter()
+    for word in WORD.findall(text.lower()):
+        padded = f" {word} "
+        for n in range(MIN_NGRAM, MAX_NGRAM + 1):
+            for start in range(len(padded) - n + 1):
+                counts[padded[start:start + n]] += 1
+    return counts
+
+
+class IntentRouter:
+    """
+    In-process intent fast path for static Rasa responses.
+
+    A nearest-centroid classifier over TF-IDF weighted character n-grams is
+    trained at startup from the Rasa project's NLU examples (every intent,
+    so questions about programs have somewhere to go). Messages whose best
+    intent is answered in Rasa by a fixed `utter_*` response (the one-step
+    rules in rules.yml, e.g. greet and goodbye) get that response text from
+    domain.yml without retrieval or generation. Anything else, or anything
+    the classifier isn't sure about, is left for RAG.
+    """
+
+    def __init__(self):
+        self.project_dir = Path(os.getenv("RASA_PROJECT_DIR", "../rasa"))
+        self.enabled = os.getenv("INTENT_FAST_PATH", "true").lower() == "true"
+        self.min_similarity = float(os.getenv("INTENT_FAST_PATH_MIN_SIMILARITY", "0.35"))
+        self.min_margin = float(os.getenv("INTENT_FAST_PATH_MIN_MARGIN", "0.2"))
+        self.max_words = int(os.getenv("INTENT_FAST_PATH_MAX_WORDS", "8"))
+        # Defaults to the intents with a one-step rule in rules.yml
+        configured = os.getenv("INTENT_FAST_PATH_INTENTS", "")
+        self.configured_intents = [intent.strip() for intent in configured.split(",") if intent.strip()]
+
+        self.intents: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.idf: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.responses: Dict[str, str] = {}
+        self.stats_counters = {"answered": 0, "passed": 0}
+
+    async def initialize(self):
+        """Train the classifier from the Rasa project files"""
+        if not self.enabled:
+            logger.info("Intent fast path disabled")
+            return
+        try:
+            examples = self._load_examples(self.project_dir / "data" / "nlu.yml")
+            responses = self._load_yaml(self.project_dir / "domain.yml").get("responses") or {}
+            static = self.configured_intents or self._static_rule_intents(self.project_dir / "data" / "rules.yml")
+
+            self._fit(examples)
+            self.responses = {}
+            for intent in static:
+                texts = [item.get("text") for item in responses.get(f"utter_{intent}", []) if item.get("text")]
+                if intent in self.intents and texts:
+                    self.responses[intent] = texts[0]
+            logger.info(
+                f"Intent fast path trained on {sum(len(texts) for texts in examples.values())} examples "
+                f"for {len(self.intents)} intents; answering {sorted(self.responses)} directly"
+            )
+        except Exception as e:
+            self.centroids = None
+            logger.warning(f"Intent fast path unavailable, all queries go to RAG: {str(e)}")
+
+    @staticmethod
+    def _load_yaml(path: Path) -> Dict[str, Any]:
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+
+    def _load_examples(self, path: Path) -> Dict[str, List[str]]:
+        """Intent -> training examples from a Rasa NLU file"""
+        examples: Dict[str, List[str]] = {}
+        for item in self._load_yaml(path).get("nlu") or []:
+            if "intent" not in item:
+                continue
+            lines = [
+                ENTITY_ANNOTATION.sub(r"\1", line.strip()[1:].strip())
+                for line in str(item.get("examples", "")).splitlines()
+                if line.strip().startswith("-")
+            ]
+            examples.setdefault(item["intent"], []).extend(line for line in lines if line)
+        return examples
+
+    def _static_rule_intents(self, path: Path) -> List[str]:
+        """Intents that a rule always answers with their own utter_ response"""
+        intents = []
+        for rule in self._load_yaml(path).get("rules") or []:
+            steps = rule.get("steps") or []
+            if rule.get("condition") or len(steps) != 2:
+                continue
+            intent, action = steps[0].get("intent"), steps[1].get("action")
+            if intent and action == f"utter_{intent}":
+                intents.append(intent)
+        return intents
+
+    def _fit(self, examples: Dict[str, List[str]]):
+        """Build the vocabulary, IDF weights and one unit-length centroid per intent"""
+        self.intents = [intent for intent, texts in examples.items() if texts]
+        counts = [(intent, char_ngrams(text)) for intent in self.intents for text in examples[intent]]
+
+        document_frequency = Counter()
+        for _, grams in counts:
+            document_frequency.update(grams.keys())
+        self.vocabulary = {gram: index for index, gram in enumerate(sorted(document_frequency))}
+        total = len(counts)
+        self.idf = np.array([
+            math.log((1 + total) / (1 + document_frequency[gram])) + 1
+            for gram in sorted(document_frequency)
+        ])
+
+        centroids = np.zeros((len(self.intents), len(self.vocabulary)))
+        row = {intent: index for index, intent in enumerate(self.intents)}
+        for intent, grams in counts:
+            centroids[row[intent]] += self._vector(grams)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.maximum(norms, 1e-12)
+
+    def _vector(self, grams: Counter) -> np.ndarray:
+        """Unit-length TF-IDF vector (sublinear term frequency) for n-gram counts"""
+        vector = np.zeros(len(self.vocabulary))
+        for gram, count in grams.items():
+            index = self.vocabulary.get(gram)
+            if index is not None:
+                vector[index] = 1 + math.log(count)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def classify(self, text: str) -> Optional[Tuple[str, float, float]]:
+        """Best intent for a message with its similarity and margin over the runner-up"""
+        if self.centroids is None or not self.intents:
+            return None
+        vector = self._vector(char_ngrams(text))
+        if not vector.any():
+            return None
+        similarities = self.centroids @ vector
+        order = np.argsort(similarities)[::-1]
+        best = float(similarities[order[0]])
+        runner_up = float(similarities[order[1]]) if len(order) > 1 else 0.0
+        return self.intents[order[0]], best, best - runner_up
+
+    def intent(self, text: str) -> Optional[Tuple[str, float]]:
+        """Best intent for a message with its similarity, or None if the classifier isn't sure"""
+        result = self.classify(text)
+        if result is None:
+            return None
+        intent, similarity, margin = result
+        if similarity < self.min_similarity or margin < self.min_margin:
+            return None
+        return intent, similarity
+
+    def answer(self, text: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Static response for a message, if it confidently matches a fast-path intent
+
+        Returns:
+            (intent, response text, similarity), or None to answer with RAG
+        """
+        result = None
+        if self.responses and len(text.split()) <= self.max_words:
+            result = self.intent(text)
+        if result is None or result[0] not in self.responses:
+            self.stats_counters["passed"] += 1
+            return None
+
+        intent, similarity = result
+        self.stats_counters["answered"] += 1
+        return intent, self.responses[intent], similarity
+
+    def stats(self) -> Dict[str, Any]:
+        """Fast-path counters for health reporting"""
+        return {
+            **self.stats_counters,
+            "trained": self.centroids is not None,
+            "intents": len(self.intents),
+            "fast_path_intents": sorted(self.responses)
+        }
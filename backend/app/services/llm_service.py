@@ -1,16 +1,23 @@
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, AsyncIterator, Iterator, Tuple
 import asyncio
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
 from langchain.llms import Ollama
-from langchain.chat_models import ChatOllama
-from langchain.schema import HumanMessage, SystemMessage
 from langchain.prompts import PromptTemplate
 import openai
 
+from app.services.memory_service import ConversationMemory
+from app.services.model_router import ModelRouter
+from app.utils.deadline import Deadline, DeadlineExceeded
+
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are a helpful public service navigation assistant."
+
 class LLMService:
     """Service for Large Language Model interactions"""
     
@@ -21,65 +28,215 @@ class LLMService:
         self.model_name = os.getenv("LLM_MODEL", "mixtral-8x7b")
         self.api_base = os.getenv("LLM_API_BASE", "http://localhost:11434")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.keep_alive = os.getenv("LLM_KEEP_ALIVE")  # e.g. "30m", or "-1" to pin the model
+        self.warmup_timeout = float(os.getenv("LLM_WARMUP_TIMEOUT", "300"))
+        # Retry delay after a failed warm-up, doubling up to the maximum
+        self.warmup_retry = float(os.getenv("LLM_WARMUP_RETRY_SECONDS", "5"))
+        self.warmup_max_retry = float(os.getenv("LLM_WARMUP_MAX_RETRY_SECONDS", "60"))
+        self.request_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+        # Below this much remaining budget, skip the LLM and answer extractively
+        self.min_generation_budget = float(os.getenv("LLM_MIN_BUDGET", "2"))
+        self.http = requests.Session()
+        # Streamed generations each hold a thread for their whole duration, so
+        # they get their own bounded pool instead of the default executor that
+        # audio decoding, TTS and retrieval share
+        self.stream_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("LLM_STREAM_WORKERS", "8")),
+            thread_name_prefix="llm-stream"
+        )
+        
+        # Providers in order of preference, and whether each one is warm
+        self.providers: List[str] = []
+        self.provider_ready: Dict[str, bool] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        
+        # Small/large model routing with a readiness flag per model
+        self.router = ModelRouter(large_model=self.model_name)
+        self.model_ready: Dict[str, bool] = {}
+        
+        # Bounded conversation context with a rolling summary of older turns
+        self.memory = ConversationMemory(summarizer=self._summarize_turns)
         
     async def initialize(self):
-        """Initialize the LLM service"""
+        """Register LLM providers and start warming them in the background"""
         try:
             logger.info(f"Initializing LLM service with model: {self.model_name}")
             
-            # Try to initialize Ollama first (preferred for open-source models)
-            try:
-                self.chat_model = ChatOllama(
-                    model=self.model_name,
-                    base_url=self.api_base,
-                    temperature=0.7
-                )
-                
-                # Test the connection
-                test_message = HumanMessage(content="Hello, this is a test.")
-                response = await asyncio.to_thread(self.chat_model.invoke, [test_message])
-                
-                if response and response.content:
-                    logger.info("Ollama LLM initialized successfully!")
-                    self.is_initialized = True
-                    return
-                    
-            except Exception as e:
-                logger.warning(f"Failed to initialize Ollama: {str(e)}")
+            # Ollama is preferred for open-source models. It is called over its
+            # HTTP API directly so an expired request can be cancelled by
+            # closing the connection; registering it does not touch the network.
+            # An empty LLM_API_BASE leaves it out (mock responses only).
+            if self.api_base:
+                for model in self._ollama_models():
+                    self.model_ready[model] = False
+                self.chat_model = "ollama"
+                self._register_provider("ollama")
             
-            # Fallback to OpenAI if available
+            # OpenAI as a fallback if a key is configured
             if self.openai_api_key:
-                try:
-                    from openai import OpenAI
-                    client = OpenAI(api_key=self.openai_api_key)
-                    # Test the connection with a simple request
-                    test_response = await asyncio.to_thread(
-                        client.chat.completions.create,
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": "Hello"}],
-                        max_tokens=10
-                    )
-                    self.chat_model = "openai"  # Use OpenAI API directly
-                    logger.info("Using OpenAI as fallback LLM")
-                    self.is_initialized = True
-                    return
-                except Exception as e:
-                    logger.warning(f"Failed to initialize OpenAI: {str(e)}")
+                self._register_provider("openai")
             
-            # If neither works, create a mock LLM for development
-            logger.warning("No LLM available, using mock responses for development")
-            self.chat_model = "mock"
+            # Until a provider is warm, queries are answered on the extractive/mock path
             self.is_initialized = True
+            self._warmup_task = asyncio.create_task(self._warm_up())
+            logger.info(f"LLM providers registered: {self.providers or ['mock']} (warming in background)")
             
         except Exception as e:
             logger.error(f"Failed to initialize LLM service: {str(e)}")
             raise
     
+    def _register_provider(self, provider: str):
+        """Register a provider as available but not yet warm"""
+        self.providers.append(provider)
+        self.provider_ready[provider] = False
+    
+    async def _warm_up(self):
+        """
+        Load models into memory so the first real query doesn't pay for it
+        
+        Retries with exponential backoff until the preferred provider and
+        each of its routed models is warm, so a backend that starts before
+        Ollama picks it up once it is reachable, and a model that failed to
+        load is retried while the others serve. Lower-preference providers
+        are only warmed while the preferred one isn't fully warm.
+        """
+        delay = self.warmup_retry
+        while True:
+            for provider in self.providers:
+                if self._provider_warm(provider):
+                    break
+                try:
+                    if provider == "ollama":
+                        await self._warm_up_ollama_models()
+                    elif provider == "openai":
+                        await self._warm_up_openai()
+                        self.provider_ready[provider] = True
+                    
+                    if self._provider_warm(provider):
+                        logger.info(f"LLM provider '{provider}' is warm and ready")
+                        break
+                    
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Failed to warm up {provider}: {str(e)}")
+            
+            if not self.providers or self._provider_warm(self.providers[0]):
+                return
+            
+            if self.active_provider() is None:
+                logger.warning(f"No LLM available, using mock responses; retrying warm-up in {delay:g}s")
+            else:
+                cold = [model for model, ready in self.model_ready.items() if not ready]
+                logger.warning(f"Serving with {self.active_provider()}; retrying warm-up of {cold or self.providers[0]} in {delay:g}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.warmup_max_retry)
+    
+    def _provider_warm(self, provider: str) -> bool:
+        """Whether a provider is warm, and for Ollama every routed model too"""
+        if not self.provider_ready.get(provider):
+            return False
+        return provider != "ollama" or all(self.model_ready.values())
+    
+    def _ollama_models(self) -> List[str]:
+        """Models to load, small first so simple traffic is served sooner"""
+        if self.router.enabled:
+            return [self.router.small_model, self.model_name]
+        return [self.model_name]
+    
+    async def _warm_up_ollama_models(self):
+        """Warm every routed model not yet loaded; Ollama is usable once any of them is"""
+        for model in self._ollama_models():
+            if self.model_ready.get(model):
+                continue
+            try:
+                await self._warm_up_ollama(model)
+                self.model_ready[model] = True
+                self.provider_ready["ollama"] = True
+                logger.info(f"Ollama model '{model}' is warm")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to warm up Ollama model {model}: {str(e)}")
+        
+        if not self.provider_ready["ollama"]:
+            raise RuntimeError("No Ollama model could be loaded")
+    
+    def _ready_model(self, preferred: str) -> str:
+        """Use the preferred model if it is warm, otherwise any warm model"""
+        if self.model_ready.get(preferred):
+            return preferred
+        for model, ready in self.model_ready.items():
+            if ready:
+                return model
+        return self.model_name
+    
+    async def _warm_up_ollama(self, model: str):
+        """Ask Ollama to load the model without generating any tokens"""
+        payload = {"model": model, "prompt": ""}
+        if self.keep_alive:
+            payload["keep_alive"] = self._keep_alive_value()
+        
+        response = await asyncio.to_thread(
+            self.http.post,
+            f"{self.api_base}/api/generate",
+            json=payload,
+            timeout=self.warmup_timeout
+        )
+        response.raise_for_status()
+    
+    def _keep_alive_value(self) -> Union[int, str]:
+        """Ollama accepts keep_alive as seconds (int) or a duration string"""
+        return int(self.keep_alive) if self.keep_alive.lstrip("-").isdigit() else self.keep_alive
+    
+    async def _warm_up_openai(self):
+        """Check that the OpenAI API is reachable with a tiny request"""
+        from openai import OpenAI
+        client = OpenAI(api_key=self.openai_api_key)
+        await asyncio.to_thread(
+            client.chat.completions.create,
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": "Hello"}],
+            max_tokens=1
+        )
+    
+    def active_provider(self) -> Optional[str]:
+        """Return the preferred provider that is warm, if any"""
+        for provider in self.providers:
+            if self.provider_ready.get(provider):
+                return provider
+        return None
+    
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Report whether generation is served by a warm LLM or the degraded path
+        
+        `generation_ready` is also True when no provider is configured: the
+        mock path is then the intended service, not a warm-up state.
+        """
+        return {
+            "llm_ready": self.active_provider() is not None,
+            "generation_ready": self.active_provider() is not None or not self.providers,
+            "active_provider": self.active_provider() or "mock",
+            "warming": bool(self._warmup_task and not self._warmup_task.done()),
+            "providers": dict(self.provider_ready),
+            "models": dict(self.model_ready)
+        }
+    
+    async def shutdown(self):
+        """Stop any in-flight warm-up and the streaming threads"""
+        if self._warmup_task and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        self.stream_executor.shutdown(wait=False, cancel_futures=True)
+    
     async def generate_response(
         self, 
         query: str, 
         context_docs: List[Dict[str, Any]], 
-        user_context: Optional[Dict[str, Any]] = None
+        user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]] = None,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        intent: Optional[str] = None
     ) -> str:
         """
         Generate a response using the LLM with retrieved context
@@ -87,34 +244,124 @@ class LLMService:
         Args:
             query: The user's query
             context_docs: Retrieved relevant documents
-            user_context: Additional user context
+            user_context: Conversation history or additional user context
+            session_id: Conversation identifier for the rolling summary
+            deadline: Request deadline; generation is cancelled when it passes
+            intent: Classified intent of the query, used to pick the model
             
         Returns:
             Generated response text
         """
+        response, _ = await self.generate_answer(query, context_docs, user_context, session_id, deadline, intent)
+        return response
+    
+    async def generate_answer(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]] = None,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        intent: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """
+        Generate a response like generate_response, and report how
+        
+        Returns:
+            (response text, degraded), where degraded is True when the text
+            came from the extractive, mock or fallback path, not the LLM
+        """
+        response, degraded = await self._generate_response(query, context_docs, user_context, session_id, deadline, intent)
+        self.memory.record(session_id, user_context, query, response)
+        return response, degraded
+    
+    async def _generate_response(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]],
+        session_id: Optional[str],
+        deadline: Optional[Deadline],
+        intent: Optional[str]
+    ) -> Tuple[str, bool]:
         try:
             if not self.is_initialized:
                 raise RuntimeError("LLM service not initialized")
             
-            # Create the prompt with context
-            prompt = self._create_prompt(query, context_docs, user_context)
+            deadline = deadline or Deadline(None)
             
-            if self.chat_model == "mock":
-                return await self._generate_mock_response(query, context_docs)
-            elif self.chat_model == "openai":
-                return await self._generate_openai_response(prompt)
+            # Serve from the extractive/mock path until a provider is warm,
+            # or when there isn't enough budget left for the LLM
+            provider = self.active_provider()
+            if provider is None or not deadline.has(self.min_generation_budget):
+                return await self._generate_degraded_response(query, context_docs), True
+            
+            # Create the prompt with bounded conversation context
+            conversation_context = await self.memory.build_context(session_id, user_context)
+            prompt = self._create_prompt(query, context_docs, conversation_context)
+            
+            if provider == "openai":
+                return await self._generate_openai_response(prompt, deadline), False
             else:
-                return await self._generate_ollama_response(prompt)
+                decision = self.router.route(query, context_docs, intent)
+                return await self._generate_ollama_response(prompt, self._ready_model(decision["model"]), deadline), False
                 
+        except DeadlineExceeded as e:
+            logger.warning(f"{str(e)}; answering from retrieved documents")
+            return await self._generate_degraded_response(query, context_docs), True
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            return self._generate_fallback_response(query)
+            return self._generate_fallback_response(query), True
+    
+    async def stream_response(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]] = None,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        intent: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the response incrementally as the LLM generates it
+        
+        Only Ollama streams; other providers and the degraded path yield the
+        whole response as a single chunk.
+        """
+        deadline = deadline or Deadline(None)
+        if not self.is_initialized or self.active_provider() != "ollama" or not deadline.has(self.min_generation_budget):
+            yield await self.generate_response(query, context_docs, user_context, session_id, deadline, intent)
+            return
+        
+        parts: List[str] = []
+        try:
+            conversation_context = await self.memory.build_context(session_id, user_context)
+            prompt = self._create_prompt(query, context_docs, conversation_context)
+            decision = self.router.route(query, context_docs, intent)
+            
+            async for chunk in self._stream_ollama_response(prompt, self._ready_model(decision["model"]), deadline):
+                parts.append(chunk)
+                yield chunk
+                
+        except DeadlineExceeded as e:
+            logger.warning(f"{str(e)}; ending streamed response")
+            if not parts:
+                parts.append(await self._generate_degraded_response(query, context_docs))
+                yield parts[0]
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            if not parts:
+                parts.append(self._generate_fallback_response(query))
+                yield parts[0]
+        
+        # Not reached if the consumer stops early
+        self.memory.record(session_id, user_context, query, "".join(parts))
     
     def _create_prompt(
         self, 
         query: str, 
         context_docs: List[Dict[str, Any]], 
-        user_context: Optional[Dict[str, Any]] = None
+        conversation_context: str = ""
     ) -> str:
         """Create a prompt with context for the LLM"""
         
@@ -127,8 +374,8 @@ class LLMService:
         
         # Build user context
         user_context_text = ""
-        if user_context:
-            user_context_text = f"User context: {json.dumps(user_context)}\n\n"
+        if conversation_context:
+            user_context_text = f"{conversation_context}\n\n"
         
         # Create the full prompt
         prompt = f"""You are a helpful public service navigation assistant. Your role is to help users understand and access government benefits and services like SNAP, housing assistance, and healthcare programs.
@@ -143,44 +390,192 @@ Response:"""
         
         return prompt
     
-    async def _generate_ollama_response(self, prompt: str) -> str:
+    async def _summarize_turns(self, previous_summary: str, turns: List[str], max_tokens: int) -> str:
+        """Fold conversation turns into a running summary using the warm LLM"""
+        provider = self.active_provider()
+        if provider is None:
+            raise RuntimeError("No warm LLM available for summarization")
+        
+        conversation = "\n".join(turns)
+        prompt = f"""Update the running summary of a conversation between a user and a public service navigation assistant.
+Keep the user's situation, programs discussed, and open questions. Use at most {max_tokens * 3 // 4} words.
+
+Current summary: {previous_summary or "(none)"}
+
+New conversation turns:
+{conversation}
+
+Updated summary:"""
+        
+        if provider == "openai":
+            return await self._generate_openai_response(prompt)
+        return await self._generate_ollama_response(prompt, self._ready_model(self.router.small_model or self.model_name))
+    
+    async def _generate_ollama_response(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
         """Generate response using Ollama"""
         try:
-            messages = [
-                SystemMessage(content="You are a helpful public service navigation assistant."),
-                HumanMessage(content=prompt)
-            ]
-            
-            response = await asyncio.to_thread(self.chat_model.invoke, messages)
-            return response.content if response else "I'm sorry, I couldn't generate a response at this time."
+            parts = [chunk async for chunk in self._stream_ollama_response(prompt, model, deadline)]
+            response = "".join(parts)
+            if not response:
+                raise RuntimeError("Ollama returned an empty response")
+            return response
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating Ollama response: {str(e)}")
             raise
     
-    async def _generate_openai_response(self, prompt: str) -> str:
+    async def _stream_ollama_response(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream response chunks from Ollama
+        
+        The blocking HTTP stream is read in a thread from the streaming pool
+        (LLM_STREAM_WORKERS threads; further streams wait for one). If the deadline
+        passes or the consumer stops early, the connection is closed, which
+        makes Ollama abort the generation instead of finishing it for nobody.
+        """
+        deadline = deadline or Deadline(None)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancel = threading.Event()
+        holder: Dict[str, Any] = {}
+        
+        def produce():
+            if cancel.is_set():
+                # Gave up while waiting for a free streaming thread
+                return
+            try:
+                for chunk in self._ollama_chat_stream(model or self.model_name, prompt, deadline, holder):
+                    if cancel.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+            except Exception as e:
+                if not cancel.is_set():
+                    loop.call_soon_threadsafe(queue.put_nowait, e)
+        
+        loop.run_in_executor(self.stream_executor, produce)
+        try:
+            while True:
+                item = await deadline.run(queue.get(), "generation")
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancel.set()
+            response = holder.get("response")
+            if response is not None:
+                try:
+                    response.close()
+                except Exception:
+                    pass
+    
+    def _ollama_chat_stream(
+        self,
+        model: str,
+        prompt: str,
+        deadline: Deadline,
+        holder: Dict[str, Any]
+    ) -> Iterator[str]:
+        """Blocking generator over Ollama /api/chat streaming output"""
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "stream": True,
+            "options": {"temperature": 0.7}
+        }
+        if self.keep_alive:
+            payload["keep_alive"] = self._keep_alive_value()
+        
+        with self.http.post(
+            f"{self.api_base}/api/chat",
+            json=payload,
+            stream=True,
+            timeout=deadline.timeout(self.request_timeout)
+        ) as response:
+            holder["response"] = response
+            response.raise_for_status()
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    yield content
+                if data.get("done"):
+                    return
+    
+    async def _generate_openai_response(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
         """Generate response using OpenAI API"""
         try:
             from openai import OpenAI
             
+            deadline = deadline or Deadline(None)
             client = OpenAI(api_key=self.openai_api_key)
-            response = await asyncio.to_thread(
+            response = await deadline.run(asyncio.to_thread(
                 client.chat.completions.create,
                 model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": "You are a helpful public service navigation assistant."},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
-                temperature=0.7
-            )
+                temperature=0.7,
+                timeout=deadline.timeout(self.request_timeout)
+            ), "generation")
             
             return response.choices[0].message.content
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating OpenAI response: {str(e)}")
             raise
     
+    async def _generate_degraded_response(self, query: str, context_docs: List[Dict[str, Any]]) -> str:
+        """Answer without an LLM: quote the best retrieved document, or fall back to mock responses"""
+        if context_docs and context_docs[0].get("content"):
+            return self._generate_extractive_response(context_docs[0]["content"])
+        return await self._generate_mock_response(query, context_docs)
+    
+    def _generate_extractive_response(self, content: str, max_chars: int = 600) -> str:
+        """Build a response from the leading lines of a retrieved document"""
+        lines = [line.strip() for line in content.strip().splitlines() if line.strip()]
+        
+        excerpt = ""
+        for line in lines:
+            if len(excerpt) + len(line) > max_chars:
+                break
+            excerpt += line + "\n"
+        
+        if not excerpt:
+            excerpt = content.strip()[:max_chars]
+        
+        return f"""Here is the most relevant information I found:
+
+{excerpt.strip()}
+
+Would you like more details about eligibility, the application process, or where to apply?"""
+    
     async def _generate_mock_response(self, query: str, context_docs: List[Dict[str, Any]]) -> str:
         """Generate a mock response for development/testing"""
         
@@ -276,7 +671,10 @@ Please try again in a moment, or contact one of these resources for immediate he
                 "initialized": self.is_initialized,
                 "model_name": self.model_name,
                 "api_base": self.api_base,
-                "provider": "ollama" if self.chat_model and self.chat_model != "openai" and self.chat_model != "mock" else str(self.chat_model)
+                "provider": self.active_provider() or "mock",
+                "memory": self.memory.stats(),
+                "routing": self.router.stats(),
+                **self.readiness()
             }
             
             if self.is_initialized:
@@ -0,0 +1,103 @@
+import os
+import logging
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from app.utils.audio import encode_wav
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTTSEngine:
+    """
+    Offline speech synthesis with Coqui TTS.
+
+    Each worker thread owns its own preloaded model (models are not safe to
+    share between concurrent calls), and the pool size bounds how many
+    syntheses run at once, so latency is predictable and CPU-bound with no
+    network dependency.
+    """
+
+    def __init__(self):
+        self.model_name = os.getenv("COQUI_TTS_MODEL", "tts_models/en/ljspeech/vits")
+        self.workers = int(os.getenv("TTS_WORKERS", "2"))
+        self.load_timeout = float(os.getenv("TTS_LOAD_TIMEOUT", "600"))
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.sample_rate: Optional[int] = None
+        self.is_ready = False
+        self._local = threading.local()
+        self._in_flight = 0
+
+    async def initialize(self):
+        """Load one model per worker thread before serving any request"""
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="local-tts")
+        loop = asyncio.get_running_loop()
+
+        # One worker loads first, downloading the model files if they aren't
+        # cached yet, so the others don't race to fetch the same files
+        await asyncio.wait_for(
+            loop.run_in_executor(self.executor, self._load_model, None),
+            timeout=self.load_timeout
+        )
+
+        # The rest load from the local model cache. The barrier holds each
+        # loader until all workers have started one, so every thread in the
+        # pool ends up with its own model
+        if self.workers > 1:
+            barrier = threading.Barrier(self.workers, timeout=self.load_timeout)
+            await asyncio.gather(*[
+                loop.run_in_executor(self.executor, self._load_model, barrier)
+                for _ in range(self.workers)
+            ])
+
+        self.is_ready = True
+        logger.info(f"Local TTS model {self.model_name} loaded in {self.workers} workers ({self.sample_rate} Hz)")
+
+    def _load_model(self, barrier: Optional[threading.Barrier]):
+        """Load the model into the calling worker thread"""
+        if getattr(self._local, "tts", None) is None:
+            try:
+                from TTS.api import TTS
+
+                self._local.tts = TTS(model_name=self.model_name, progress_bar=False, gpu=False)
+                self.sample_rate = self._local.tts.synthesizer.output_sample_rate
+            except Exception:
+                # Release the other loaders now instead of at the barrier timeout
+                if barrier is not None:
+                    barrier.abort()
+                raise
+        if barrier is not None:
+            barrier.wait()
+
+    async def synthesize(self, text: str) -> bytes:
+        """Synthesize text to WAV bytes on the worker pool"""
+        if not self.is_ready:
+            raise RuntimeError("Local TTS engine not initialized")
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._synthesize, text)
+        finally:
+            self._in_flight -= 1
+
+    def _synthesize(self, text: str) -> bytes:
+        samples = self._local.tts.tts(text=text)
+        return encode_wav(samples, self.sample_rate)
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Engine status for health reporting"""
+        return {
+            "model": self.model_name,
+            "ready": self.is_ready,
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "sample_rate": self.sample_rate,
+        }
@@ -0,0 +1,249 @@
+import os
+import logging
+import asyncio
+import json
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Union, Callable, Awaitable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate (~4 characters per token for English text)
+CHARS_PER_TOKEN = 4
+
+Summarizer = Callable[[str, List[str], int], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for prompt budgeting"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Trim text to roughly max_tokens, keeping the start ("head") or the end ("tail")"""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    if keep == "tail":
+        return "..." + text[-(max_chars - 3):]
+    return text[:max_chars - 3] + "..."
+
+
+class ConversationMemory:
+    """
+    Bounded conversation context for prompts.
+
+    The last few turns are kept verbatim; older turns are folded into a
+    per-session summary that is updated in the background, so the rendered
+    context stays within a fixed token budget however long the session runs.
+
+    Clients either send the conversation so far as `user_context`, or send
+    only a session ID (e.g. a phone call) and let the exchanges recorded
+    with `record` be used as the history.
+    """
+
+    def __init__(self, summarizer: Optional[Summarizer] = None):
+        self.summarizer = summarizer
+        self.recent_turns = int(os.getenv("MEMORY_RECENT_TURNS", "6"))
+        self.token_budget = int(os.getenv("MEMORY_TOKEN_BUDGET", "600"))
+        self.summary_tokens = int(os.getenv("MEMORY_SUMMARY_TOKENS", "200"))
+        self.max_turn_tokens = int(os.getenv("MEMORY_MAX_TURN_TOKENS", "150"))
+        self.max_sessions = int(os.getenv("MEMORY_MAX_SESSIONS", "1000"))
+
+        # session_id -> {"summary": str, "summarized_turns": int, "history": [str]}, least recently used first.
+        # "history" holds recorded turns not yet folded into the summary
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def build_context(
+        self,
+        session_id: Optional[str],
+        user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]]
+    ) -> str:
+        """
+        Render user context for the prompt within the token budget
+
+        Args:
+            session_id: Conversation identifier used to keep a rolling summary
+            user_context: Either a list of conversation turns or a dict of user facts
+
+        Returns:
+            Context text (possibly empty) of at most `token_budget` tokens
+        """
+        try:
+            stored = not user_context
+            if stored:
+                state = self.sessions.get(session_id) if session_id else None
+                if not state or not state["history"]:
+                    return ""
+                facts, turns = "", list(state["history"])
+            else:
+                facts, turns = self._normalize(user_context)
+            budget = self.token_budget
+            parts = []
+
+            if facts:
+                facts = truncate_to_tokens(facts, budget // 4)
+                parts.append(f"User details: {facts}")
+                budget -= estimate_tokens(parts[-1])
+
+            older = turns[:-self.recent_turns] if self.recent_turns else turns
+            recent = turns[-self.recent_turns:] if self.recent_turns else []
+
+            summary = ""
+            unsummarized = older
+            if session_id:
+                state = self._get_state(session_id)
+                if len(older) < state["summarized_turns"]:
+                    # The client restarted its history; start over
+                    state.update(summary="", summarized_turns=0)
+
+                summary = state["summary"]
+                unsummarized = older[state["summarized_turns"]:]
+                if unsummarized:
+                    self._schedule_summary(session_id, older, stored)
+
+            if summary:
+                summary = truncate_to_tokens(summary, min(self.summary_tokens, budget), keep="tail")
+                parts.append(f"Summary of earlier conversation: {summary}")
+                budget -= estimate_tokens(parts[-1])
+
+            # Fill the remaining budget newest-first with turns not yet covered by the summary
+            kept = []
+            for turn in reversed(unsummarized + recent):
+                turn = truncate_to_tokens(turn, self.max_turn_tokens)
+                cost = estimate_tokens(turn) + 1
+                if cost > budget:
+                    break
+                kept.append(turn)
+                budget -= cost
+
+            if kept:
+                parts.append("Recent conversation:\n" + "\n".join(reversed(kept)))
+
+            return "\n".join(parts)
+
+        except Exception as e:
+            logger.error(f"Error building conversation context: {str(e)}")
+            return ""
+
+    def _normalize(self, user_context: Union[List[Dict[str, Any]], Dict[str, Any]]) -> Tuple[str, List[str]]:
+        """Split user context into a facts line and a list of rendered turns"""
+        if isinstance(user_context, dict):
+            facts = ", ".join(f"{key}: {value}" for key, value in user_context.items() if value not in (None, ""))
+            return facts, []
+
+        turns = []
+        for item in user_context:
+            if isinstance(item, dict):
+                role = item.get("role") or item.get("sender") or "user"
+                content = item.get("content") or item.get("text") or ""
+                if not content:
+                    content = json.dumps(item)
+            else:
+                role, content = "user", str(item)
+            turns.append(f"{str(role).capitalize()}: {str(content).strip()}")
+        return "", turns
+
+    def record(
+        self,
+        session_id: Optional[str],
+        user_context: Optional[Union[List[Dict[str, Any]], Dict[str, Any]]],
+        query: str,
+        response: str
+    ):
+        """
+        Remember an exchange as session history
+
+        Only for sessions that don't send their own history; those that do
+        would otherwise keep a second copy that is never used or trimmed.
+        """
+        if not session_id or user_context or not response:
+            return
+        history = self._get_state(session_id)["history"]
+        history.append(truncate_to_tokens(f"User: {query.strip()}", self.max_turn_tokens))
+        history.append(truncate_to_tokens(f"Assistant: {response.strip()}", self.max_turn_tokens))
+
+    def _get_state(self, session_id: str) -> Dict[str, Any]:
+        """Fetch (or create) a session's summary state, evicting the least recently used"""
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = {"summary": "", "summarized_turns": 0, "history": []}
+            self.sessions[session_id] = state
+            while len(self.sessions) > self.max_sessions:
+                evicted, _ = self.sessions.popitem(last=False)
+                self._pending.pop(evicted, None)
+        else:
+            self.sessions.move_to_end(session_id)
+        return state
+
+    def _schedule_summary(self, session_id: str, older: List[str], stored: bool = False):
+        """Fold newly aged-out turns into the session summary off the request path"""
+        if session_id in self._pending:
+            return
+        task = asyncio.create_task(self._update_summary(session_id, list(older), stored))
+        self._pending[session_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(session_id, None))
+
+    async def _update_summary(self, session_id: str, older: List[str], stored: bool = False):
+        """Incrementally update a session summary with the turns it doesn't cover yet"""
+        state = self.sessions.get(session_id)
+        if state is None:
+            return
+
+        summary = state["summary"]
+        new_turns = [truncate_to_tokens(turn, self.max_turn_tokens) for turn in older[state["summarized_turns"]:]]
+
+        # Bound the summarization input as well: fold the turns in oldest-first
+        # batches that each fit the input budget, so none are skipped
+        for batch in self._batches(new_turns, self.summary_tokens * 4):
+            folded = None
+            if self.summarizer:
+                try:
+                    folded = await self.summarizer(summary, batch, self.summary_tokens)
+                except Exception as e:
+                    logger.warning(f"Summarizer failed, using extractive summary: {str(e)}")
+            if not folded:
+                folded = self._extractive_summary(summary, batch)
+            summary = truncate_to_tokens(folded.strip(), self.summary_tokens, keep="tail")
+
+        state["summary"] = summary
+        if stored:
+            # Recorded turns now covered by the summary are no longer needed
+            del state["history"][:len(older)]
+            state["summarized_turns"] = 0
+        else:
+            state["summarized_turns"] = len(older)
+        logger.info(f"Updated conversation summary for session {session_id} ({len(older)} turns folded)")
+
+    @staticmethod
+    def _batches(turns: List[str], max_tokens: int) -> List[List[str]]:
+        """Split turns, in order, into batches of at most max_tokens (at least one turn each)"""
+        batches: List[List[str]] = []
+        used = 0
+        for turn in turns:
+            cost = estimate_tokens(turn)
+            if not batches or used + cost > max_tokens:
+                batches.append([])
+                used = 0
+            batches[-1].append(turn)
+            used += cost
+        return batches
+
+    def _extractive_summary(self, previous: str, turns: List[str]) -> str:
+        """Fallback summary: the first sentence of each new turn appended to the old summary"""
+        sentences = []
+        for turn in turns:
+            first = turn.split(". ")[0].strip()
+            sentences.append(first if first.endswith((".", "?", "!")) else first + ".")
+        return " ".join(filter(None, [previous] + sentences))
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory usage for health reporting"""
+        return {
+            "sessions": len(self.sessions),
+            "pending_summaries": len(self._pending),
+            "token_budget": self.token_budget,
+            "recent_turns": self.recent_turns
+        }
@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Routing decisions go to their own logger so they can be collected for offline tuning
+decision_logger = logging.getLogger("model_router.decisions")
+
+PROGRAM_KEYWORDS = {
+    "snap": ["snap", "food stamp", "ebt", "nutrition"],
+    "housing": ["housing", "section 8", "rent", "shelter", "voucher"],
+    "medicaid": ["medicaid"],
+    "medicare": ["medicare"],
+    "aca": ["aca", "marketplace", "obamacare", "affordable care"],
+    "chip": ["chip", "children's health"],
+}
+
+# Whole-word (optionally plural) matches, so "rent" doesn't hit "current" or "snap" "snapshot"
+PROGRAM_PATTERNS = {
+    name: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")s?\b", re.IGNORECASE)
+    for name, keywords in PROGRAM_KEYWORDS.items()
+}
+
+DEFAULT_RULES = {
+    # Queries at or under this many words may go to the small model
+    "max_simple_words": 12,
+    # Minimum relevance of the top retrieved document for the small model
+    "min_relevance": 0.3,
+    # Queries mentioning more programs than this need the large model
+    "max_simple_programs": 1,
+    # Always small: chit-chat and simple lookups
+    "simple_patterns": [
+        r"^\s*(hi|hello|hey|thanks|thank you|ok|okay|bye|goodbye)\b",
+        r"\b(phone|number|call|website|address|hours|open|where is|located)\b",
+    ],
+    # Always large: eligibility reasoning, comparisons and calculations
+    "complex_patterns": [
+        r"\b(eligib\w*|qualify|qualifies|disqualif\w*)\b",
+        r"\b(compare|difference|versus|vs\.?|both|either|combination)\b",
+        r"\b(calculate|how much|estimate|income limit|household of|family of)\b",
+        r"\bif (i|we|my)\b",
+    ],
+    # Intents (from the in-process intent classifier, see intent_router.py)
+    # that go to the small or the large model
+    "simple_intents": ["greet", "goodbye", "affirm", "deny", "ask_local_office", "ask_general_help"],
+    "complex_intents": ["ask_eligibility"],
+}
+
+
+class ModelRouter:
+    """Chooses between a small fast model and the large model for each query"""
+
+    def __init__(self, large_model: str):
+        self.large_model = large_model
+        self.small_model = os.getenv("LLM_SMALL_MODEL", "")
+        self.rules = self._load_rules(os.getenv("LLM_ROUTER_CONFIG"))
+        self.simple_patterns = [re.compile(p, re.IGNORECASE) for p in self.rules["simple_patterns"]]
+        self.complex_patterns = [re.compile(p, re.IGNORECASE) for p in self.rules["complex_patterns"]]
+        self.simple_intents = set(self.rules["simple_intents"])
+        self.complex_intents = set(self.rules["complex_intents"])
+        self.decision_counts = {"small": 0, "large": 0}
+
+        log_path = os.getenv("LLM_ROUTER_LOG")
+        if log_path and not decision_logger.handlers:
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            decision_logger.addHandler(handler)
+
+    @property
+    def enabled(self) -> bool:
+        """Routing only applies when a distinct small model is configured"""
+        return bool(self.small_model) and self.small_model != self.large_model
+
+    def _load_rules(self, config_path: Optional[str]) -> Dict[str, Any]:
+        """Load routing rules, overriding defaults from an optional JSON file"""
+        rules = dict(DEFAULT_RULES)
+        if config_path:
+            try:
+                with open(config_path) as f:
+                    rules.update(json.load(f))
+                logger.info(f"Loaded model routing rules from {config_path}")
+            except Exception as e:
+                logger.warning(f"Failed to load routing rules from {config_path}: {str(e)}")
+        return rules
+
+    def route(
+        self,
+        query: str,
+        context_docs: List[Dict[str, Any]],
+        intent: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Classify a query and pick a model
+
+        Args:
+            query: The user's query
+            context_docs: Retrieved documents (their relevance is used as a confidence signal)
+            intent: Intent label from the intent classifier, if it was confident
+
+        Returns:
+            Routing decision with the chosen model, tier and reasons
+        """
+        words = len(query.split())
+        top_relevance = max((doc.get("relevance", 0.0) for doc in context_docs), default=0.0)
+        programs = [name for name, pattern in PROGRAM_PATTERNS.items() if pattern.search(query)]
+
+        reasons = []
+        if not self.enabled:
+            tier = "large"
+            reasons.append("router_disabled")
+        elif any(p.search(query) for p in self.complex_patterns):
+            tier = "large"
+            reasons.append("complex_pattern")
+        elif intent in self.complex_intents:
+            tier = "large"
+            reasons.append("complex_intent")
+        elif len(programs) > self.rules["max_simple_programs"]:
+            tier = "large"
+            reasons.append("multi_program")
+        elif any(p.search(query) for p in self.simple_patterns) or intent in self.simple_intents:
+            tier = "small"
+            reasons.append("simple_intent")
+        elif words <= self.rules["max_simple_words"] and top_relevance >= self.rules["min_relevance"]:
+            tier = "small"
+            reasons.append("short_confident")
+        else:
+            tier = "large"
+            reasons.append("long_or_low_confidence")
+
+        decision = {
+            "tier": tier,
+            "model": self.small_model if tier == "small" else self.large_model,
+            "reasons": reasons,
+            "words": words,
+            "top_relevance": round(top_relevance, 3),
+            "programs": programs,
+            "intent": intent,
+        }
+
+        self.decision_counts[tier] += 1
+        decision_logger.info(json.dumps({"query": query[:200], **decision}))
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing configuration and decision counts for health reporting"""
+        return {
+            "enabled": self.enabled,
+            "small_model": self.small_model or None,
+            "large_model": self.large_model,
+            "decisions": dict(self.decision_counts),
+        }
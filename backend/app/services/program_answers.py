@@ -0,0 +1,217 @@
+import os
+import re
+import logging
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+
+from app.models.query_models import QueryResponse
+
+logger = logging.getLogger(__name__)
+
+AnswerFn = Callable[[str, Optional[str]], Awaitable[QueryResponse]]
+
+ProgramKey = Tuple[str, str]
+
+
+# Other names callers use for the default programs
+PROGRAM_ALIASES = {
+    "SNAP": ["food stamps", "food stamp", "ebt", "food assistance", "nutrition assistance"],
+    "housing assistance": ["housing", "section 8", "housing voucher", "housing choice voucher", "rent assistance", "rental assistance"],
+    "healthcare": ["health care", "health coverage", "health insurance", "medical assistance"]
+}
+
+# Words that don't change which program is meant ("SNAP benefits", "the housing program")
+FILLER_WORDS = {"the", "program", "programs", "benefit", "benefits"}
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def normalize_program(program: str) -> str:
+    """Lowercase words of a program name, without punctuation or filler words"""
+    words = re.findall(r"[a-z0-9]+", program.lower())
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+class ProgramAnswerCache:
+    """
+    Precomputed answers to "tell me about <program>" for each known program
+    and location.
+
+    Answers are generated once per RAG index version. A background task
+    watches the index version and regenerates the configured (program,
+    location) pairs when it changes, serving the previous answers until the
+    new ones are ready. Other locations for a known program are generated
+    on first request and kept (up to `max_entries`) until the next index
+    change. Nothing is generated while generation is degraded, and answers
+    that didn't come from the LLM (`QueryResponse.degraded`) are returned
+    but never stored.
+    """
+
+    def __init__(
+        self,
+        answer: AnswerFn,
+        index_version: Callable[[], Optional[str]],
+        generation_ready: Callable[[], bool]
+    ):
+        self.answer = answer
+        self.index_version = index_version
+        self.generation_ready = generation_ready
+        self.programs = _split(os.getenv("PROGRAM_ANSWER_PROGRAMS", "SNAP,housing assistance,healthcare"))
+        # "" stands for "no location given"
+        self.locations = [""] + _split(os.getenv("PROGRAM_ANSWER_LOCATIONS", ""))
+        self.check_interval = float(os.getenv("PROGRAM_ANSWER_CHECK_INTERVAL", "60"))
+        self.max_entries = int(os.getenv("PROGRAM_ANSWER_MAX_ENTRIES", "256"))
+        self.aliases = self._load_aliases(os.getenv("PROGRAM_ANSWER_ALIASES", ""))
+
+        # (program, location) -> (index version, answer), least recently used first
+        self.entries: "OrderedDict[ProgramKey, Tuple[str, QueryResponse]]" = OrderedDict()
+        self._pending: Dict[ProgramKey, asyncio.Task] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.stats_counters = {"hits": 0, "misses": 0, "refreshes": 0, "failed": 0}
+
+    @staticmethod
+    def build_query(program: str, location: Optional[str] = None) -> str:
+        """The detailed-information question asked for a program"""
+        where = f" in {location}" if location else ""
+        return f"Tell me detailed information about {program}{where} including eligibility, application process, and benefits."
+
+    def _load_aliases(self, configured: str) -> Dict[str, str]:
+        """
+        Normalized name or alias -> configured program name
+
+        Built-in aliases apply to the programs that are configured;
+        PROGRAM_ANSWER_ALIASES adds more as "alias=program;alias=program".
+        """
+        known = {normalize_program(program): program for program in self.programs}
+        aliases = dict(known)
+        for program, names in PROGRAM_ALIASES.items():
+            canonical = known.get(normalize_program(program))
+            if canonical is not None:
+                aliases.update((normalize_program(name), canonical) for name in names)
+        for item in configured.split(";"):
+            alias, _, program = item.partition("=")
+            canonical = known.get(normalize_program(program))
+            if not alias.strip() or canonical is None:
+                if item.strip():
+                    logger.warning(f"Ignoring program alias '{item.strip()}': expected alias=program for a configured program")
+                continue
+            aliases[normalize_program(alias)] = canonical
+        return aliases
+
+    def canonical_program(self, program: str) -> Optional[str]:
+        """The configured name for a program or one of its aliases, or None if it isn't cached"""
+        return self.aliases.get(normalize_program(program))
+
+    def _key(self, program: str, location: Optional[str]) -> ProgramKey:
+        return program, (location or "").strip().lower()
+
+    async def start(self):
+        """Start watching the index version in the background"""
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def shutdown(self):
+        """Stop background refreshes"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    def cached(self, program: str, location: Optional[str] = None) -> Optional[QueryResponse]:
+        """Stored answer for a program and location, if there is one"""
+        canonical = self.canonical_program(program)
+        if canonical is None:
+            return None
+
+        key = self._key(canonical, location)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        self.stats_counters["hits"] += 1
+        return entry[1]
+
+    async def get(self, program: str, location: Optional[str] = None) -> Optional[QueryResponse]:
+        """
+        Cached answer for a program and location, generating it on a miss.
+        Returns None for programs that aren't cached, or when no answer can
+        be generated right now.
+        """
+        answer = self.cached(program, location)
+        canonical = self.canonical_program(program)
+        if answer is not None or canonical is None:
+            return answer
+
+        key = self._key(canonical, location)
+        self.stats_counters["misses"] += 1
+        version = self.index_version()
+        if version is None or not self.generation_ready():
+            return None
+        return await self._generate(key, location.strip() if location else None, version)
+
+    async def _generate(self, key: ProgramKey, location: Optional[str], version: str) -> Optional[QueryResponse]:
+        """Generate and store one answer (once, even if requested concurrently)"""
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute(key, location, version))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: ProgramKey, location: Optional[str], version: str) -> Optional[QueryResponse]:
+        try:
+            answer = await self.answer(key[0], location)
+            if answer.degraded or self.index_version() != version:
+                # Not from the LLM, or generated against an index that just changed
+                return answer
+            self.entries[key] = (version, answer)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return answer
+        except Exception as e:
+            self.stats_counters["failed"] += 1
+            logger.error(f"Error generating answer for {key[0]}: {str(e)}")
+            return None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                version = self.index_version()
+                if version is not None and self.generation_ready():
+                    await self.refresh(version)
+            except Exception as e:
+                logger.error(f"Error refreshing program answers: {str(e)}")
+            await asyncio.sleep(self.check_interval)
+
+    async def refresh(self, version: str):
+        """Generate any configured answer that is missing or from an older index version"""
+        stale = [
+            (program, location)
+            for program in self.programs
+            for location in self.locations
+            if self.entries.get(self._key(program, location), (None,))[0] != version
+        ]
+        if not stale:
+            return
+
+        logger.info(f"Precomputing {len(stale)} program answers for index version {version}")
+        # One at a time, so refreshes don't crowd out live queries
+        for program, location in stale:
+            await self._generate(self._key(program, location), location or None, version)
+        self.stats_counters["refreshes"] += 1
+
+        # On-demand answers from older versions are regenerated when next asked for
+        for key in [key for key, (entry_version, _) in self.entries.items() if entry_version != version]:
+            del self.entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics for health reporting"""
+        version = self.index_version()
+        return {
+            **self.stats_counters,
+            "entries": len(self.entries),
+            "current": sum(1 for entry_version, _ in self.entries.values() if entry_version == version),
+            "programs": self.programs,
+            "index_version": version
+        }
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import logging
 from typing import List, Dict, Any, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -9,6 +10,8 @@ from langchain.schema import Document
 import asyncio
 from pathlib import Path
 
+from app.utils.deadline import Deadline
+
 logger = logging.getLogger(__name__)
 
 class RAGService:
@@ -20,6 +23,9 @@ class RAGService:
         self.text_splitter = None
         self.documents = []
         self.is_initialized = False
+        # Changes whenever the indexed corpus changes; answers derived from
+        # the index can be cached against it
+        self.index_version: Optional[str] = None
         
     async def initialize(self):
         """Initialize the RAG service with embeddings and vector store"""
@@ -215,6 +221,7 @@ class RAGService:
             # Split documents into chunks
             texts = self.text_splitter.split_documents(self.documents)
             logger.info(f"Split documents into {len(texts)} chunks")
+            self.index_version = self._next_version("", texts)
             
             # Create vector store (using FAISS for better performance)
             if self.embeddings:
@@ -236,13 +243,19 @@ class RAGService:
             logger.error(f"Error creating vector store: {str(e)}")
             raise
     
-    async def retrieve_documents(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    async def retrieve_documents(
+        self,
+        query: str,
+        k: int = 5,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents for a given query
         
         Args:
             query: The search query
             k: Number of documents to retrieve
+            deadline: Request deadline; retrieval is skipped once it has passed
             
         Returns:
             List of relevant documents with metadata
@@ -251,6 +264,10 @@ class RAGService:
             if not self.is_initialized:
                 raise RuntimeError("RAG service not initialized")
             
+            if deadline and deadline.expired:
+                logger.warning("Deadline passed before retrieval, skipping document search")
+                return []
+            
             if self.vectorstore:
                 # Use vector store for semantic search
                 docs = self.vectorstore.similarity_search_with_score(query, k=k)
@@ -290,6 +307,7 @@ class RAGService:
             
             # Add to vector store
             self.vectorstore.add_documents(chunks)
+            self.index_version = self._next_version(self.index_version or "", chunks)
             
             # Save updated vector store
             vectorstore_path = Path(__file__).parent.parent.parent / "vectorstore"
@@ -301,6 +319,13 @@ class RAGService:
             logger.error(f"Error adding document: {str(e)}")
             raise
     
+    def _next_version(self, previous: str, chunks: List[Document]) -> str:
+        """Index version after adding chunks to the index at `previous`"""
+        digest = hashlib.sha256(previous.encode("utf-8"))
+        for chunk in chunks:
+            digest.update(chunk.page_content.encode("utf-8"))
+        return digest.hexdigest()[:16]
+    
     async def _keyword_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Simple keyword-based search fallback"""
         try:
@@ -339,7 +364,8 @@ class RAGService:
                 "initialized": self.is_initialized,
                 "vectorstore_available": self.vectorstore is not None,
                 "embeddings_available": self.embeddings is not None,
-                "document_count": len(self.documents) if self.documents else 0
+                "document_count": len(self.documents) if self.documents else 0,
+                "index_version": self.index_version
             }
             
             if self.is_initialized:
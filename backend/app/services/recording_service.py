@@ -0,0 +1,93 @@
+import os
+import logging
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from app.utils.deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API_HOST = "api.twilio.com"
+
+
+class RecordingFetchError(Exception):
+    """Raised when a recording can't be fetched"""
+
+
+class RecordingFetcher:
+    """
+    Downloads call recordings for in-process turn handling.
+
+    Uses one pooled keep-alive session. Only hosts in RECORDING_ALLOWED_HOSTS
+    are fetched, because the URL comes from the caller. Twilio API URLs are
+    fetched with the account credentials and as 8 kHz WAV. Downloads stop at
+    the upload size limit and within the request deadline.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.allowed_hosts = {
+            host.strip().lower()
+            for host in os.getenv("RECORDING_ALLOWED_HOSTS", TWILIO_API_HOST).split(",")
+            if host.strip()
+        }
+        account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.twilio_auth = (account_sid, auth_token) if account_sid and auth_token else None
+        self.http = requests.Session()
+        self.stats_counters = {"fetched": 0, "failed": 0, "bytes": 0}
+
+    def resolve(self, url: str) -> Tuple[str, Optional[Tuple[str, str]]]:
+        """
+        Validate a recording URL and return the URL to fetch and its
+        credentials; raises ValueError for hosts that aren't allowed
+        """
+        parsed = urlparse(url)
+        host = (parsed.hostname or "").lower()
+        if parsed.scheme not in ("https", "http") or host not in self.allowed_hosts:
+            raise ValueError(f"Recording host not allowed: {host or url}")
+
+        if host == TWILIO_API_HOST:
+            # RecordingUrl has no extension; ask for WAV, which is decoded natively
+            if not os.path.splitext(parsed.path)[1]:
+                url = f"{url}.wav"
+            return url, self.twilio_auth
+        return url, None
+
+    async def fetch(self, url: str, deadline: Deadline) -> bytes:
+        """Download a recording within the deadline"""
+        fetch_url, auth = self.resolve(url)
+        deadline.check("recording download")
+        try:
+            data = await deadline.run(
+                asyncio.to_thread(self._download, fetch_url, auth, deadline.timeout(30.0)),
+                "recording download"
+            )
+            self.stats_counters["fetched"] += 1
+            self.stats_counters["bytes"] += len(data)
+            return data
+        except DeadlineExceeded:
+            self.stats_counters["failed"] += 1
+            raise
+        except Exception as e:
+            self.stats_counters["failed"] += 1
+            logger.error(f"Error fetching recording: {str(e)}")
+            raise RecordingFetchError(str(e))
+
+    def _download(self, url: str, auth: Optional[Tuple[str, str]], timeout: Optional[float]) -> bytes:
+        with self.http.get(url, auth=auth, timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise RecordingFetchError(f"Recording download failed: {response.status_code}")
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                data += chunk
+                if len(data) > self.max_bytes:
+                    raise RecordingFetchError(f"Recording exceeds the {self.max_bytes} byte limit")
+            return bytes(data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Download counters for health reporting"""
+        return {**self.stats_counters, "allowed_hosts": sorted(self.allowed_hosts)}
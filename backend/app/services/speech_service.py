@@ -1,38 +1,92 @@
 import os
 import logging
 import asyncio
-import tempfile
-from typing import Optional, Dict, Any
-import whisper
+from typing import Optional, Dict, Any, AsyncIterator, Tuple, Union
 from gtts import gTTS
 from gtts.lang import tts_langs
 import openai
 import io
 import base64
+import numpy as np
+
+from app.services.audio_cache import AudioCache
+from app.services.local_tts import LocalTTSEngine
+from app.services.transcription_pool import TranscriptionPool, TranscriptionBusy, load_model, run_model
+from app.utils.audio import SAMPLE_RATE, MEDIA_TYPES, decode_audio, encode_wav, streaming_wav_header, transcode, wav_payload
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.vad import EnergyVAD, SpeechSegmenter
+from app.utils.text import SentenceSplitter
 
 logger = logging.getLogger(__name__)
 
+ERROR_PROMPT = "I'm sorry, there was an error processing your request."
+
+class TranscriptionFailed(Exception):
+    """Raised when audio could not be transcribed (no engine available, or the engine failed)"""
+
+
+class SynthesisFailed(Exception):
+    """Raised instead of returning the error prompt's audio when a caller needs the real speech"""
+
+
 class SpeechService:
     """Service for speech recognition and synthesis"""
     
     def __init__(self):
         self.whisper_model = None
         self.is_initialized = False
+        # "whisper" (PyTorch, fp32) or "faster-whisper" (CTranslate2, quantized)
+        self.stt_engine = os.getenv("STT_ENGINE", "whisper").lower()
+        self.stt_model_size = os.getenv("STT_MODEL_SIZE", "base")
+        self.stt_compute_type = os.getenv("STT_COMPUTE_TYPE", "int8")
+        self.stt_cpu_threads = int(os.getenv("STT_CPU_THREADS", "0"))
+        # Worker processes for transcription; 0 keeps a single in-process model
+        self.stt_workers = int(os.getenv("STT_WORKERS", "2"))
+        self.transcription_pool: Optional[TranscriptionPool] = None
+        # Silence trimming before transcription
+        self.vad_enabled = os.getenv("VAD_ENABLED", "true").lower() == "true"
+        self.vad = EnergyVAD(
+            margin_db=float(os.getenv("VAD_MARGIN_DB", "12")),
+            max_pause=float(os.getenv("VAD_MAX_PAUSE", "0.4")),
+            min_speech=float(os.getenv("VAD_MIN_SPEECH", "0.25"))
+        )
+        self.vad_stats = {"clips": 0, "no_speech": 0, "original_seconds": 0.0, "removed_seconds": 0.0}
+        # Streaming transcription: silence that ends an utterance, partial hypothesis cadence
+        self.stream_end_silence = float(os.getenv("STREAM_END_SILENCE", "0.5"))
+        self.stream_partial_interval = float(os.getenv("STREAM_PARTIAL_INTERVAL", "1.0"))
+        self.stream_max_segment = float(os.getenv("STREAM_MAX_SEGMENT", "15"))
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.default_language = "en"
+        # Sentences synthesized in parallel when pipelining streamed text
+        self.pipeline_concurrency = int(os.getenv("TTS_PIPELINE_CONCURRENCY", "3"))
+        # "gtts" (network, MP3) or "coqui" (local model, WAV)
+        self.tts_engine = os.getenv("TTS_ENGINE", "gtts").lower()
+        self.audio_format = "wav" if self.tts_engine == "coqui" else "mp3"
+        self.local_tts: Optional[LocalTTSEngine] = None
+        self.audio_cache = AudioCache()
         
     async def initialize(self):
         """Initialize the speech service"""
         try:
             logger.info("Initializing speech service...")
             
+            self.audio_cache.initialize()
+            
+            # Load the local TTS model up front if it is selected
+            if self.tts_engine == "coqui":
+                try:
+                    self.local_tts = LocalTTSEngine()
+                    await self.local_tts.initialize()
+                except Exception as e:
+                    logger.warning(f"Failed to load local TTS, falling back to gTTS: {str(e)}")
+                    if self.local_tts:
+                        self.local_tts.shutdown()
+                    self.local_tts = None
+                    self.tts_engine = "gtts"
+                    self.audio_format = "mp3"
+            
             # Initialize Whisper model for speech recognition
-            try:
-                self.whisper_model = whisper.load_model("base")
-                logger.info("Whisper model loaded successfully")
-            except Exception as e:
-                logger.warning(f"Failed to load Whisper model: {str(e)}")
-                self.whisper_model = None
+            await self._load_transcription_model()
             
             # Test OpenAI API if available
             if self.openai_api_key:
@@ -49,43 +103,104 @@ class SpeechService:
             logger.error(f"Failed to initialize speech service: {str(e)}")
             raise
     
-    async def transcribe_audio(self, audio_path: str) -> str:
+    async def _load_transcription_model(self):
+        """Start the transcription worker pool, or load a single in-process model"""
+        if self.stt_workers > 0:
+            try:
+                self.transcription_pool = TranscriptionPool(self.stt_engine, self.stt_model_size, self.stt_compute_type)
+                await self.transcription_pool.initialize()
+                self.stt_engine = self.transcription_pool.engine
+                return
+            except Exception as e:
+                logger.warning(f"Failed to start transcription pool, loading in-process model: {str(e)}")
+                if self.transcription_pool:
+                    self.transcription_pool.shutdown()
+                self.transcription_pool = None
+        
+        try:
+            self.stt_engine, self.whisper_model = await asyncio.to_thread(
+                load_model,
+                self.stt_engine,
+                self.stt_model_size,
+                self.stt_compute_type,
+                self.stt_cpu_threads
+            )
+            logger.info(f"{self.stt_engine} model '{self.stt_model_size}' loaded successfully")
+        except Exception as e:
+            logger.warning(f"Failed to load Whisper model: {str(e)}")
+            self.whisper_model = None
+    
+    async def transcribe_audio(self, audio: Union[str, np.ndarray]) -> str:
         """
         Transcribe audio to text using Whisper or OpenAI
         
         Args:
-            audio_path: Path to the audio file
+            audio: Path to an audio file, or mono float32 samples at 16 kHz
             
         Returns:
-            Transcribed text
+            Transcribed text ("" when there is no speech)
+            
+        Raises:
+            TranscriptionFailed: if no engine could transcribe the audio
+            TranscriptionBusy: if the transcription queue is full
         """
         try:
             if not self.is_initialized:
                 raise RuntimeError("Speech service not initialized")
             
+            # Drop silence before paying for transcription; skip it entirely without speech
+            if self.vad_enabled and isinstance(audio, np.ndarray):
+                audio = await asyncio.to_thread(self._trim_silence, audio)
+                if len(audio) == 0:
+                    return ""
+            
             # Try OpenAI Whisper API first (better quality)
             if self.openai_api_key:
                 try:
-                    return await self._transcribe_with_openai(audio_path)
+                    return await self._transcribe_with_openai(audio)
                 except Exception as e:
                     logger.warning(f"OpenAI transcription failed: {str(e)}")
             
             # Fallback to local Whisper model
-            if self.whisper_model:
-                return await self._transcribe_with_whisper(audio_path)
+            if self.transcription_pool or self.whisper_model:
+                return await self._transcribe_with_whisper(audio)
             
-            # If neither works, return a placeholder
-            logger.warning("No transcription service available")
-            return "I'm sorry, I couldn't understand the audio. Please try speaking more clearly."
+            raise TranscriptionFailed("No transcription service available")
             
+        except (TranscriptionBusy, TranscriptionFailed):
+            raise
         except Exception as e:
             logger.error(f"Error transcribing audio: {str(e)}")
-            return "I'm sorry, there was an error processing your audio."
+            raise TranscriptionFailed(str(e))
     
-    async def _transcribe_with_openai(self, audio_path: str) -> str:
+    def _trim_silence(self, samples: np.ndarray) -> np.ndarray:
+        """Run VAD on 16 kHz samples and record how much audio it removed"""
+        trimmed, report = self.vad.trim(samples, SAMPLE_RATE)
+        
+        self.vad_stats["clips"] += 1
+        self.vad_stats["original_seconds"] += report["original_seconds"]
+        self.vad_stats["removed_seconds"] += report["removed_seconds"]
+        if not report["has_speech"]:
+            self.vad_stats["no_speech"] += 1
+            logger.info(f"VAD found no speech in {report['original_seconds']}s of audio, skipping transcription")
+        else:
+            logger.info(
+                f"VAD kept {report['kept_seconds']}s of {report['original_seconds']}s "
+                f"({report['segments']} segments, {report['removed_seconds']}s removed)"
+            )
+        return trimmed
+    
+    async def _transcribe_with_openai(self, audio: Union[str, np.ndarray]) -> str:
         """Transcribe using OpenAI Whisper API"""
         try:
-            with open(audio_path, "rb") as audio_file:
+            if isinstance(audio, str):
+                audio_file = open(audio, "rb")
+            else:
+                # The API needs a named file; send the samples as an in-memory WAV
+                audio_file = io.BytesIO(encode_wav(audio, SAMPLE_RATE))
+                audio_file.name = "audio.wav"
+            
+            with audio_file:
                 response = await asyncio.to_thread(
                     openai.Audio.transcribe,
                     "whisper-1",
@@ -101,19 +216,24 @@ class SpeechService:
             logger.error(f"OpenAI transcription error: {str(e)}")
             raise
     
-    async def _transcribe_with_whisper(self, audio_path: str) -> str:
-        """Transcribe using local Whisper model"""
+    async def _transcribe_with_whisper(self, audio: Union[str, np.ndarray], wait: bool = True) -> str:
+        """
+        Transcribe using the local Whisper model (audio path or 16 kHz float32 samples)
+        
+        With wait=False, raises TranscriptionBusy rather than wait for (or
+        take the last free) pool worker.
+        """
         try:
-            result = await asyncio.to_thread(
-                self.whisper_model.transcribe,
-                audio_path,
-                language="en"
-            )
+            if self.transcription_pool:
+                transcription = await self.transcription_pool.transcribe(audio, wait=wait)
+            else:
+                transcription = await asyncio.to_thread(run_model, self.stt_engine, self.whisper_model, audio)
             
-            transcription = result.get("text", "")
             logger.info(f"Whisper transcription successful: {transcription[:50]}...")
             return transcription
             
+        except TranscriptionBusy:
+            raise
         except Exception as e:
             logger.error(f"Whisper transcription error: {str(e)}")
             raise
@@ -123,7 +243,9 @@ class SpeechService:
         text: str, 
         voice: str = "neutral",
         speed: float = 1.0,
-        language: str = "en"
+        language: str = "en",
+        deadline: Optional[Deadline] = None,
+        output_format: Optional[str] = None
     ) -> bytes:
         """
         Convert text to speech using gTTS with SSML support
@@ -133,27 +255,263 @@ class SpeechService:
             voice: Voice type (male, female, neutral)
             speed: Speech speed multiplier
             language: Language code
+            deadline: Request deadline; raises DeadlineExceeded once it has passed
+            output_format: "mulaw" for 8 kHz telephony audio; defaults to the engine's format
             
         Returns:
             Audio data as bytes
         """
+        _, audio_data = await self.synthesize_cached(text, voice, speed, language, deadline, output_format)
+        return audio_data
+    
+    async def synthesize_cached(
+        self,
+        text: str,
+        voice: str = "neutral",
+        speed: float = 1.0,
+        language: str = "en",
+        deadline: Optional[Deadline] = None,
+        output_format: Optional[str] = None,
+        fallback: bool = True
+    ) -> Tuple[str, bytes]:
+        """
+        Synthesize speech through the audio cache
+        
+        The output format is part of the cache key, so telephony audio is
+        transcoded once and then served as is. If synthesis fails, the audio
+        of ERROR_PROMPT is returned instead, or SynthesisFailed is raised
+        when `fallback` is False.
+        
+        Returns:
+            The audio ID (content address, servable via `get_cached_audio_path`) and the audio bytes
+        """
         try:
             if not self.is_initialized:
                 raise RuntimeError("Speech service not initialized")
             
-            # Process text with SSML if needed
-            processed_text = self._process_ssml(text, voice, speed)
+            deadline = deadline or Deadline(None)
+            output_format = self.output_format(output_format)
+            
+            audio_id = AudioCache.make_key(text, language, voice, speed, self.tts_engine, output_format)
+            audio_data = await self.audio_cache.get(audio_id)
+            if audio_data is not None:
+                return audio_id, audio_data
             
-            # Generate speech using gTTS
-            audio_data = await self._synthesize_with_gtts(processed_text, language)
+            # Concurrent requests for the same audio share one synthesis
+            audio_data = await deadline.run(
+                self.audio_cache.create(audio_id, lambda: self._render(text, voice, speed, language, output_format)),
+                "synthesis"
+            )
             
             logger.info(f"Speech synthesis successful for text: {text[:50]}...")
-            return audio_data
+            return audio_id, audio_data
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error synthesizing speech: {str(e)}")
-            # Return a simple error message as audio
-            return await self._synthesize_with_gtts("I'm sorry, there was an error processing your request.", language)
+            if not fallback:
+                raise SynthesisFailed(str(e)) from e
+            # Return a simple error message as audio (cached, since it never changes)
+            if text == ERROR_PROMPT:
+                raise
+            return await self.synthesize_cached(ERROR_PROMPT, "neutral", 1.0, language, output_format=output_format)
+    
+    async def _render(self, text: str, voice: str, speed: float, language: str, output_format: str) -> bytes:
+        """Synthesize with the configured engine and convert to the output format"""
+        # Process text with SSML if needed
+        processed_text = self._process_ssml(text, voice, speed)
+        
+        audio_data = await self._synthesize_with_engine(processed_text, language)
+        if output_format != self.audio_format:
+            audio_data = await asyncio.to_thread(transcode, audio_data, output_format)
+        return audio_data
+    
+    def output_format(self, requested: Optional[str] = None) -> str:
+        """Effective output format: the engine's own, or "mulaw" when requested"""
+        return "mulaw" if requested == "mulaw" else self.audio_format
+    
+    def get_cached_audio_path(self, audio_id: str):
+        """Path of cached audio on disk, for serving the file directly"""
+        return self.audio_cache.path_for(audio_id)
+    
+    async def synthesize_stream(
+        self,
+        text_stream: AsyncIterator[str],
+        voice: str = "neutral",
+        speed: float = 1.0,
+        language: str = "en",
+        deadline: Optional[Deadline] = None,
+        output_format: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Synthesize streamed text sentence by sentence
+        
+        Complete sentences are split off as text arrives and synthesized in
+        parallel (up to `pipeline_concurrency` at a time); the audio segments
+        are yielded in sentence order, so playback can start while the rest of
+        the text is still being generated.
+        
+        Args:
+            text_stream: Async iterator of text chunks (e.g. LLM tokens)
+            voice: Voice type (male, female, neutral)
+            speed: Speech speed multiplier
+            language: Language code
+            deadline: Request deadline; remaining sentences are dropped once it passes
+            output_format: "mulaw" for 8 kHz telephony audio; defaults to the engine's format
+            
+        Yields:
+            Audio segments as bytes, in order. For WAV output the first segment
+            is a streaming header and the rest are bare samples, so the whole
+            stream plays as one file.
+        """
+        deadline = deadline or Deadline(None)
+        output_format = self.output_format(output_format)
+        semaphore = asyncio.Semaphore(self.pipeline_concurrency)
+        segments: asyncio.Queue = asyncio.Queue()
+        
+        async def synthesize(sentence: str) -> bytes:
+            async with semaphore:
+                return await self.synthesize_speech(sentence, voice, speed, language, deadline, output_format)
+        
+        async def split_sentences():
+            splitter = SentenceSplitter()
+            try:
+                async for chunk in text_stream:
+                    for sentence in splitter.feed(chunk):
+                        segments.put_nowait(asyncio.create_task(synthesize(sentence)))
+                for sentence in splitter.flush():
+                    segments.put_nowait(asyncio.create_task(synthesize(sentence)))
+            finally:
+                segments.put_nowait(None)
+        
+        producer = asyncio.create_task(split_sentences())
+        first_segment = True
+        try:
+            while True:
+                task = await segments.get()
+                if task is None:
+                    break
+                try:
+                    audio_data = await task
+                    if MEDIA_TYPES[output_format] == MEDIA_TYPES["wav"]:
+                        if first_segment:
+                            yield streaming_wav_header(audio_data)
+                        audio_data = wav_payload(audio_data)
+                    first_segment = False
+                    yield audio_data
+                except DeadlineExceeded as e:
+                    logger.warning(f"Stopping pipelined synthesis: {str(e)}")
+                    break
+        finally:
+            # Stop generating and synthesizing if the client went away or time ran out
+            producer.cancel()
+            while not segments.empty():
+                task = segments.get_nowait()
+                if task is not None:
+                    task.cancel()
+    
+    async def transcribe_stream(self, audio_stream: AsyncIterator[np.ndarray]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Transcribe live audio utterance by utterance
+        
+        Incoming audio is segmented with VAD as it arrives. While someone is
+        speaking, the utterance so far is re-transcribed every
+        `stream_partial_interval` seconds and emitted as a partial hypothesis;
+        once they pause for `stream_end_silence` seconds the utterance is
+        transcribed in full and emitted as final. Finals run in parallel but
+        are emitted in utterance order. Partials never delay a final: they
+        are skipped while one of this stream's finals is pending, and only
+        run on a pool worker that is idle and not the last free one.
+        
+        Args:
+            audio_stream: Async iterator of mono float32 chunks at 16 kHz
+            
+        Yields:
+            Event dicts: speech_start, partial and final (with segment index
+            and text), then done with the full transcript
+        """
+        segmenter = SpeechSegmenter(self.vad, SAMPLE_RATE, self.stream_end_silence, self.stream_max_segment)
+        # Events in emission order: dicts, or tasks that produce a final event
+        events: asyncio.Queue = asyncio.Queue()
+        partial_task: Optional[asyncio.Task] = None
+        pending_finals = set()
+        
+        async def final(index: int, segment: np.ndarray) -> Dict[str, Any]:
+            event = {"type": "final", "segment": index, "text": "", "duration": round(len(segment) / SAMPLE_RATE, 3)}
+            try:
+                event["text"] = (await self.transcribe_audio(segment)).strip()
+            except (TranscriptionBusy, TranscriptionFailed) as e:
+                event["error"] = str(e)
+            return event
+        
+        async def partial(index: int, segment: np.ndarray):
+            try:
+                text = await self._transcribe_with_whisper(segment, wait=False)
+            except Exception as e:
+                logger.debug(f"Skipping partial hypothesis: {str(e)}")
+                return
+            # Drop the partial if its utterance has already been finalized
+            if segmenter.in_speech and segmenter.segment_index == index and text.strip():
+                events.put_nowait({"type": "partial", "segment": index, "text": text.strip()})
+        
+        def start_final(index: int, segment: np.ndarray):
+            task = asyncio.create_task(final(index, segment))
+            pending_finals.add(task)
+            task.add_done_callback(pending_finals.discard)
+            events.put_nowait(task)
+        
+        async def read_audio():
+            nonlocal partial_task
+            last_partial = 0.0
+            try:
+                async for samples in audio_stream:
+                    for event, value in segmenter.feed(samples):
+                        if event == "start":
+                            last_partial = 0.0
+                            events.put_nowait({"type": "speech_start", "segment": value})
+                        else:
+                            start_final(segmenter.segment_index - 1, value)
+                    
+                    # At most one partial in flight, and none while a final is pending
+                    can_partial = (
+                        (self.transcription_pool or self.whisper_model)
+                        and (partial_task is None or partial_task.done())
+                        and not pending_finals
+                    )
+                    if segmenter.in_speech and can_partial and segmenter.segment_seconds - last_partial >= self.stream_partial_interval:
+                        last_partial = segmenter.segment_seconds
+                        partial_task = asyncio.create_task(partial(segmenter.segment_index, segmenter.current()))
+                
+                segment = segmenter.flush()
+                if segment is not None:
+                    start_final(segmenter.segment_index - 1, segment)
+            finally:
+                events.put_nowait(None)
+        
+        reader = asyncio.create_task(read_audio())
+        transcript = []
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                if isinstance(event, asyncio.Task):
+                    event = await event
+                    if event["text"]:
+                        transcript.append(event["text"])
+                yield event
+            
+            await reader
+            yield {"type": "done", "transcript": " ".join(transcript)}
+        finally:
+            reader.cancel()
+            if partial_task:
+                partial_task.cancel()
+            while not events.empty():
+                event = events.get_nowait()
+                if isinstance(event, asyncio.Task):
+                    event.cancel()
     
     def _process_ssml(self, text: str, voice: str, speed: float) -> str:
         """Process text with SSML markup for better speech quality"""
@@ -187,15 +545,21 @@ class SpeechService:
         # In a production system, you'd use a proper SSML-capable TTS engine
         return text.replace("<break time='0.5s'/>", " ").replace("<break time='0.2s'/>", " ").replace("<emphasis>", "").replace("</emphasis>", "").replace("<prosody rate='slow'>", "").replace("<prosody rate='fast'>", "").replace("<prosody rate='medium'>", "").replace("</prosody>", "")
     
+    async def _synthesize_with_engine(self, text: str, language: str) -> bytes:
+        """Synthesize with the local model if loaded, otherwise gTTS"""
+        if self.local_tts:
+            return await self.local_tts.synthesize(text)
+        return await self._synthesize_with_gtts(text, language)
+    
     async def _synthesize_with_gtts(self, text: str, language: str) -> bytes:
         """Synthesize speech using gTTS"""
         try:
             # Create gTTS object
             tts = gTTS(text=text, lang=language, slow=False)
             
-            # Save to bytes buffer
+            # Save to bytes buffer (gTTS makes blocking network calls, so keep it off the event loop)
             audio_buffer = io.BytesIO()
-            tts.write_to_fp(audio_buffer)
+            await asyncio.to_thread(tts.write_to_fp, audio_buffer)
             audio_buffer.seek(0)
             
             return audio_buffer.getvalue()
@@ -204,6 +568,13 @@ class SpeechService:
             logger.error(f"gTTS synthesis error: {str(e)}")
             raise
     
+    async def shutdown(self):
+        """Release worker pools"""
+        if self.local_tts:
+            self.local_tts.shutdown()
+        if self.transcription_pool:
+            self.transcription_pool.shutdown()
+    
     async def get_available_voices(self) -> Dict[str, Any]:
         """Get available voices and languages"""
         try:
@@ -230,9 +601,20 @@ class SpeechService:
         try:
             status = {
                 "initialized": self.is_initialized,
-                "whisper_model_loaded": self.whisper_model is not None,
+                "whisper_model_loaded": self.whisper_model is not None or bool(self.transcription_pool and self.transcription_pool.is_ready),
+                "stt_engine": self.stt_engine,
+                "stt_model_size": self.stt_model_size,
+                "transcription_pool": self.transcription_pool.stats() if self.transcription_pool else None,
+                "vad": {
+                    "enabled": self.vad_enabled,
+                    **{key: round(value, 3) for key, value in self.vad_stats.items()}
+                },
                 "openai_available": bool(self.openai_api_key),
-                "default_language": self.default_language
+                "default_language": self.default_language,
+                "tts_engine": self.tts_engine,
+                "audio_format": self.audio_format,
+                "local_tts": self.local_tts.stats() if self.local_tts else None,
+                "audio_cache": self.audio_cache.stats()
             }
             
             if self.is_initialized:
@@ -253,29 +635,21 @@ class SpeechService:
     
     async def transcribe_audio_file(self, audio_file: bytes, file_format: str = "wav") -> str:
         """
-        Transcribe audio from file bytes
+        Transcribe audio from file bytes, decoded in memory (no temp files)
         
         Args:
             audio_file: Audio file as bytes
-            file_format: Audio file format
+            file_format: Audio file format (detected from the data; kept for compatibility)
             
         Returns:
             Transcribed text
         """
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(suffix=f".{file_format}", delete=False) as temp_file:
-                temp_file.write(audio_file)
-                temp_path = temp_file.name
-            
-            try:
-                # Transcribe the temporary file
-                transcription = await self.transcribe_audio(temp_path)
-                return transcription
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_path)
+            samples = await asyncio.to_thread(decode_audio, audio_file)
+            return await self.transcribe_audio(samples)
                 
+        except (TranscriptionBusy, TranscriptionFailed):
+            raise
         except Exception as e:
             logger.error(f"Error transcribing audio file: {str(e)}")
-            return "I'm sorry, there was an error processing your audio file." 
\ No newline at end of file
+            raise TranscriptionFailed(str(e)) 
\ No newline at end of file
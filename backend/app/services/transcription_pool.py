@@ -0,0 +1,204 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, Any, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Per-process model state, set by the pool initializer in each worker
+_worker_engine: Optional[str] = None
+_worker_model: Any = None
+
+
+class TranscriptionBusy(Exception):
+    """Raised when the transcription queue is full"""
+
+
+def load_model(engine: str, model_size: str, compute_type: str = "int8", cpu_threads: int = 0) -> Tuple[str, Any]:
+    """
+    Load a Whisper model for the given engine ("whisper" or "faster-whisper"),
+    falling back to PyTorch Whisper if faster-whisper is unavailable.
+    Returns the engine actually loaded and the model.
+    """
+    if engine == "faster-whisper":
+        try:
+            from faster_whisper import WhisperModel
+
+            model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+            return engine, model
+        except Exception as e:
+            logger.warning(f"Failed to load faster-whisper, falling back to Whisper: {str(e)}")
+
+    import whisper
+
+    return "whisper", whisper.load_model(model_size)
+
+
+def run_model(engine: str, model: Any, audio: Union[str, Any]) -> str:
+    """Transcribe an audio path or 16 kHz float32 samples with a loaded model"""
+    if engine == "faster-whisper":
+        # Segments are decoded lazily, so consume them here
+        segments, _ = model.transcribe(audio, language="en", beam_size=1)
+        return "".join(segment.text for segment in segments).strip()
+    result = model.transcribe(audio, language="en", fp16=False)
+    return result.get("text", "")
+
+
+def _init_worker(engine: str, model_size: str, compute_type: str, threads: int):
+    """Pin the worker's thread count and load its own model"""
+    global _worker_engine, _worker_model
+
+    # Limit intra-op threads so N workers share the cores instead of oversubscribing them
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+
+    _worker_engine, _worker_model = load_model(engine, model_size, compute_type, threads)
+
+
+def _worker_info() -> Tuple[int, str]:
+    return os.getpid(), _worker_engine
+
+
+def _worker_transcribe(audio: Union[str, Any]) -> str:
+    return run_model(_worker_engine, _worker_model, audio)
+
+
+class TranscriptionPool:
+    """
+    Whisper transcription on a pool of worker processes.
+
+    Each process loads its own model and runs with a fixed torch thread
+    count, so concurrent transcriptions run in parallel without contending
+    for the GIL or for threads used by the rest of the backend. Requests
+    beyond the workers wait in a bounded queue; once it is full, new
+    requests are rejected with TranscriptionBusy rather than piling up.
+    Opportunistic work (streaming partials) passes wait=False: it only
+    starts if a worker is free right now, nothing is queued, and, with more
+    than one worker, another worker stays free for waiting-sensitive work.
+    """
+
+    def __init__(self, engine: str, model_size: str, compute_type: str = "int8"):
+        self.engine = engine
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.workers = int(os.getenv("STT_WORKERS", "2"))
+        self.threads_per_worker = int(os.getenv(
+            "STT_THREADS_PER_WORKER",
+            str(max(1, (os.cpu_count() or 1) // max(1, self.workers)))
+        ))
+        self.max_queue = int(os.getenv("STT_MAX_QUEUE", "8"))
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.is_ready = False
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+        self.stats_counters = {"completed": 0, "failed": 0, "rejected": 0, "busy_seconds": 0.0, "wait_seconds": 0.0}
+
+    async def initialize(self):
+        """Start the worker processes and wait until each has loaded its model"""
+        # Spawn rather than fork: forking a process that already holds torch
+        # thread pools can deadlock the children
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.engine, self.model_size, self.compute_type, self.threads_per_worker)
+        )
+        self._slots = asyncio.Semaphore(self.workers)
+
+        # Submitting one task per worker at once makes the pool start all of them
+        loop = asyncio.get_running_loop()
+        infos = await asyncio.gather(*[
+            loop.run_in_executor(self.executor, _worker_info)
+            for _ in range(self.workers)
+        ])
+        self.engine = infos[0][1]
+        self.is_ready = True
+        logger.info(
+            f"Transcription pool ready: {self.workers} workers x {self.threads_per_worker} threads "
+            f"({self.engine} {self.model_size})"
+        )
+
+    async def transcribe(self, audio: Union[str, Any], wait: bool = True) -> str:
+        """
+        Transcribe on a worker, waiting for a free one if the queue has room
+
+        With wait=False, raises TranscriptionBusy instead of taking a worker
+        that queued or upcoming requests may need.
+        """
+        if not self.is_ready:
+            raise RuntimeError("Transcription pool not initialized")
+
+        if not wait:
+            reserved = 1 if self.workers > 1 else 0
+            if self._queued or self.workers - self._in_flight <= reserved:
+                raise TranscriptionBusy("No idle transcription worker")
+
+        if self._slots.locked() and self._queued >= self.max_queue:
+            self.stats_counters["rejected"] += 1
+            raise TranscriptionBusy(f"Transcription queue full ({self._queued} waiting)")
+
+        queued_at = time.monotonic()
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        started = time.monotonic()
+        self.stats_counters["wait_seconds"] += started - queued_at
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(_worker_transcribe, audio)
+        except Exception:
+            self._finish(started, None)
+            raise
+
+        # The slot is released when the worker is actually done, not when this
+        # caller stops waiting: a caller cancelled by its deadline leaves the
+        # job running, and the worker is still busy until it finishes
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._finish, started, done))
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, started: float, future: Optional[Future]):
+        """Account for a finished (or unsubmitted) job and free its worker slot"""
+        self._in_flight -= 1
+        self.stats_counters["busy_seconds"] += time.monotonic() - started
+        if future is None or future.cancelled() or future.exception() is not None:
+            self.stats_counters["failed"] += 1
+        else:
+            self.stats_counters["completed"] += 1
+        self._slots.release()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilisation for health reporting"""
+        completed = self.stats_counters["completed"] or 1
+        return {
+            "ready": self.is_ready,
+            "engine": self.engine,
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+            "completed": self.stats_counters["completed"],
+            "failed": self.stats_counters["failed"],
+            "rejected": self.stats_counters["rejected"],
+            "avg_transcribe_seconds": round(self.stats_counters["busy_seconds"] / completed, 3),
+            "avg_wait_seconds": round(self.stats_counters["wait_seconds"] / completed, 3),
+        }
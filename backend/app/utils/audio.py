@@ -0,0 +1,347 @@
+import io
+import wave
+import struct
+import subprocess
+from math import gcd
+from functools import lru_cache
+from typing import Optional, Tuple, Dict, Iterator
+
+import numpy as np
+
+MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "mulaw": "audio/wav",  # 8 kHz G.711 mu-law in a WAV container, native to telephony
+}
+
+# Whisper's input rate
+SAMPLE_RATE = 16000
+
+# Telephony (G.711) rate
+TELEPHONY_SAMPLE_RATE = 8000
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_MULAW = 7
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _mulaw_decode_table() -> np.ndarray:
+    """G.711 mu-law byte -> float sample lookup table"""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    samples = np.where(codes & 0x80, -magnitude, magnitude)
+    return (samples / 32768.0).astype(np.float32)
+
+
+MULAW_TO_FLOAT = _mulaw_decode_table()
+
+
+def encode_mulaw(samples: np.ndarray) -> bytes:
+    """Encode float samples in [-1, 1] as G.711 mu-law bytes"""
+    # Reference G.711 on 14-bit magnitudes, with the segment found from log2
+    pcm = (np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0) * 32767.0).astype(np.int32) >> 2
+    negative = pcm < 0
+    magnitude = np.minimum(np.where(negative, -pcm, pcm), 8159) + 0x21
+    segment = np.maximum(np.floor(np.log2(magnitude)).astype(np.int32) - 5, 0)
+    code = np.where(segment > 7, 0x7F, (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F))
+    return (code ^ np.where(negative, 0x7F, 0xFF)).astype(np.uint8).tobytes()
+
+
+def encode_mulaw_wav(samples: np.ndarray, sample_rate: int = TELEPHONY_SAMPLE_RATE) -> bytes:
+    """Encode float samples as a mono mu-law WAV (format 7, 8 bits per sample)"""
+    payload = encode_mulaw(samples)
+    fmt = struct.pack("<HHIIHHH", WAVE_FORMAT_MULAW, 1, sample_rate, sample_rate, 1, 8, 0)
+    fact = struct.pack("<I", len(payload))
+    chunks = (
+        b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"fact" + struct.pack("<I", len(fact)) + fact
+        + b"data" + struct.pack("<I", len(payload)) + payload
+        + (b"\x00" if len(payload) & 1 else b"")
+    )
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode float samples in [-1, 1] as 16-bit mono PCM WAV"""
+    pcm = (np.clip(np.asarray(samples, dtype=np.float32), -1.0, 1.0) * 32767.0).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _wav_chunks(data: bytes) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (chunk id, offset, length) for each chunk of a RIFF/WAVE file"""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        yield chunk_id, offset + 8, min(chunk_size, len(data) - offset - 8)
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+
+def find_wav_data(data: bytes) -> Optional[Tuple[int, int]]:
+    """Return (offset, length) of the data chunk in a RIFF/WAVE file, or None"""
+    for chunk_id, offset, length in _wav_chunks(data):
+        if chunk_id == b"data":
+            return offset, length
+    return None
+
+
+# Filter half-length in taps at the lower of the two rates
+RESAMPLE_HALF_TAPS = 8
+
+
+@lru_cache(maxsize=16)
+def _polyphase_filter(up: int, down: int, half_taps: int) -> np.ndarray:
+    """
+    Kaiser-windowed sinc low-pass for rational resampling, split into `up`
+    phases: row p holds the taps applied to input samples for output
+    positions with phase p
+    """
+    factor = max(up, down)
+    length = 2 * half_taps * factor + 1
+    n = np.arange(length) - (length - 1) / 2
+    taps = np.sinc(n / factor) * np.kaiser(length, 5.0) * (up / factor)
+    taps = np.concatenate((taps, np.zeros((-length) % up)))
+    return taps.reshape(-1, up).T.astype(np.float32)
+
+
+def resample(samples: np.ndarray, orig_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample mono float samples by a rational factor with a polyphase FIR
+    filter. Only the output samples are computed (no zero-stuffed
+    intermediate), as one vectorized gather and dot product.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if orig_rate == target_rate or len(samples) == 0:
+        return samples
+    divisor = gcd(orig_rate, target_rate)
+    up, down = target_rate // divisor, orig_rate // divisor
+
+    phases = _polyphase_filter(up, down, RESAMPLE_HALF_TAPS)
+    taps_per_phase = phases.shape[1]
+    delay = RESAMPLE_HALF_TAPS * max(up, down)
+
+    output_length = -(-len(samples) * up // down)
+    # Position of each output sample on the upsampled grid, shifted by the filter delay
+    position = np.arange(output_length, dtype=np.int64) * down + delay
+    base, phase = position // up, position % up
+
+    padded = np.concatenate((np.zeros(taps_per_phase, np.float32), samples, np.zeros(taps_per_phase, np.float32)))
+    indices = base[:, None] - np.arange(taps_per_phase)[None, :] + taps_per_phase
+    np.clip(indices, 0, len(padded) - 1, out=indices)
+    return np.einsum("ij,ij->i", phases[phase], padded[indices]).astype(np.float32)
+
+
+def decode_pcm(data: bytes, encoding: str) -> np.ndarray:
+    """
+    Decode headerless mono audio to float32 samples: "pcm16" (little-endian),
+    "pcm16be" (network order, as in audio/L16), "mulaw" or "float32"
+    """
+    if encoding == "mulaw":
+        return MULAW_TO_FLOAT[np.frombuffer(data, dtype=np.uint8)]
+    if encoding in ("pcm16", "pcm16be"):
+        dtype = "<i2" if encoding == "pcm16" else ">i2"
+        return np.frombuffer(data[:len(data) - len(data) % 2], dtype=dtype).astype(np.float32) / 32768.0
+    if encoding == "float32":
+        return np.frombuffer(data[:len(data) - len(data) % 4], dtype="<f4").astype(np.float32)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def decode_wav(data: bytes, sample_rate: int = SAMPLE_RATE) -> Optional[np.ndarray]:
+    """
+    Decode PCM (8/16/32-bit), float or mu-law WAV to mono float32 at
+    `sample_rate` with numpy. Returns None for anything else.
+    """
+    chunks: Dict[bytes, Tuple[int, int]] = {}
+    for chunk_id, offset, length in _wav_chunks(data):
+        chunks.setdefault(chunk_id, (offset, length))
+    if b"fmt " not in chunks or b"data" not in chunks:
+        return None
+
+    fmt_offset, fmt_length = chunks[b"fmt "]
+    if fmt_length < 16:
+        return None
+    audio_format, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", data[fmt_offset:fmt_offset + 16])
+    if audio_format == WAVE_FORMAT_EXTENSIBLE and fmt_length >= 26:
+        audio_format = struct.unpack("<H", data[fmt_offset + 24:fmt_offset + 26])[0]
+    if channels < 1 or rate < 1:
+        return None
+
+    data_offset, data_length = chunks[b"data"]
+    payload = data[data_offset:data_offset + data_length - data_length % max(1, block_align)]
+
+    if audio_format == WAVE_FORMAT_MULAW and bits == 8:
+        samples = MULAW_TO_FLOAT[np.frombuffer(payload, dtype=np.uint8)]
+    elif audio_format == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+    elif audio_format == WAVE_FORMAT_PCM and bits == 8:
+        samples = (np.frombuffer(payload, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif audio_format == WAVE_FORMAT_PCM and bits == 32:
+        samples = np.frombuffer(payload, dtype="<i4").astype(np.float32) / 2147483648.0
+    elif audio_format == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        samples = np.frombuffer(payload, dtype="<f4").astype(np.float32)
+    else:
+        return None
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return resample(samples, rate, sample_rate)
+
+
+def decode_with_ffmpeg(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode any ffmpeg-readable audio to mono float32 through pipes, without temp files"""
+    command = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", "f32le", "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    process = subprocess.run(command, input=data, capture_output=True)
+    if process.returncode != 0:
+        raise ValueError(f"Could not decode audio: {process.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(process.stdout, dtype="<f4").copy()
+
+
+# Content types of headerless telephony audio, and their encodings
+RAW_AUDIO_TYPES = {
+    "audio/basic": "mulaw",
+    "audio/pcmu": "mulaw",
+    "audio/x-mulaw": "mulaw",
+    "audio/mulaw": "mulaw",
+    "audio/l16": "pcm16be",
+}
+
+
+def decode_raw(data: bytes, content_type: str, sample_rate: int = SAMPLE_RATE) -> Optional[np.ndarray]:
+    """
+    Decode headerless audio described by its content type (e.g.
+    "audio/x-mulaw;rate=8000"), or None if the type isn't a raw format.
+    Telephony types default to 8 kHz.
+    """
+    media_type, _, params = content_type.lower().partition(";")
+    encoding = RAW_AUDIO_TYPES.get(media_type.strip())
+    if encoding is None:
+        return None
+    rate = TELEPHONY_SAMPLE_RATE
+    for param in params.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key == "rate" and value.isdigit():
+            rate = int(value)
+    return resample(decode_pcm(data, encoding), rate, sample_rate)
+
+
+def decode_audio(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode audio bytes to mono float32 samples at `sample_rate`.
+
+    WAV (including Twilio's mu-law recordings) is decoded natively; other
+    containers are piped through ffmpeg. Blocking, so call it off the event
+    loop.
+    """
+    samples = decode_wav(data, sample_rate)
+    if samples is None:
+        samples = decode_with_ffmpeg(data, sample_rate)
+    return samples
+
+
+def streaming_wav_header(data: bytes) -> bytes:
+    """
+    Header of a WAV file with its sizes set to the maximum, for use as the
+    start of a stream whose total length isn't known yet
+    """
+    location = find_wav_data(data)
+    if location is None:
+        raise ValueError("Not a WAV file")
+    header = bytearray(data[:location[0]])
+    header[4:8] = struct.pack("<I", 0xFFFFFFFF)
+    header[-4:] = struct.pack("<I", 0xFFFFFFFF)
+    return bytes(header)
+
+
+def wav_payload(data: bytes) -> bytes:
+    """Sample data of a WAV file without its header"""
+    location = find_wav_data(data)
+    if location is None:
+        return data
+    offset, length = location
+    return data[offset:offset + length]
+
+
+# MPEG audio frame header tables (kbps, Hz)
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+def mp3_duration(data: bytes) -> float:
+    """Duration of a Layer III MP3 in seconds, by walking its frame headers"""
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # ID3v2 tag size is a 28-bit syncsafe integer
+        size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F)
+        offset = 10 + size
+
+    seconds = 0.0
+    while offset + 4 <= len(data):
+        header = struct.unpack(">I", data[offset:offset + 4])[0]
+        if header >> 21 != 0x7FF:
+            offset += 1
+            continue
+        version = {0: 2.5, 2: 2, 3: 1}.get((header >> 19) & 3)
+        layer = (header >> 17) & 3
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 3
+        if version is None or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            offset += 1
+            continue
+
+        bitrate = MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+        padding = (header >> 9) & 1
+        samples_per_frame = 1152 if version == 1 else 576
+        seconds += samples_per_frame / sample_rate
+        offset += samples_per_frame // 8 * bitrate // sample_rate + padding
+    return seconds
+
+
+def media_type_of(header: bytes) -> str:
+    """Media type of encoded audio from its first bytes"""
+    return MEDIA_TYPES["wav"] if header[:4] == b"RIFF" else MEDIA_TYPES["mp3"]
+
+
+def transcode(data: bytes, audio_format: str) -> bytes:
+    """
+    Convert synthesized audio (WAV or MP3) to `audio_format`. Only "mulaw"
+    needs work: it is resampled to 8 kHz and mu-law encoded. Blocking.
+    """
+    if audio_format != "mulaw":
+        return data
+    samples = decode_wav(data, TELEPHONY_SAMPLE_RATE)
+    if samples is None:
+        samples = decode_with_ffmpeg(data, TELEPHONY_SAMPLE_RATE)
+    return encode_mulaw_wav(samples, TELEPHONY_SAMPLE_RATE)
+
+
+def audio_duration(data: bytes, audio_format: str) -> float:
+    """Playback duration in seconds of encoded audio"""
+    if audio_format == "mp3":
+        return mp3_duration(data)
+
+    chunks = {chunk_id: (offset, length) for chunk_id, offset, length in _wav_chunks(data)}
+    if b"fmt " not in chunks or b"data" not in chunks:
+        return 0.0
+    fmt_offset = chunks[b"fmt "][0]
+    byte_rate = struct.unpack("<I", data[fmt_offset + 8:fmt_offset + 12])[0]
+    return chunks[b"data"][1] / byte_rate if byte_rate else 0.0
@@ -0,0 +1,83 @@
+import os
+import time
+import asyncio
+from typing import Optional, Awaitable, TypeVar
+
+# Remaining request budget in milliseconds. A relative budget is used instead of
+# an absolute timestamp so clock skew between containers doesn't matter; each
+# hop converts it to a local monotonic deadline on arrival.
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# Budget applied when a caller doesn't send a deadline
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("REQUEST_DEFAULT_TIMEOUT", "60"))
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage runs out of request budget"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """A request deadline on the local monotonic clock"""
+
+    def __init__(self, timeout: Optional[float]):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT) -> "Deadline":
+        """Build a deadline from the remaining-budget header, or the default budget"""
+        if value:
+            try:
+                return cls(max(0.0, float(value) / 1000.0))
+            except ValueError:
+                pass
+        return cls(default_timeout)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def has(self, seconds: float) -> bool:
+        """Whether at least `seconds` of budget is left"""
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if the budget is used up"""
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Remaining budget, optionally capped, for use as a client timeout"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return min(remaining, cap) if cap is not None else remaining
+
+    def header_value(self) -> Optional[str]:
+        """Value to forward in DEADLINE_HEADER to downstream services"""
+        remaining = self.remaining()
+        return str(int(remaining * 1000)) if remaining is not None else None
+
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """Await with the remaining budget as timeout, cancelling on expiry"""
+        if self.expired:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage)
@@ -0,0 +1,91 @@
+import re
+import asyncio
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union, AsyncIterator
+
+from starlette.responses import Response, StreamingResponse, FileResponse
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end) pair.
+    Returns None when there is no usable range (serve the whole body) and
+    raises ValueError when the range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None  # multi-range or malformed: ignore, per RFC 9110
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+async def _iter_bytes(data: bytes, start: int, end: int) -> AsyncIterator[bytes]:
+    for offset in range(start, end + 1, CHUNK_SIZE):
+        yield data[offset:min(offset + CHUNK_SIZE, end + 1)]
+
+
+async def _iter_file(path: Path, start: int, end: int) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(file.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def binary_response(
+    source: Union[bytes, Path],
+    media_type: str,
+    range_header: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    chunked: bool = False
+) -> Response:
+    """
+    Send bytes or a file as a binary body, honouring a single byte range
+    (206 Partial Content / 416). A whole file is a FileResponse, which the
+    server can send without copying it through Python (sendfile/pathsend);
+    ranges and in-memory bytes are streamed in CHUNK_SIZE pieces. With
+    `chunked`, the length is left off full in-memory responses so they go out
+    with chunked transfer encoding.
+    """
+    size = source.stat().st_size if isinstance(source, Path) else len(source)
+    headers = {"Accept-Ranges": "bytes", **(headers or {})}
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if isinstance(source, Path) and byte_range is None:
+        return FileResponse(source, media_type=media_type, headers=headers)
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if status_code == 206 or not chunked:
+        headers["Content-Length"] = str(end - start + 1)
+
+    body = _iter_file(source, start, end) if isinstance(source, Path) else _iter_bytes(source, start, end)
+    return StreamingResponse(body, status_code=status_code, media_type=media_type, headers=headers)
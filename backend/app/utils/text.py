@@ -0,0 +1,48 @@
+import re
+from typing import List
+
+# A sentence ends at ., ! or ? followed by whitespace, or at a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class SentenceSplitter:
+    """
+    Incrementally split streamed text into complete sentences.
+
+    Text is buffered until a boundary is seen, so a period at the very end of
+    a chunk is not treated as a sentence end until the following whitespace
+    arrives. Pieces shorter than `min_chars` (list numbers, abbreviations) are
+    merged into the next sentence.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text and return any sentences it completed"""
+        self.buffer += chunk
+        sentences = []
+
+        start = 0
+        pending = ""
+        for match in SENTENCE_BOUNDARY.finditer(self.buffer):
+            piece = self.buffer[start:match.start()].strip()
+            start = match.end()
+            if not piece:
+                continue
+            pending = f"{pending} {piece}".strip()
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+
+        # Keep the incomplete tail (and any short pending piece) for later
+        tail = self.buffer[start:]
+        self.buffer = f"{pending} {tail}" if pending else tail
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Return whatever text remains once the stream has ended"""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        return [remainder] if remainder else []
@@ -0,0 +1,116 @@
+from typing import Optional, Tuple
+
+import multipart
+from multipart.multipart import parse_options_header
+from starlette.requests import Request
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds its size limit"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+
+class UploadMissing(Exception):
+    """Raised when a multipart body has no part with the expected field name"""
+
+
+class _FieldCollector:
+    """Multipart callbacks that keep only the body of one named part, in memory"""
+
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field.encode("latin-1")
+        self.max_bytes = max_bytes
+        self.data = bytearray()
+        self.filename: Optional[str] = None
+        self.content_type = ""
+        self.found = False
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._capturing = False
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._capturing = not self.found and options.get(b"name") == self.field
+        if self._capturing:
+            self.found = True
+            filename = options.get(b"filename")
+            self.filename = filename.decode("utf-8", "replace") if filename else None
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._capturing:
+            self.data += data[start:end]
+            if len(self.data) > self.max_bytes:
+                raise UploadTooLarge(self.max_bytes)
+
+    def on_part_end(self):
+        self._capturing = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+async def read_upload(request: Request, field: str, max_bytes: int) -> Tuple[bytes, Optional[str], str]:
+    """
+    Read an uploaded file into memory straight from the request stream.
+
+    Accepts either a multipart/form-data body (the part named `field` is
+    kept, other parts are discarded) or a raw body such as audio/wav. Unlike
+    UploadFile, nothing is spooled to disk, and the size limit is enforced as
+    bytes arrive so oversized uploads are rejected without being buffered.
+    Returns the file bytes, the client-supplied filename (if any) and the
+    file's content type.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + 64 * 1024:
+        raise UploadTooLarge(max_bytes)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+
+    if content_type == b"multipart/form-data":
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadMissing("Missing boundary in multipart body")
+        collector = _FieldCollector(field, max_bytes)
+        parser = multipart.MultipartParser(boundary, collector.callbacks())
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+        if not collector.found:
+            raise UploadMissing(f"No '{field}' file in the upload")
+        return bytes(collector.data), collector.filename, collector.content_type
+
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > max_bytes:
+            raise UploadTooLarge(max_bytes)
+    if not data:
+        raise UploadMissing("Empty upload")
+    return bytes(data), None, request.headers.get("content-type", "")
@@ -0,0 +1,225 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Energy-based voice activity detection on mono float samples.
+
+    Audio is cut into short frames and a frame counts as speech when its
+    energy is `margin_db` above the clip's noise floor (a low percentile of
+    frame energies) and above an absolute floor. A clip with no such
+    contrast (all speech or all noise) is judged by absolute level against
+    `loud_db` instead. Speech regions are padded on both sides so word
+    onsets and tails survive, leading and trailing silence is dropped, and
+    internal pauses longer than `max_pause` seconds are shortened to
+    `max_pause`. Everything is vectorized with numpy.
+    """
+
+    def __init__(
+        self,
+        frame_ms: float = 30.0,
+        margin_db: float = 12.0,
+        min_db: float = -50.0,
+        loud_db: float = -35.0,
+        padding: float = 0.2,
+        max_pause: float = 0.4,
+        min_speech: float = 0.25
+    ):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.loud_db = loud_db
+        self.padding = padding
+        self.max_pause = max_pause
+        self.min_speech = min_speech
+
+    def speech_mask(self, samples: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        """Per-frame speech flags (before padding) and the frame length in samples"""
+        frame_length = max(1, int(sample_rate * self.frame_ms / 1000))
+        frame_count = len(samples) // frame_length
+        if frame_count == 0:
+            return np.zeros(0, dtype=bool), frame_length
+
+        frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length).astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+        energy_db = 20.0 * np.log10(rms)
+
+        noise_floor = np.percentile(energy_db, 10)
+        if energy_db.max() < noise_floor + self.margin_db:
+            # No quiet stretch to compare against: loud frames are speech
+            return energy_db > max(self.loud_db, self.min_db), frame_length
+        threshold = max(noise_floor + self.margin_db, self.min_db)
+        return energy_db > threshold, frame_length
+
+    def segments(self, samples: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+        """Padded speech regions as (start, end) sample offsets"""
+        mask, frame_length = self.speech_mask(samples, sample_rate)
+        if not mask.any():
+            return []
+
+        # Dilate the mask by the padding on both sides
+        pad_frames = int(round(self.padding * 1000 / self.frame_ms))
+        if pad_frames:
+            kernel = np.ones(2 * pad_frames + 1)
+            mask = np.convolve(mask.astype(np.float32), kernel, mode="same") > 0
+
+        # Rising and falling edges of the mask give the regions
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1) * frame_length
+        ends = np.minimum(np.flatnonzero(edges == -1) * frame_length, len(samples))
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    def trim(self, samples: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Remove leading/trailing silence and shorten long pauses.
+
+        Returns the trimmed samples and a report with the original and kept
+        durations, the seconds removed, and whether any speech was found.
+        An empty array is returned when there is no speech.
+        """
+        original_seconds = len(samples) / sample_rate
+        regions = self.segments(samples, sample_rate)
+        speech_samples = sum(end - start for start, end in regions)
+        has_speech = speech_samples / sample_rate >= self.min_speech
+
+        if not has_speech:
+            trimmed = samples[:0]
+        else:
+            max_gap = int(self.max_pause * sample_rate)
+            pieces = []
+            for index, (start, end) in enumerate(regions):
+                if index:
+                    gap_start = regions[index - 1][1]
+                    # Keep the pause itself (up to max_pause), not a synthetic silence
+                    pieces.append(samples[gap_start:gap_start + min(start - gap_start, max_gap)])
+                pieces.append(samples[start:end])
+            trimmed = np.concatenate(pieces)
+
+        kept_seconds = len(trimmed) / sample_rate
+        return trimmed, {
+            "has_speech": has_speech,
+            "segments": len(regions),
+            "original_seconds": round(original_seconds, 3),
+            "kept_seconds": round(kept_seconds, 3),
+            "removed_seconds": round(original_seconds - kept_seconds, 3),
+        }
+
+
+class SpeechSegmenter:
+    """
+    Incremental VAD over a live audio stream.
+
+    Audio is fed in arbitrary chunks; frame energies are compared against a
+    noise floor that follows the quietest recent frames (dropping at once,
+    rising slowly). A segment starts at the first speech frame (with
+    `vad.padding` of pre-roll) and ends after `end_silence` seconds without
+    speech, or when it reaches `max_segment` seconds.
+    """
+
+    def __init__(self, vad: EnergyVAD, sample_rate: int, end_silence: float = 0.5, max_segment: float = 15.0):
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * vad.frame_ms / 1000))
+        self.end_silence_frames = max(1, int(round(end_silence * 1000 / vad.frame_ms)))
+        self.max_segment_samples = int(max_segment * sample_rate)
+        self.preroll_frames = int(round(vad.padding * 1000 / vad.frame_ms))
+        # Floor rises by this much per frame (about 3 dB/s) when the audio is louder
+        self.floor_rise_db = 3.0 * vad.frame_ms / 1000
+
+        self.noise_floor = vad.min_db
+        self.in_speech = False
+        self.segment_index = 0
+        self.samples_seen = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._preroll: List[np.ndarray] = []
+        self._segment: List[np.ndarray] = []
+        self._segment_samples = 0
+        self._speech_frames = 0
+        self._silent_frames = 0
+
+    def feed(self, samples: np.ndarray) -> List[Tuple[str, Any]]:
+        """
+        Add audio and return events: ("start", segment index) when speech
+        begins, ("end", segment samples) when a segment is complete.
+        """
+        events: List[Tuple[str, Any]] = []
+        data = np.concatenate((self._pending, np.asarray(samples, dtype=np.float32)))
+        frame_count = len(data) // self.frame_length
+        self._pending = data[frame_count * self.frame_length:]
+        if frame_count == 0:
+            return events
+
+        frames = data[:frame_count * self.frame_length].reshape(frame_count, self.frame_length)
+        energy_db = 20.0 * np.log10(np.sqrt(np.mean(frames * frames, axis=1) + 1e-12))
+
+        for frame, energy in zip(frames, energy_db):
+            self.samples_seen += self.frame_length
+            is_speech = energy > max(self.noise_floor + self.vad.margin_db, self.vad.min_db)
+            if energy < self.noise_floor:
+                self.noise_floor = float(energy)
+            elif not is_speech:
+                self.noise_floor += self.floor_rise_db
+
+            if not self.in_speech:
+                if is_speech:
+                    self.in_speech = True
+                    self._segment = self._preroll + [frame]
+                    self._segment_samples = sum(len(piece) for piece in self._segment)
+                    self._preroll = []
+                    self._speech_frames = 1
+                    self._silent_frames = 0
+                    events.append(("start", self.segment_index))
+                else:
+                    self._preroll.append(frame)
+                    if len(self._preroll) > self.preroll_frames:
+                        self._preroll.pop(0)
+                continue
+
+            self._segment.append(frame)
+            self._segment_samples += len(frame)
+            if is_speech:
+                self._speech_frames += 1
+                self._silent_frames = 0
+            else:
+                self._silent_frames += 1
+
+            if self._silent_frames >= self.end_silence_frames or self._segment_samples >= self.max_segment_samples:
+                segment = self._close_segment()
+                if segment is not None:
+                    events.append(("end", segment))
+
+        return events
+
+    def current(self) -> np.ndarray:
+        """Audio of the segment in progress (for partial hypotheses)"""
+        if not self._segment:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self._segment)
+
+    @property
+    def segment_seconds(self) -> float:
+        return self._segment_samples / self.sample_rate
+
+    def flush(self) -> Optional[np.ndarray]:
+        """End of stream: close any segment in progress"""
+        if not self.in_speech:
+            return None
+        if len(self._pending):
+            self._segment.append(self._pending)
+            self._pending = np.zeros(0, dtype=np.float32)
+        return self._close_segment()
+
+    def _close_segment(self) -> Optional[np.ndarray]:
+        """Finish the current segment; blips too short to be speech are dropped"""
+        segment = self.current()
+        speech_seconds = self._speech_frames * self.vad.frame_ms / 1000
+        self.in_speech = False
+        self._segment = []
+        self._segment_samples = 0
+        self._preroll = []
+        if speech_seconds < self.vad.min_speech:
+            return None
+        self.segment_index += 1
+        return segment
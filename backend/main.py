@@ -1,15 +1,28 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, Response, JSONResponse
+from pydantic import BaseModel, ValidationError
 import uvicorn
 import os
+import time
+import json
+import asyncio
 from dotenv import load_dotenv
 import logging
+from typing import Optional, AsyncIterator
 
 from app.services.rag_service import RAGService
 from app.services.llm_service import LLMService
-from app.services.speech_service import SpeechService
-from app.models.query_models import QueryRequest, QueryResponse, VoiceQueryRequest
+from app.services.speech_service import SpeechService, TranscriptionFailed, SynthesisFailed
+from app.services.transcription_pool import TranscriptionBusy
+from app.services.recording_service import RecordingFetcher, RecordingFetchError
+from app.services.program_answers import ProgramAnswerCache
+from app.services.intent_router import IntentRouter
+from app.models.query_models import QueryRequest, QueryResponse, ProgramQueryRequest, VoiceQueryRequest, VoiceTurnRequest
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.audio import MEDIA_TYPES, SAMPLE_RATE, decode_audio, decode_raw, decode_pcm, resample, audio_duration, media_type_of
+from app.utils.responses import binary_response
+from app.utils.upload import read_upload, UploadTooLarge, UploadMissing
 
 # Load environment variables
 load_dotenv()
@@ -38,6 +51,32 @@ app.add_middleware(
 rag_service = RAGService()
 llm_service = LLMService()
 speech_service = SpeechService()
+intent_router = IntentRouter()
+
+# Largest accepted audio upload; enforced while the body is streamed in
+MAX_AUDIO_UPLOAD_BYTES = int(os.getenv("MAX_AUDIO_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+
+recording_fetcher = RecordingFetcher(MAX_AUDIO_UPLOAD_BYTES)
+
+# Budget for generating one precomputed program answer
+PROGRAM_ANSWER_TIMEOUT = float(os.getenv("PROGRAM_ANSWER_TIMEOUT", "120"))
+
+def program_query(program: str, location: Optional[str]) -> QueryRequest:
+    """The detailed-information query for a program, with the program and location as context"""
+    user_context = {"program": program}
+    if location:
+        user_context["location"] = location
+    return QueryRequest(query=ProgramAnswerCache.build_query(program, location), user_context=user_context)
+
+async def generate_program_answer(program: str, location: Optional[str]) -> QueryResponse:
+    """Answer a program question for the cache"""
+    return await answer_query(program_query(program, location), Deadline(PROGRAM_ANSWER_TIMEOUT), fast_path=False)
+
+program_answers = ProgramAnswerCache(
+    answer=generate_program_answer,
+    index_version=lambda: rag_service.index_version,
+    generation_ready=lambda: llm_service.readiness()["llm_ready"]
+)
 
 @app.on_event("startup")
 async def startup_event():
@@ -46,8 +85,17 @@ async def startup_event():
     await rag_service.initialize()
     await llm_service.initialize()
     await speech_service.initialize()
+    await intent_router.initialize()
+    await program_answers.start()
     logger.info("All services initialized successfully!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release background work on shutdown"""
+    await program_answers.shutdown()
+    await llm_service.shutdown()
+    await speech_service.shutdown()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -57,117 +105,473 @@ async def root():
         "version": "1.0.0"
     }
 
+def fast_path_answer(request: QueryRequest) -> Optional[QueryResponse]:
+    """Static response for greetings, goodbyes and other fixed Rasa intents, if the query is one"""
+    match = intent_router.answer(request.query)
+    if match is None:
+        return None
+    intent, response, similarity = match
+    logger.info(f"Answered intent {intent} from the fast path")
+    llm_service.memory.record(request.session_id, request.user_context, request.query, response)
+    return QueryResponse(response=response, sources=[], confidence=round(similarity, 2), intent=intent)
+
+def query_intent(query: str) -> Optional[str]:
+    """Intent of a query that goes to the LLM, if the classifier is confident; picks the model tier"""
+    match = intent_router.intent(query)
+    return match[0] if match else None
+
+async def single_chunk(text: str) -> AsyncIterator[str]:
+    """A complete text as a one-chunk stream"""
+    yield text
+
+async def answer_query(request: QueryRequest, deadline: Deadline, fast_path: bool = True) -> QueryResponse:
+    """Retrieve documents and generate a response within the request deadline"""
+    deadline.check("query")
+    
+    # Common intents with fixed answers skip retrieval and generation
+    if fast_path:
+        answer = fast_path_answer(request)
+        if answer is not None:
+            return answer
+    
+    # Retrieve relevant documents
+    relevant_docs = await rag_service.retrieve_documents(request.query, deadline=deadline)
+    
+    # Generate response using LLM
+    response, degraded = await llm_service.generate_answer(
+        query=request.query,
+        context_docs=relevant_docs,
+        user_context=request.user_context,
+        session_id=request.session_id,
+        deadline=deadline,
+        intent=query_intent(request.query)
+    )
+    
+    return QueryResponse(
+        response=response,
+        sources=relevant_docs,
+        confidence=0.95,  # Placeholder confidence score
+        degraded=degraded
+    )
+
 @app.post("/query", response_model=QueryResponse)
-async def process_query(request: QueryRequest):
+async def process_query(
+    request: QueryRequest,
+    x_request_deadline_ms: Optional[str] = Header(default=None)
+):
     """
     Process a text query using RAG and LLM
     """
     try:
         logger.info(f"Processing query: {request.query}")
+        return await answer_query(request, Deadline.from_header(x_request_deadline_ms))
+    
+    except DeadlineExceeded as e:
+        logger.warning(f"Query abandoned: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/query/program", response_model=QueryResponse)
+async def process_program_query(
+    request: ProgramQueryRequest,
+    response: Response,
+    x_request_deadline_ms: Optional[str] = Header(default=None)
+):
+    """
+    Answer the standard detailed-information question about a program,
+    from the precomputed cache when possible (X-Answer-Cache: hit/miss)
+    """
+    try:
+        answer = program_answers.cached(request.program, request.location)
+        response.headers["X-Answer-Cache"] = "hit" if answer is not None else "miss"
+        if answer is not None:
+            return answer
         
-        # Retrieve relevant documents
-        relevant_docs = await rag_service.retrieve_documents(request.query)
-        
-        # Generate response using LLM
-        response = await llm_service.generate_response(
-            query=request.query,
-            context_docs=relevant_docs,
-            user_context=request.user_context
-        )
+        # Generate into the cache; if we give up waiting, generation still completes for the next caller
+        deadline = Deadline.from_header(x_request_deadline_ms)
+        answer = await deadline.run(program_answers.get(request.program, request.location), "program answer")
+        if answer is not None:
+            return answer
         
-        return QueryResponse(
-            response=response,
-            sources=relevant_docs,
-            confidence=0.95  # Placeholder confidence score
-        )
+        # Not a cached program, or generation is degraded right now
+        return await answer_query(program_query(request.program, request.location), deadline)
     
+    except DeadlineExceeded as e:
+        logger.warning(f"Program query abandoned: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
+        logger.error(f"Error processing program query: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/voice/transcribe")
-async def transcribe_audio(audio_file: UploadFile = File(...)):
+async def transcribe_audio(request: Request):
     """
     Transcribe audio to text using Whisper
+    
+    Accepts a multipart upload with an `audio_file` part, or a raw audio body.
+    The upload is decoded in memory and never written to disk. Headerless
+    telephony audio is accepted as audio/x-mulaw, audio/basic or audio/L16
+    (8 kHz unless a `rate` parameter says otherwise).
     """
     try:
-        logger.info(f"Transcribing audio file: {audio_file.filename}")
+        content, filename, content_type = await read_upload(request, "audio_file", MAX_AUDIO_UPLOAD_BYTES)
+        logger.info(f"Transcribing audio file: {filename} ({len(content)} bytes, {content_type or 'unknown type'})")
         
-        # Save uploaded file temporarily
-        temp_path = f"/tmp/{audio_file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await audio_file.read()
-            buffer.write(content)
-        
-        # Transcribe audio
-        transcription = await speech_service.transcribe_audio(temp_path)
-        
-        # Clean up temp file
-        os.remove(temp_path)
+        samples = decode_raw(content, content_type)
+        if samples is None:
+            samples = await asyncio.to_thread(decode_audio, content)
+        transcription = await speech_service.transcribe_audio(samples)
         
         return {"transcription": transcription}
     
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (UploadMissing, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TranscriptionBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except TranscriptionFailed as e:
+        raise HTTPException(status_code=503, detail=f"Transcription failed: {str(e)}")
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def is_stop_event(text: str) -> bool:
+    """Whether a WebSocket text frame is the client's {"event": "stop"}"""
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("event") == "stop"
+
+@app.websocket("/voice/stream")
+async def stream_transcription(websocket: WebSocket, encoding: str = "pcm16", sample_rate: int = SAMPLE_RATE):
+    """
+    Real-time transcription over a WebSocket
+    
+    The client sends binary frames of headerless mono audio (`encoding` is
+    pcm16, mulaw or float32 at `sample_rate` Hz) and a text frame
+    {"event": "stop"} when done. The server replies with JSON events:
+    speech_start, partial and final hypotheses per utterance, then done with
+    the full transcript.
+    """
+    await websocket.accept()
+    if encoding not in ("pcm16", "mulaw", "float32"):
+        await websocket.send_json({"type": "error", "detail": f"Unsupported encoding: {encoding}"})
+        await websocket.close(code=1003)
+        return
+    
+    async def audio_frames():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                samples = decode_pcm(message["bytes"], encoding)
+                yield resample(samples, sample_rate, SAMPLE_RATE)
+            elif message.get("text") and is_stop_event(message["text"]):
+                return
+    
+    try:
+        async for event in speech_service.transcribe_stream(audio_frames()):
+            await websocket.send_json(event)
+        await websocket.close()
+    
+    except WebSocketDisconnect:
+        logger.info("Streaming transcription client disconnected")
+    except Exception as e:
+        logger.error(f"Error in streaming transcription: {str(e)}")
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1011)
+
+def audio_metadata(audio_id: str, audio_data: bytes, audio_format: str) -> dict:
+    """Describe synthesized audio without including it"""
+    return {
+        "audio_id": audio_id,
+        "audio_url": f"/voice/audio/{audio_id}",
+        "format": audio_format,
+        "duration": round(audio_duration(audio_data, audio_format), 3),
+        "size": len(audio_data)
+    }
+
+def audio_headers(metadata: dict) -> dict:
+    """Audio metadata as response headers"""
+    return {
+        "X-Audio-Id": metadata["audio_id"],
+        "X-Audio-Format": metadata["format"],
+        "X-Audio-Duration": str(metadata["duration"]),
+        "Content-Location": metadata["audio_url"],
+        "ETag": f'"{metadata["audio_id"]}"'
+    }
+
 @app.post("/voice/synthesize")
-async def synthesize_speech(request: VoiceQueryRequest):
+async def synthesize_speech(
+    request: VoiceQueryRequest,
+    x_request_deadline_ms: Optional[str] = Header(default=None),
+    accept: Optional[str] = Header(default=None)
+):
     """
     Convert text to speech using TTS
+    
+    Returns the audio as a binary audio/mpeg or audio/wav body (chunked),
+    with its id, format and duration in X-Audio-* headers. Clients that
+    only need a link can send `Accept: application/json` to get the
+    metadata and an `audio_url` instead of the audio. Fails with 503 if
+    the text could not be synthesized, rather than returning error audio.
     """
     try:
         logger.info(f"Synthesizing speech for text: {request.text[:50]}...")
         
-        # Generate speech
-        audio_data = await speech_service.synthesize_speech(
+        # Generate speech (cached by content)
+        audio_id, audio_data = await speech_service.synthesize_cached(
             text=request.text,
             voice=request.voice,
-            speed=request.speed
+            speed=request.speed,
+            deadline=Deadline.from_header(x_request_deadline_ms),
+            output_format=request.output_format,
+            fallback=False
         )
+        audio_format = speech_service.output_format(request.output_format)
+        metadata = audio_metadata(audio_id, audio_data, audio_format)
         
-        return {
-            "audio_data": audio_data,
-            "format": "mp3",
-            "duration": len(audio_data)  # Placeholder duration
-        }
+        if accept and "application/json" in accept and "audio/" not in accept:
+            return metadata
+        
+        return binary_response(
+            audio_data,
+            MEDIA_TYPES[audio_format],
+            headers=audio_headers(metadata),
+            chunked=True
+        )
     
+    except DeadlineExceeded as e:
+        logger.warning(f"Synthesis abandoned: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except SynthesisFailed as e:
+        raise HTTPException(status_code=503, detail=f"Synthesis failed: {str(e)}")
     except Exception as e:
         logger.error(f"Error synthesizing speech: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/voice/audio/{audio_id}")
+async def get_cached_audio(
+    audio_id: str,
+    range_header: Optional[str] = Header(default=None, alias="Range"),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Serve previously synthesized audio from the cache, with Range support
+    
+    Audio ids are content hashes, so responses never change: they are
+    cacheable forever and revalidate by ETag.
+    """
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{audio_id}"'}
+    if if_none_match and audio_id in if_none_match:
+        return Response(status_code=304, headers=headers)
+    
+    source = speech_service.get_cached_audio_path(audio_id)
+    if source is not None:
+        with open(source, "rb") as audio_file:
+            media_type = media_type_of(audio_file.read(4))
+    else:
+        # Entries can be memory-only when the disk tier is disabled or full
+        source = await speech_service.audio_cache.get(audio_id)
+        if source is None:
+            raise HTTPException(status_code=404, detail="Audio not found")
+        media_type = media_type_of(source)
+    
+    return binary_response(source, media_type, range_header, headers)
+
 @app.post("/voice/process")
-async def process_voice_query(request: VoiceQueryRequest):
+async def process_voice_query(
+    request: VoiceQueryRequest,
+    x_request_deadline_ms: Optional[str] = Header(default=None)
+):
     """
     Complete voice processing pipeline: query → RAG → LLM → TTS
+    
+    With `pipelined` set, the response is an audio/mpeg stream: sentences are
+    synthesized as soon as the LLM finishes them and sent in order.
     """
     try:
         logger.info("Processing complete voice query pipeline")
+        deadline = Deadline.from_header(x_request_deadline_ms)
+        query_request = QueryRequest(
+            query=request.text,
+            user_context=request.user_context,
+            session_id=request.session_id
+        )
+        fast_answer = fast_path_answer(query_request)
+        
+        if request.pipelined:
+            deadline.check("voice pipeline")
+            if fast_answer is not None:
+                relevant_docs = []
+                text_stream = single_chunk(fast_answer.response)
+            else:
+                relevant_docs = await rag_service.retrieve_documents(request.text, deadline=deadline)
+                text_stream = llm_service.stream_response(
+                    query=request.text,
+                    context_docs=relevant_docs,
+                    user_context=request.user_context,
+                    session_id=request.session_id,
+                    deadline=deadline,
+                    intent=query_intent(request.text)
+                )
+            audio_stream = speech_service.synthesize_stream(
+                text_stream,
+                voice=request.voice,
+                speed=request.speed,
+                deadline=deadline,
+                output_format=request.output_format
+            )
+            return StreamingResponse(
+                audio_stream,
+                media_type=MEDIA_TYPES[speech_service.output_format(request.output_format)],
+                headers={"X-Sources-Count": str(len(relevant_docs))}
+            )
         
         # Step 1: Process the query through RAG and LLM
-        query_response = await process_query(QueryRequest(
-            query=request.text,
-            user_context=request.user_context
-        ))
+        query_response = fast_answer or await answer_query(query_request, deadline, fast_path=False)
         
-        # Step 2: Synthesize the response to speech
-        audio_data = await speech_service.synthesize_speech(
-            text=query_response.response,
-            voice=request.voice,
-            speed=request.speed
-        )
+        # Step 2: Synthesize the response to speech; audio is optional, so
+        # return the text alone if the budget ran out. The audio itself is
+        # fetched separately from audio_url, only by clients that play it.
+        try:
+            audio_id, audio_data = await speech_service.synthesize_cached(
+                text=query_response.response,
+                voice=request.voice,
+                speed=request.speed,
+                deadline=deadline,
+                output_format=request.output_format
+            )
+            audio = audio_metadata(audio_id, audio_data, speech_service.output_format(request.output_format))
+        except DeadlineExceeded as e:
+            logger.warning(f"Skipping speech synthesis: {str(e)}")
+            audio = None
         
         return {
             "text_response": query_response.response,
-            "audio_data": audio_data,
+            "audio": audio,
+            "audio_url": audio["audio_url"] if audio else None,
             "sources": query_response.sources,
             "confidence": query_response.confidence
         }
     
+    except DeadlineExceeded as e:
+        logger.warning(f"Voice query abandoned: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error in voice processing pipeline: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/voice/turn")
+async def process_voice_turn(
+    request: Request,
+    x_request_deadline_ms: Optional[str] = Header(default=None)
+):
+    """
+    One phone turn in a single hop: fetch → transcribe → retrieve → generate → TTS
+    
+    Send JSON (VoiceTurnRequest) with a `recording_url` for the backend to
+    fetch, or send the audio itself as the body (raw or multipart
+    `audio_file`) with the VoiceTurnRequest fields as query parameters.
+    Returns the transcription, the answer text and, if requested, an
+    audio_url for the synthesized answer.
+    """
+    try:
+        deadline = Deadline.from_header(x_request_deadline_ms)
+        timings = {}
+        started = time.monotonic()
+        
+        if request.headers.get("content-type", "").startswith("application/json"):
+            turn = VoiceTurnRequest(**await request.json())
+            if not turn.recording_url:
+                raise HTTPException(status_code=400, detail="recording_url is required for JSON requests")
+            content = await recording_fetcher.fetch(turn.recording_url, deadline)
+            content_type = ""
+        else:
+            turn = VoiceTurnRequest(**request.query_params)
+            content, _, content_type = await read_upload(request, "audio_file", MAX_AUDIO_UPLOAD_BYTES)
+        timings["fetch"] = time.monotonic() - started
+        
+        # Transcribe
+        mark = time.monotonic()
+        samples = decode_raw(content, content_type)
+        if samples is None:
+            samples = await asyncio.to_thread(decode_audio, content)
+        try:
+            transcription = (await deadline.run(speech_service.transcribe_audio(samples), "transcription")).strip()
+        except TranscriptionFailed as e:
+            # Answered like silence, so the caller is asked to repeat themselves
+            # instead of the failure being treated as what they said
+            logger.warning(f"Transcription failed for call {turn.call_sid}: {str(e)}")
+            transcription = ""
+        timings["transcribe"] = time.monotonic() - mark
+        
+        result = {
+            "call_sid": turn.call_sid,
+            "transcription": transcription,
+            "response": None,
+            "sources": [],
+            "confidence": None,
+            "audio": None,
+            "audio_url": None
+        }
+        if not transcription:
+            result["timings"] = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+            return result
+        
+        # Retrieve and generate, remembering the conversation per call
+        mark = time.monotonic()
+        query_response = await answer_query(QueryRequest(query=transcription, session_id=turn.call_sid), deadline)
+        result.update(
+            response=query_response.response,
+            sources=query_response.sources,
+            confidence=query_response.confidence
+        )
+        timings["answer"] = time.monotonic() - mark
+        
+        # Audio is optional: the caller can fall back to its own TTS
+        if turn.synthesize:
+            mark = time.monotonic()
+            try:
+                audio_id, audio_data = await speech_service.synthesize_cached(
+                    text=query_response.response,
+                    voice=turn.voice,
+                    speed=turn.speed,
+                    deadline=deadline,
+                    output_format=turn.output_format
+                )
+                result["audio"] = audio_metadata(audio_id, audio_data, speech_service.output_format(turn.output_format))
+                result["audio_url"] = result["audio"]["audio_url"]
+            except DeadlineExceeded as e:
+                logger.warning(f"Skipping speech synthesis: {str(e)}")
+            timings["synthesize"] = time.monotonic() - mark
+        
+        timings["total"] = time.monotonic() - started
+        result["timings"] = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        return result
+    
+    except HTTPException:
+        raise
+    except (ValidationError, UploadMissing, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except RecordingFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except TranscriptionBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        logger.warning(f"Voice turn abandoned: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing voice turn: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     """Detailed health check for all services"""
@@ -181,7 +585,10 @@ async def health_check():
             "services": {
                 "rag_service": rag_status,
                 "llm_service": llm_status,
-                "speech_service": speech_status
+                "speech_service": speech_status,
+                "recordings": recording_fetcher.stats(),
+                "program_answers": program_answers.stats(),
+                "intent_fast_path": intent_router.stats()
             }
         }
     except Exception as e:
@@ -191,6 +598,37 @@ async def health_check():
             "error": str(e)
         }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Cheap per-capability readiness report (does not run any models)
+    
+    Returns 503 while a configured LLM provider is still warming, so health
+    checks and load balancers hold traffic while generation would only be
+    degraded. With no provider configured, the mock path counts as ready.
+    Per-model readiness is under llm.models.
+    """
+    llm_readiness = llm_service.readiness()
+    capabilities = {
+        "retrieval": rag_service.is_initialized,
+        "generation": llm_readiness["generation_ready"],
+        "transcription": speech_service.is_initialized and (
+            speech_service.whisper_model is not None
+            or bool(speech_service.transcription_pool and speech_service.transcription_pool.is_ready)
+            or bool(speech_service.openai_api_key)
+        ),
+        "synthesis": speech_service.is_initialized
+    }
+    
+    report = {
+        "status": "ready" if all(capabilities.values()) else "degraded",
+        "capabilities": capabilities,
+        "llm": llm_readiness
+    }
+    if not capabilities["generation"]:
+        return JSONResponse(status_code=503, content={**report, "status": "warming"})
+    return report
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Ollama-compatible stub server for load testing
+
+Implements the Ollama /api/generate and /api/chat endpoints (streaming and
+non-streaming) and an OpenAI-compatible /v1/chat/completions endpoint without
+running any model. Time-to-first-token, token rate, error rate and concurrency
+are configurable so production latency profiles can be reproduced offline.
+
+Usage:
+    python loadtest/ollama_stub.py --port 11435 --ttft 0.8 --tokens-per-sec 12 --max-concurrency 1
+    LLM_API_BASE=http://localhost:11435 uvicorn main:app   # from backend/
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, List, Union
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+import uvicorn
+
+# Canned answer text; tokens are drawn from it word by word
+CANNED_RESPONSE = (
+    "SNAP provides monthly benefits on an EBT card to help eligible households buy food. "
+    "To apply, contact your local SNAP office, complete an application, provide proof of income "
+    "and identity, and attend an interview. You should receive a decision within 30 days. "
+    "Housing assistance such as Section 8 vouchers is handled by your local Public Housing Authority, "
+    "and healthcare coverage through Medicaid or the ACA marketplace can be found at Healthcare.gov. "
+    "You can also call 2-1-1 for information and referrals in your area."
+).split()
+
+
+class StubConfig:
+    """Latency and capacity profile for the stub"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.ttft = args.ttft
+        self.ttft_jitter = args.ttft_jitter
+        self.tokens_per_sec = args.tokens_per_sec
+        self.response_tokens = args.response_tokens
+        self.error_rate = args.error_rate
+        self.max_concurrency = args.max_concurrency
+        self.max_queue = args.max_queue
+        self.load_time = args.load_time
+
+
+class StubState:
+    """Runtime counters and the concurrency gate"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.loaded_models: Dict[str, float] = {}
+        self.waiting = 0
+        self.in_flight = 0
+        self.stats = {"requests": 0, "completed": 0, "errors": 0, "rejected": 0, "tokens": 0}
+
+
+class Generation:
+    """
+    One admitted request's place in the queue, then its concurrency slot.
+
+    Counted as waiting from admission, not from when generation starts, so
+    a streaming response whose body hasn't been iterated yet still counts.
+    Released exactly once: when generation finishes, or when the response
+    ends (e.g. the client disconnects) if that comes first.
+    """
+
+    def __init__(self, state: StubState):
+        self.state = state
+        self.running = False
+        self.finished = False
+        state.waiting += 1
+
+    async def start(self):
+        """Wait for a concurrency slot"""
+        await self.state.semaphore.acquire()
+        self.state.waiting -= 1
+        self.state.in_flight += 1
+        self.running = True
+
+    def finish(self):
+        """Leave the queue, or free the slot"""
+        if self.finished:
+            return
+        self.finished = True
+        if self.running:
+            self.state.in_flight -= 1
+            self.state.semaphore.release()
+        else:
+            self.state.waiting -= 1
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    """Build the stub application for a latency profile"""
+    app = FastAPI(title="Ollama Stub", description="Ollama-compatible stub for load testing")
+    state = StubState(config)
+
+    def now_iso() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def admit() -> Union[JSONResponse, Generation]:
+        """Apply queue limits and error injection; returns an error response or the admitted generation"""
+        state.stats["requests"] += 1
+        if state.waiting + state.in_flight >= config.max_concurrency + config.max_queue:
+            state.stats["rejected"] += 1
+            return JSONResponse(status_code=503, content={"error": "server busy, please try again"})
+        if config.error_rate and random.random() < config.error_rate:
+            state.stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": "injected stub error"})
+        return Generation(state)
+
+    def streaming_response(body: AsyncIterator[str], generation: Generation, media_type: str) -> StreamingResponse:
+        """Stream a generation, releasing it when the response ends even if the body never finished"""
+        return StreamingResponse(body, media_type=media_type, background=BackgroundTask(generation.finish))
+
+    async def generate_tokens(model: str, num_tokens: int, generation: Generation) -> AsyncIterator[str]:
+        """Yield tokens on the configured schedule while holding a concurrency slot"""
+        try:
+            await generation.start()
+            loop = asyncio.get_running_loop()
+
+            # Simulate a cold model load the first time a model is used
+            if model not in state.loaded_models and config.load_time:
+                await asyncio.sleep(config.load_time)
+            state.loaded_models[model] = time.time()
+
+            await asyncio.sleep(max(0.0, config.ttft + random.uniform(-config.ttft_jitter, config.ttft_jitter)))
+
+            start = loop.time()
+            for i in range(num_tokens):
+                # Schedule against the start time so token pacing doesn't drift
+                delay = start + i / config.tokens_per_sec - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                state.stats["tokens"] += 1
+                word = CANNED_RESPONSE[i % len(CANNED_RESPONSE)]
+                yield word if i == 0 else " " + word
+
+            state.stats["completed"] += 1
+        finally:
+            generation.finish()
+
+    def requested_tokens(body: Dict[str, Any]) -> int:
+        options = body.get("options") or {}
+        limit = options.get("num_predict") or body.get("max_tokens")
+        return min(int(limit), config.response_tokens) if limit and int(limit) > 0 else config.response_tokens
+
+    def final_stats(started: float, eval_count: int) -> Dict[str, Any]:
+        total_ns = int((time.perf_counter() - started) * 1e9)
+        return {
+            "done": True,
+            "total_duration": total_ns,
+            "load_duration": 0,
+            "prompt_eval_count": 0,
+            "eval_count": eval_count,
+            "eval_duration": total_ns,
+        }
+
+    @app.get("/")
+    async def root():
+        return PlainTextResponse("Ollama is running")
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": name, "model": name} for name in state.loaded_models]}
+
+    @app.get("/stats")
+    async def stats():
+        return {**state.stats, "waiting": state.waiting, "in_flight": state.in_flight}
+
+    @app.post("/api/generate")
+    async def api_generate(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        stream = body.get("stream", True)
+
+        generation = admit()
+        if isinstance(generation, JSONResponse):
+            return generation
+
+        # An empty prompt only loads the model, as in Ollama
+        num_tokens = requested_tokens(body) if body.get("prompt") else 0
+        started = time.perf_counter()
+
+        if stream:
+            async def ndjson() -> AsyncIterator[str]:
+                count = 0
+                async for token in generate_tokens(model, num_tokens, generation):
+                    count += 1
+                    yield json.dumps({"model": model, "created_at": now_iso(), "response": token, "done": False}) + "\n"
+                yield json.dumps({"model": model, "created_at": now_iso(), "response": "", **final_stats(started, count)}) + "\n"
+
+            return streaming_response(ndjson(), generation, "application/x-ndjson")
+
+        tokens = [token async for token in generate_tokens(model, num_tokens, generation)]
+        return {"model": model, "created_at": now_iso(), "response": "".join(tokens), **final_stats(started, len(tokens))}
+
+    @app.post("/api/chat")
+    async def api_chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        stream = body.get("stream", True)
+
+        generation = admit()
+        if isinstance(generation, JSONResponse):
+            return generation
+
+        num_tokens = requested_tokens(body) if body.get("messages") else 0
+        started = time.perf_counter()
+
+        if stream:
+            async def ndjson() -> AsyncIterator[str]:
+                count = 0
+                async for token in generate_tokens(model, num_tokens, generation):
+                    count += 1
+                    message = {"role": "assistant", "content": token}
+                    yield json.dumps({"model": model, "created_at": now_iso(), "message": message, "done": False}) + "\n"
+                message = {"role": "assistant", "content": ""}
+                yield json.dumps({"model": model, "created_at": now_iso(), "message": message, **final_stats(started, count)}) + "\n"
+
+            return streaming_response(ndjson(), generation, "application/x-ndjson")
+
+        tokens = [token async for token in generate_tokens(model, num_tokens, generation)]
+        message = {"role": "assistant", "content": "".join(tokens)}
+        return {"model": model, "created_at": now_iso(), "message": message, **final_stats(started, len(tokens))}
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        stream = body.get("stream", False)
+
+        generation = admit()
+        if isinstance(generation, JSONResponse):
+            return generation
+
+        completion_id = f"chatcmpl-stub-{random.getrandbits(48):x}"
+        created = int(time.time())
+        num_tokens = requested_tokens(body)
+
+        if stream:
+            async def sse() -> AsyncIterator[str]:
+                async for token in generate_tokens(model, num_tokens, generation):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return streaming_response(sse(), generation, "text/event-stream")
+
+        tokens: List[str] = [token async for token in generate_tokens(model, num_tokens, generation)]
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        }
+
+    return app
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Ollama-compatible stub server for load testing")
+    parser.add_argument("--host", default=os.getenv("STUB_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("STUB_PORT", "11435")))
+    parser.add_argument("--ttft", type=float, default=float(os.getenv("STUB_TTFT", "0.5")),
+                        help="Time to first token in seconds")
+    parser.add_argument("--ttft-jitter", type=float, default=float(os.getenv("STUB_TTFT_JITTER", "0.1")),
+                        help="Uniform +/- jitter applied to the time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=float(os.getenv("STUB_TOKENS_PER_SEC", "20")),
+                        help="Generation rate after the first token")
+    parser.add_argument("--response-tokens", type=int, default=int(os.getenv("STUB_RESPONSE_TOKENS", "200")),
+                        help="Tokens per response (capped by num_predict/max_tokens)")
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("STUB_ERROR_RATE", "0.0")),
+                        help="Fraction of requests that fail with HTTP 500")
+    parser.add_argument("--max-concurrency", type=int, default=int(os.getenv("STUB_MAX_CONCURRENCY", "1")),
+                        help="Requests generated in parallel (like OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("STUB_MAX_QUEUE", "512")),
+                        help="Requests allowed to wait before returning HTTP 503")
+    parser.add_argument("--load-time", type=float, default=float(os.getenv("STUB_LOAD_TIME", "0")),
+                        help="Simulated cold-load delay the first time each model is used")
+
+    args = parser.parse_args()
+    if args.tokens_per_sec <= 0 or args.max_concurrency < 1:
+        parser.error("--tokens-per-sec must be positive and --max-concurrency at least 1")
+
+    print(f"🧪 Ollama stub listening on {args.host}:{args.port} "
+          f"(ttft={args.ttft}s, {args.tokens_per_sec} tok/s, concurrency={args.max_concurrency}, "
+          f"error_rate={args.error_rate})")
+    uvicorn.run(create_app(StubConfig(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
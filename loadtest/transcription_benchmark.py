@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Transcription engine benchmark
+
+Runs each configured engine over a fixed set of sample clips and reports the
+real-time factor (processing time / audio duration, lower is faster) and the
+word error rate against the reference transcripts in clips/manifest.json.
+Engines are loaded through SpeechService, so the numbers reflect exactly what
+the backend runs for a given STT_ENGINE / STT_MODEL_SIZE / STT_COMPUTE_TYPE.
+
+The clips are committed with the manifest, which pins each one by SHA-256;
+a run refuses clips that are missing or don't match, so results stay
+comparable over time. --generate and --pin only create the reference set
+(or add a new clip to it); commit the clips and the manifest afterwards.
+
+Usage:
+    python loadtest/transcription_benchmark.py --engines whisper faster-whisper --model-size base
+    python loadtest/transcription_benchmark.py --generate --pin    # new clips: synthesize (gTTS), then pin
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.speech_service import SpeechService  # noqa: E402
+
+CLIPS_DIR = Path(__file__).resolve().parent / "clips"
+MANIFEST = CLIPS_DIR / "manifest.json"
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase words without punctuation, for scoring"""
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower().replace("-", " ")).split()
+
+
+def word_errors(reference: List[str], hypothesis: List[str]) -> int:
+    """Word-level Levenshtein distance (substitutions + deletions + insertions)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1]
+
+
+def audio_duration(path: Path) -> float:
+    """Clip length in seconds"""
+    import whisper
+
+    return len(whisper.load_audio(str(path))) / whisper.audio.SAMPLE_RATE
+
+
+def sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def generate_clips(manifest: Dict[str, Any]):
+    """Synthesize the reference sentences that have no clip yet"""
+    from gtts import gTTS
+
+    for clip in manifest["clips"]:
+        path = CLIPS_DIR / clip["file"]
+        if not path.exists():
+            gTTS(text=clip["text"], lang=manifest.get("language", "en")).save(str(path))
+            print(f"generated {path.name}")
+
+
+def pin_clips(manifest: Dict[str, Any]):
+    """Record the checksum of every clip that isn't pinned yet (pinned ones are never changed)"""
+    pinned = 0
+    for clip in manifest["clips"]:
+        path = CLIPS_DIR / clip["file"]
+        if "sha256" not in clip and path.exists():
+            clip["sha256"] = sha256(path)
+            pinned += 1
+    MANIFEST.write_text(json.dumps(manifest, indent=2) + "\n")
+    print(f"pinned {pinned} clips in {MANIFEST}; commit them with the manifest")
+
+
+def check_clip(clip: Dict[str, Any], path: Path):
+    """Exit unless the clip is present and matches its pinned checksum"""
+    if not path.exists():
+        sys.exit(f"Missing clip {path}; restore the committed clips (git checkout {CLIPS_DIR})")
+    if "sha256" not in clip:
+        sys.exit(f"Clip {path.name} is not pinned; run with --pin and commit the clip and manifest")
+    if sha256(path) != clip["sha256"]:
+        sys.exit(f"Clip {path.name} does not match its pinned checksum, so results would not be comparable; "
+                 f"restore the committed clip (git checkout {path})")
+
+
+async def benchmark_engine(engine: str, args: argparse.Namespace, clips: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Load one engine and transcribe every clip with it"""
+    os.environ["STT_ENGINE"] = engine
+    os.environ["STT_MODEL_SIZE"] = args.model_size
+    os.environ["STT_COMPUTE_TYPE"] = args.compute_type
+    os.environ["STT_WORKERS"] = "0"  # compare engines on a single in-process model
+    service = SpeechService()
+
+    started = time.perf_counter()
+    await service._load_transcription_model()
+    load_time = time.perf_counter() - started
+    if service.whisper_model is None or service.stt_engine != engine:
+        raise RuntimeError(f"{engine} could not be loaded")
+
+    # Warm-up run, excluded from the timings
+    await service._transcribe_with_whisper(str(clips[0]["path"]))
+
+    total_audio = total_time = 0.0
+    total_errors = total_words = 0
+    for clip in clips:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            text = await service._transcribe_with_whisper(str(clip["path"]))
+            timings.append(time.perf_counter() - started)
+
+        elapsed = min(timings)
+        reference = normalize(clip["text"])
+        errors = word_errors(reference, normalize(text))
+        total_audio += clip["duration"]
+        total_time += elapsed
+        total_errors += errors
+        total_words += len(reference)
+
+        if args.verbose:
+            print(f"  [{engine}] {clip['file']}: rtf={elapsed / clip['duration']:.3f} errors={errors} '{text}'")
+
+    return {
+        "engine": engine,
+        "load_time": load_time,
+        "rtf": total_time / total_audio,
+        "wer": total_errors / total_words,
+        "audio_seconds": total_audio,
+    }
+
+
+async def run(args: argparse.Namespace):
+    manifest = json.loads(MANIFEST.read_text())
+    if args.generate:
+        generate_clips(manifest)
+    if args.pin:
+        pin_clips(manifest)
+
+    clips = []
+    for clip in manifest["clips"]:
+        path = CLIPS_DIR / clip["file"]
+        check_clip(clip, path)
+        clips.append({**clip, "path": path, "duration": audio_duration(path)})
+
+    results = []
+    for engine in args.engines:
+        try:
+            results.append(await benchmark_engine(engine, args, clips))
+        except Exception as e:
+            print(f"{engine}: skipped ({str(e)})")
+
+    print(f"\n{len(clips)} clips, model size {args.model_size}, compute type {args.compute_type}")
+    print(f"{'engine':<16}{'load (s)':>10}{'RTF':>10}{'WER':>10}")
+    for result in results:
+        print(f"{result['engine']:<16}{result['load_time']:>10.2f}{result['rtf']:>10.3f}{result['wer']:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare transcription engines on fixed sample clips")
+    parser.add_argument("--engines", nargs="+", default=["whisper", "faster-whisper"],
+                        choices=["whisper", "faster-whisper"])
+    parser.add_argument("--model-size", default=os.getenv("STT_MODEL_SIZE", "base"))
+    parser.add_argument("--compute-type", default=os.getenv("STT_COMPUTE_TYPE", "int8"),
+                        help="CTranslate2 compute type for faster-whisper (int8, int8_float32, float32)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per clip; the fastest is kept")
+    parser.add_argument("--generate", action="store_true",
+                        help="Synthesize any missing clips from the manifest with gTTS")
+    parser.add_argument("--pin", action="store_true",
+                        help="Record checksums for clips not yet pinned in the manifest")
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
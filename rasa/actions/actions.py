@@ -1,7 +1,10 @@
 import logging
-import requests
+import aiohttp
+import asyncio
 import json
-from typing import Any, Text, Dict, List
+import time
+from collections import deque
+from typing import Any, Text, Dict, List, Optional, Tuple, Deque
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
@@ -12,15 +15,158 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Budget for each backend call, forwarded as the remaining request deadline (ms)
+# so the backend stops working on requests this action has given up on
+RAG_BACKEND_TIMEOUT = float(os.getenv("RAG_BACKEND_TIMEOUT", "30"))
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# Connection setup and per-read limits within that budget, and keep-alive
+# connections held open to the backend
+RAG_BACKEND_CONNECT_TIMEOUT = float(os.getenv("RAG_BACKEND_CONNECT_TIMEOUT", "5"))
+RAG_BACKEND_READ_TIMEOUT = float(os.getenv("RAG_BACKEND_READ_TIMEOUT", str(RAG_BACKEND_TIMEOUT)))
+RAG_BACKEND_POOL_SIZE = int(os.getenv("RAG_BACKEND_POOL_SIZE", "50"))
+
+RAG_BACKEND_URL = os.getenv("RAG_BACKEND_URL", "http://localhost:8000")
+
+# Shared by every action; created lazily on the action server's event loop
+_backend_http: Optional[aiohttp.ClientSession] = None
+
+def _deadline_headers() -> Dict[Text, Text]:
+    """Headers carrying this action's backend budget"""
+    return {DEADLINE_HEADER: str(int(RAG_BACKEND_TIMEOUT * 1000))}
+
+def _get_backend_http() -> aiohttp.ClientSession:
+    """Pooled keep-alive session to the RAG backend"""
+    global _backend_http
+    if _backend_http is None or _backend_http.closed:
+        _backend_http = aiohttp.ClientSession(
+            base_url=RAG_BACKEND_URL,
+            connector=aiohttp.TCPConnector(limit=RAG_BACKEND_POOL_SIZE, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(
+                total=RAG_BACKEND_TIMEOUT,
+                connect=RAG_BACKEND_CONNECT_TIMEOUT,
+                sock_read=RAG_BACKEND_READ_TIMEOUT
+            )
+        )
+    return _backend_http
+
+async def _query_backend(payload: Dict[Text, Any], path: Text = "/query") -> Tuple[int, Dict[Text, Any]]:
+    """POST a query to the RAG backend; returns the status code and the JSON body (if 200)"""
+    async with _get_backend_http().post(path, json=payload, headers=_deadline_headers()) as response:
+        if response.status != 200:
+            return response.status, {}
+        return response.status, await response.json()
+
+# Messages kept per conversation for the human handoff summary, in a slot
+# so the tracker store keeps them (see action_log_turn)
+HANDOFF_TRANSCRIPT_MESSAGES = int(os.getenv("HANDOFF_TRANSCRIPT_MESSAGES", "10"))
+HANDOFF_TRANSCRIPT_SLOT = "handoff_transcript"
+
+# Where handoff requests go for agents: "redis" (a list at HANDOFF_QUEUE_KEY)
+# or "memory" (kept in-process, logged)
+HANDOFF_QUEUE = os.getenv("HANDOFF_QUEUE", "memory").lower()
+HANDOFF_QUEUE_KEY = os.getenv("HANDOFF_QUEUE_KEY", "handoff:requests")
+HANDOFF_MEMORY_QUEUE_SIZE = int(os.getenv("HANDOFF_MEMORY_QUEUE_SIZE", "1000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+class ConversationLog:
+    """
+    Last few user/bot messages of a conversation, kept in the
+    handoff_transcript slot as a ring buffer.
+
+    The slot has a custom mapping to action_log_turn, which Rasa runs on
+    every user turn, so the transcript is appended as turns happen (rule
+    and utter_* turns included) and lives in the tracker store: it survives
+    action server restarts and is shared by every replica. Each update
+    reads only the tracker events newer than the last one it read, and the
+    handoff transcript is read from the fixed-size buffer.
+    """
+    
+    def __init__(self, max_messages: int):
+        self.max_messages = max_messages
+    
+    def update(self, tracker: Tracker) -> Dict[Text, Any]:
+        """The transcript slot value, with the messages added since it was last updated"""
+        state = tracker.get_slot(HANDOFF_TRANSCRIPT_SLOT) or {}
+        read_until = state.get("read_until", 0.0)
+        messages = deque(state.get("messages", []), maxlen=self.max_messages)
+        
+        # New events are at the end; walk back to the last one already read
+        new_events = []
+        for event in reversed(tracker.events):
+            if event.get('timestamp', 0.0) <= read_until:
+                break
+            new_events.append(event)
+        
+        for event in reversed(new_events):
+            if event.get('event') == 'user':
+                messages.append(f"User: {event.get('text', '')}")
+            elif event.get('event') == 'bot':
+                messages.append(f"Bot: {event.get('text', '')}")
+            read_until = max(read_until, event.get('timestamp', 0.0))
+        
+        return {"read_until": read_until, "messages": list(messages)}
+
+class HandoffQueue:
+    """Hands conversation context to human agents without blocking the action"""
+    
+    def __init__(self):
+        self.redis = None
+        self.local: Deque[Dict[Text, Any]] = deque(maxlen=HANDOFF_MEMORY_QUEUE_SIZE)
+        self._tasks = set()
+        if HANDOFF_QUEUE == "redis":
+            try:
+                import redis.asyncio as redis
+                
+                self.redis = redis.from_url(REDIS_URL)
+            except Exception as e:
+                logger.error(f"Error creating Redis handoff queue, keeping handoffs in memory: {str(e)}")
+    
+    def push(self, handoff: Dict[Text, Any]):
+        """Queue a handoff in the background"""
+        task = asyncio.create_task(self._push(handoff))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _push(self, handoff: Dict[Text, Any]):
+        try:
+            if self.redis is not None:
+                await self.redis.lpush(HANDOFF_QUEUE_KEY, json.dumps(handoff))
+                return
+        except Exception as e:
+            logger.error(f"Error pushing handoff to Redis, keeping it in memory: {str(e)}")
+        self.local.append(handoff)
+        logger.info(f"Queued handoff for {handoff.get('sender_id')}: {json.dumps(handoff)}")
+
+conversation_log = ConversationLog(HANDOFF_TRANSCRIPT_MESSAGES)
+handoff_queue = HandoffQueue()
+
+class ActionLogTurn(Action):
+    """Appends the latest turn to the handoff transcript (run by action_extract_slots on every user turn)"""
+    
+    def name(self) -> Text:
+        return "action_log_turn"
+    
+    async def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        
+        try:
+            return [SlotSet(HANDOFF_TRANSCRIPT_SLOT, conversation_log.update(tracker))]
+        except Exception as e:
+            logger.error(f"Error in action_log_turn: {str(e)}")
+            return []
+
 class ActionFallbackToRAG(Action):
     """Custom action to fallback to RAG system for detailed responses"""
     
     def name(self) -> Text:
         return "action_fallback_to_rag"
     
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
         
         try:
             # Get the user's message
@@ -42,21 +188,14 @@ class ActionFallbackToRAG(Action):
                 user_context['family_size'] = tracker.get_slot('family_size')
             
             # Call the RAG backend
-            backend_url = os.getenv("RAG_BACKEND_URL", "http://localhost:8000")
-            
             payload = {
                 "query": user_message,
                 "user_context": user_context
             }
             
-            response = requests.post(
-                f"{backend_url}/query",
-                json=payload,
-                timeout=30
-            )
+            status, result = await _query_backend(payload)
             
-            if response.status_code == 200:
-                result = response.json()
+            if status == 200:
                 response_text = result.get('response', '')
                 
                 if response_text:
@@ -64,7 +203,7 @@ class ActionFallbackToRAG(Action):
                 else:
                     dispatcher.utter_message(text="I'm sorry, I couldn't find specific information about that. Let me help you with general information about public services.")
             else:
-                logger.error(f"RAG backend error: {response.status_code}")
+                logger.error(f"RAG backend error: {status}")
                 dispatcher.utter_message(text="I'm having trouble accessing detailed information right now. Let me provide you with general guidance about public services.")
                 
         except Exception as e:
@@ -79,9 +218,10 @@ class ActionProvideDetailedInfo(Action):
     def name(self) -> Text:
         return "action_provide_detailed_info"
     
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
         
         try:
             # Get the program from slots
@@ -91,25 +231,15 @@ class ActionProvideDetailedInfo(Action):
                 dispatcher.utter_message(text="Which program would you like detailed information about? I can help with SNAP, housing assistance, or healthcare benefits.")
                 return []
             
-            # Create a specific query for the program
-            query = f"Tell me detailed information about {program} including eligibility, application process, and benefits."
-            
-            # Call the RAG backend
-            backend_url = os.getenv("RAG_BACKEND_URL", "http://localhost:8000")
-            
+            # The backend keeps precomputed answers per (program, location)
             payload = {
-                "query": query,
-                "user_context": {"program": program}
+                "program": program,
+                "location": tracker.get_slot('location')
             }
             
-            response = requests.post(
-                f"{backend_url}/query",
-                json=payload,
-                timeout=30
-            )
+            status, result = await _query_backend(payload, "/query/program")
             
-            if response.status_code == 200:
-                result = response.json()
+            if status == 200:
                 response_text = result.get('response', '')
                 
                 if response_text:
@@ -117,7 +247,7 @@ class ActionProvideDetailedInfo(Action):
                 else:
                     dispatcher.utter_message(text=f"I don't have detailed information about {program} at the moment. Please contact your local office for specific details.")
             else:
-                logger.error(f"RAG backend error: {response.status_code}")
+                logger.error(f"RAG backend error: {status}")
                 dispatcher.utter_message(text="I'm having trouble accessing detailed information right now. Please contact your local public services office.")
                 
         except Exception as e:
@@ -132,7 +262,7 @@ class ActionConnectToHuman(Action):
     def name(self) -> Text:
         return "action_connect_to_human"
     
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
@@ -149,8 +279,12 @@ class ActionConnectToHuman(Action):
                 }
             }
             
-            # Log the transfer request
-            logger.info(f"Transferring to human agent. Context: {json.dumps(user_context)}")
+            # Queue the transfer request for agents
+            handoff_queue.push({
+                "sender_id": tracker.sender_id,
+                "requested_at": time.time(),
+                **user_context
+            })
             
             # Provide transfer message
             transfer_message = """I understand you'd like to speak with a human representative. 
@@ -175,16 +309,8 @@ Thank you for using our service!"""
     def _get_conversation_summary(self, tracker: Tracker) -> str:
         """Generate a summary of the conversation for human transfer"""
         try:
-            messages = []
-            for event in tracker.events:
-                if event.get('event') == 'user':
-                    messages.append(f"User: {event.get('text', '')}")
-                elif event.get('event') == 'bot':
-                    messages.append(f"Bot: {event.get('text', '')}")
-            
-            # Take last 10 messages for summary
-            recent_messages = messages[-10:] if len(messages) > 10 else messages
-            return "\n".join(recent_messages)
+            # Last HANDOFF_TRANSCRIPT_MESSAGES messages, from the transcript slot
+            return "\n".join(conversation_log.update(tracker)["messages"])
             
         except Exception as e:
             logger.error(f"Error generating conversation summary: {str(e)}")
@@ -196,9 +322,10 @@ class ActionSetUserContext(Action):
     def name(self) -> Text:
         return "action_set_user_context"
     
-    def run(self, dispatcher: CollectingDispatcher,
+    async def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
         
         try:
             # Extract entities and set context
@@ -156,15 +156,15 @@ class APITester:
             )
             
             if response.status_code == 200:
-                data = response.json()
-                audio_data = data.get('audio_data')
+                audio_data = response.content
+                content_type = response.headers.get('content-type', '')
                 
-                if audio_data and len(audio_data) > 0:
+                if audio_data and content_type.startswith('audio/'):
                     return self.log_test(
                         "Voice Synthesis",
                         True,
-                        f"Generated audio data: {len(audio_data)} bytes",
-                        {"audio_size": len(audio_data)}
+                        f"Generated audio: {len(audio_data)} bytes, {response.headers.get('x-audio-duration')}s",
+                        {"audio_size": len(audio_data), "content_type": content_type}
                     )
                 else:
                     return self.log_test(
@@ -205,7 +205,14 @@ class APITester:
             if response.status_code == 200:
                 data = response.json()
                 text_response = data.get('text_response', '')
-                audio_data = data.get('audio_data')
+                audio_url = data.get('audio_url')
+                
+                # Audio is fetched separately, as a client playing it would
+                audio_data = b""
+                if audio_url:
+                    audio_response = self.session.get(f"{self.base_url}{audio_url}", timeout=30)
+                    if audio_response.status_code == 200:
+                        audio_data = audio_response.content
                 
                 if text_response and audio_data:
                     return self.log_test(
@@ -0,0 +1,383 @@
+import os
+import json
+import math
+import time
+import base64
+import asyncio
+import logging
+import struct
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Twilio Media Streams carry 8 kHz mono G.711 mu-law, 20 ms (160 bytes) per frame
+SAMPLE_RATE = 8000
+FRAME_BYTES = 160
+FRAME_SECONDS = FRAME_BYTES / SAMPLE_RATE
+
+# Audio sent back to the call per media message
+OUTBOUND_CHUNK_BYTES = 8000
+
+# End-of-speech detection: a frame is speech when it is MARGIN_DB above the
+# tracked noise floor (and above MIN_DB); an utterance ends after END_SILENCE
+# seconds of non-speech and is dropped if it has less than MIN_SPEECH seconds
+MARGIN_DB = float(os.getenv("MEDIA_VAD_MARGIN_DB", "12"))
+MIN_DB = float(os.getenv("MEDIA_VAD_MIN_DB", "-50"))
+END_SILENCE = float(os.getenv("MEDIA_END_SILENCE", "0.7"))
+MIN_SPEECH = float(os.getenv("MEDIA_MIN_SPEECH", "0.25"))
+MAX_UTTERANCE = float(os.getenv("MEDIA_MAX_UTTERANCE", "30"))
+PRE_ROLL = 0.2
+
+# Time allowed for one turn (transcribe, answer, synthesize)
+TURN_BUDGET_SECONDS = float(os.getenv("VOICE_JOB_BUDGET_SECONDS", "60"))
+
+
+def _mulaw_to_linear(byte: int) -> int:
+    """G.711 mu-law byte to a 16-bit linear sample"""
+    byte = ~byte & 0xFF
+    magnitude = ((((byte & 0x0F) << 3) + 0x84) << ((byte & 0x70) >> 4)) - 0x84
+    return -magnitude if byte & 0x80 else magnitude
+
+
+MULAW_TO_LINEAR = [_mulaw_to_linear(byte) for byte in range(256)]
+# Per-byte squared amplitude on a 0..1 scale, for frame energy
+MULAW_POWER = [(sample / 32768.0) ** 2 for sample in MULAW_TO_LINEAR]
+
+
+def linear_to_mulaw(sample: int) -> int:
+    """16-bit linear sample to a G.711 mu-law byte"""
+    # Reference G.711 on 14-bit magnitudes
+    pcm = sample >> 2
+    magnitude = min(abs(pcm), 8159) + 0x21
+    segment = max(magnitude.bit_length() - 6, 0)
+    code = 0x7F if segment > 7 else (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    return code ^ (0x7F if pcm < 0 else 0xFF)
+
+
+def frame_db(frame: bytes) -> float:
+    """RMS level of a mu-law frame in dBFS"""
+    power = sum(MULAW_POWER[byte] for byte in frame) / max(len(frame), 1)
+    return 10 * math.log10(power + 1e-10)
+
+
+def wav_data_offset(data: bytes) -> Optional[int]:
+    """Where the samples start in the beginning of a WAV stream (None until the data chunk header is in)"""
+    if len(data) < 12:
+        return None
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return 0
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack("<4sI", data[offset:offset + 8])
+        if chunk_id == b"data":
+            return offset + 8
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def wav_data(data: bytes) -> bytes:
+    """Sample bytes of a WAV file (the body itself if it isn't WAV)"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return data
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack("<4sI", data[offset:offset + 8])
+        if chunk_id == b"data":
+            return data[offset + 8:offset + 8 + size]
+        offset += 8 + size + (size & 1)
+    return b""
+
+
+class EndOfSpeechDetector:
+    """
+    Frame-by-frame energy VAD for 8 kHz mu-law. feed() returns "start" on the
+    first speech frame of an utterance and the utterance's audio (with a
+    short pre-roll) once it ends; otherwise None.
+    """
+
+    def __init__(self):
+        self.noise_db = MIN_DB
+        self.pre_roll: List[bytes] = []
+        self.utterance = bytearray()
+        self.speech_frames = 0
+        self.silent_frames = 0
+        self.in_speech = False
+
+    def feed(self, frame: bytes):
+        level = frame_db(frame)
+        is_speech = level > max(self.noise_db + MARGIN_DB, MIN_DB)
+        if not is_speech:
+            # Track the noise floor: fall quickly, rise slowly
+            rate = 0.5 if level < self.noise_db else 0.02
+            self.noise_db += rate * (level - self.noise_db)
+
+        if not self.in_speech:
+            self.pre_roll = (self.pre_roll + [frame])[-int(PRE_ROLL / FRAME_SECONDS) - 1:]
+            if not is_speech:
+                return None
+            self.in_speech = True
+            self.utterance = bytearray(b"".join(self.pre_roll))
+            self.speech_frames = 1
+            self.silent_frames = 0
+            return "start"
+
+        self.utterance += frame
+        if is_speech:
+            self.speech_frames += 1
+            self.silent_frames = 0
+        else:
+            self.silent_frames += 1
+
+        too_long = len(self.utterance) >= MAX_UTTERANCE * SAMPLE_RATE
+        if self.silent_frames * FRAME_SECONDS < END_SILENCE and not too_long:
+            return None
+
+        self.in_speech = False
+        self.pre_roll = []
+        utterance = bytes(self.utterance)
+        self.utterance = bytearray()
+        if self.speech_frames * FRAME_SECONDS < MIN_SPEECH:
+            return None
+        return utterance
+
+
+class StreamingTranscription:
+    """
+    One utterance streamed into the backend's /voice/stream WebSocket while
+    the caller is still speaking, so most of it is transcribed by the time
+    they stop. Audio sent before the connection is up is queued.
+    """
+
+    def __init__(self, http: aiohttp.ClientSession):
+        self.audio: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        self.task = asyncio.create_task(self._run(http))
+
+    def send(self, audio: bytes):
+        self.audio.put_nowait(audio)
+
+    def finish(self):
+        """End of the utterance: the backend finalizes it and returns the transcript"""
+        self.audio.put_nowait(None)
+
+    def abort(self):
+        self.task.cancel()
+
+    async def transcript(self) -> str:
+        return await self.task
+
+    async def _run(self, http: aiohttp.ClientSession) -> str:
+        params = {"encoding": "mulaw", "sample_rate": str(SAMPLE_RATE)}
+        async with http.ws_connect("/voice/stream", params=params) as ws:
+            sender = asyncio.create_task(self._send_audio(ws))
+            try:
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        continue
+                    event = json.loads(message.data)
+                    if event.get("type") == "done":
+                        return event.get("transcript", "").strip()
+                    if event.get("type") == "error" or event.get("error"):
+                        logger.error(f"Streaming transcription error: {event.get('detail') or event.get('error')}")
+                return ""
+            finally:
+                sender.cancel()
+
+    async def _send_audio(self, ws: aiohttp.ClientWebSocketResponse):
+        while True:
+            audio = await self.audio.get()
+            if audio is None:
+                await ws.send_str(json.dumps({"event": "stop"}))
+                return
+            await ws.send_bytes(audio)
+
+
+class MediaStreamCall:
+    """One Twilio Media Streams connection: detects utterances, runs turns, plays answers"""
+
+    def __init__(self, gateway: "MediaStreamGateway", ws: web.WebSocketResponse):
+        self.gateway = gateway
+        self.ws = ws
+        self.stream_sid: Optional[str] = None
+        self.call_sid: Optional[str] = None
+        self.detector = EndOfSpeechDetector()
+        self.transcription: Optional[StreamingTranscription] = None
+        self.utterances: "asyncio.Queue[StreamingTranscription]" = asyncio.Queue()
+        self.answer: Optional[asyncio.Task] = None
+        self.answer_playing = False
+        self.interrupted = False
+        self.pending = b""
+        self.playing_marks = 0
+        self.mark_counter = 0
+        self.speech_ended_at = 0.0
+
+    async def run(self):
+        worker = asyncio.create_task(self._answer_utterances())
+        try:
+            async for message in self.ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                event = json.loads(message.data)
+                kind = event.get("event")
+                if kind == "start":
+                    self.stream_sid = event.get("streamSid") or event["start"].get("streamSid")
+                    self.call_sid = event["start"].get("callSid")
+                    logger.info(f"Media stream started for {self.call_sid}")
+                elif kind == "media":
+                    if event["media"].get("track", "inbound") == "inbound":
+                        await self._on_audio(base64.b64decode(event["media"]["payload"]))
+                elif kind == "mark":
+                    self.playing_marks = max(0, self.playing_marks - 1)
+                elif kind == "stop":
+                    break
+        finally:
+            worker.cancel()
+            if self.answer:
+                self.answer.cancel()
+            if self.transcription:
+                self.transcription.abort()
+
+    async def _on_audio(self, payload: bytes):
+        self.pending += payload
+        while len(self.pending) >= FRAME_BYTES:
+            frame, self.pending = self.pending[:FRAME_BYTES], self.pending[FRAME_BYTES:]
+            was_speaking = self.detector.in_speech
+            result = self.detector.feed(frame)
+            if result == "start":
+                if self.playing_marks or self.answer_playing:
+                    # Barge-in: stop the answer that is still playing (or streaming in)
+                    await self._send({"event": "clear", "streamSid": self.stream_sid})
+                    self.playing_marks = 0
+                    if self.answer and self.answer_playing:
+                        self.interrupted = True
+                        self.answer.cancel()
+                # Stream the utterance, pre-roll included, into transcription as it is spoken
+                self.transcription = StreamingTranscription(self.gateway.handler.backend_http)
+                self.transcription.send(bytes(self.detector.utterance))
+            elif self.detector.in_speech:
+                self.transcription.send(frame)
+            elif was_speaking:
+                transcription, self.transcription = self.transcription, None
+                if result:
+                    transcription.send(frame)
+                    transcription.finish()
+                    self.speech_ended_at = time.monotonic()
+                    self.utterances.put_nowait(transcription)
+                else:
+                    # Too short to be speech
+                    transcription.abort()
+
+    async def _answer_utterances(self):
+        while True:
+            transcription = await self.utterances.get()
+            self.answer = asyncio.create_task(self._answer(transcription))
+            self.interrupted = False
+            try:
+                await self.answer
+            except asyncio.CancelledError:
+                if not self.interrupted:
+                    raise
+                logger.info(f"Answer for {self.call_sid} interrupted by the caller")
+            except Exception as e:
+                logger.error(f"Error answering media stream utterance: {str(e)}")
+            finally:
+                self.answer = None
+                self.answer_playing = False
+
+    async def _answer(self, transcription: StreamingTranscription):
+        deadline = time.monotonic() + TURN_BUDGET_SECONDS
+        text = await asyncio.wait_for(transcription.transcript(), timeout=TURN_BUDGET_SECONDS)
+        if not text:
+            return
+        logger.info(f"Transcript for {self.call_sid} ready {time.monotonic() - self.speech_ended_at:.2f}s after end of speech")
+
+        async for audio in self.gateway.answer_audio(text, self.call_sid, deadline):
+            if self.ws.closed:
+                return
+            if not self.answer_playing:
+                self.answer_playing = True
+                logger.info(f"Answer for {self.call_sid} started {time.monotonic() - self.speech_ended_at:.2f}s after end of speech")
+            await self._play(audio)
+
+        # Twilio echoes the mark once playback reaches it
+        self.mark_counter += 1
+        self.playing_marks += 1
+        await self._send({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": f"answer-{self.mark_counter}"}})
+
+    async def _play(self, audio: bytes):
+        for offset in range(0, len(audio), OUTBOUND_CHUNK_BYTES):
+            payload = base64.b64encode(audio[offset:offset + OUTBOUND_CHUNK_BYTES]).decode("ascii")
+            await self._send({"event": "media", "streamSid": self.stream_sid, "media": {"payload": payload}})
+
+    async def _send(self, message: Dict[str, Any]):
+        if not self.ws.closed:
+            await self.ws.send_str(json.dumps(message))
+
+
+class MediaStreamGateway:
+    """
+    WebSocket endpoint for Twilio Media Streams (<Connect><Stream>).
+
+    Caller audio is segmented as it arrives and each utterance is streamed
+    into the backend's /voice/stream transcription while the caller speaks.
+    Once they stop, the transcript is answered through the pipelined
+    /voice/process, whose 8 kHz mu-law audio is played into the call
+    sentence by sentence as it is synthesized. This skips recording
+    finalization and the recording download of the <Record> flow.
+    """
+
+    def __init__(self, handler):
+        # TwilioVoiceHandler: provides the pooled backend session
+        self.handler = handler
+        self.active_calls = 0
+        self.turns = 0
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        """aiohttp route for the Media Streams WebSocket"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.active_calls += 1
+        try:
+            await MediaStreamCall(self, ws).run()
+        except Exception as e:
+            logger.error(f"Error in media stream: {str(e)}")
+        finally:
+            self.active_calls -= 1
+        return ws
+
+    async def answer_audio(self, text: str, call_sid: Optional[str], deadline: float) -> AsyncIterator[bytes]:
+        """Answer a transcript, yielding the mu-law answer audio as it is synthesized"""
+        payload = {
+            "text": text,
+            "session_id": call_sid,
+            "pipelined": True,
+            "output_format": "mulaw"
+        }
+        async with self.handler.backend_http.post(
+            "/voice/process",
+            json=payload,
+            headers=self.handler._deadline_headers(deadline),
+            timeout=self.handler._timeout(deadline)
+        ) as response:
+            if response.status != 200:
+                logger.error(f"Turn processing failed: {response.status} {await response.text()}")
+                return
+            self.turns += 1
+
+            # The stream is one WAV file whose data chunk runs to the end
+            header = b""
+            async for chunk in response.content.iter_any():
+                if header is not None:
+                    header += chunk
+                    offset = wav_data_offset(header)
+                    if offset is None:
+                        continue
+                    chunk, header = header[offset:], None
+                if chunk:
+                    yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        """Gateway counters for health reporting"""
+        return {"active_calls": self.active_calls, "turns": self.turns}
@@ -0,0 +1,148 @@
+import os
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VOICE = "neutral"
+
+
+class PromptRegistry:
+    """
+    Pre-rendered audio for the voice handler's prompts.
+
+    Static prompts are synthesized once by the backend (8 kHz mu-law WAV)
+    and kept on disk under a hash of their text and voice, so an edited
+    prompt is re-rendered and an unchanged one is reused across restarts.
+    Dynamic texts (answers the caller asks to hear again) are rendered on
+    demand into the same directory, which keeps at most `max_dynamic` of
+    them. The files are served by the voice handler at /prompts/<key>.wav.
+    Twilio fetches them by absolute URL, so without a public URL nothing is
+    rendered and every prompt is spoken with <Say>.
+    """
+
+    def __init__(self, cache_dir: str, public_url: str, max_dynamic: int):
+        self.cache_dir = Path(cache_dir)
+        self.public_url = public_url.rstrip("/")
+        self.enabled = bool(self.public_url)
+        self.max_dynamic = max_dynamic
+        self.static_keys = set()
+        self.http: Optional[aiohttp.ClientSession] = None
+        self._rendering: Dict[str, asyncio.Task] = {}
+        self._limit = asyncio.Semaphore(int(os.getenv("PROMPT_RENDER_CONCURRENCY", "2")))
+        # Retry delay for static prompts that failed to render, doubling up to the maximum
+        self.retry = float(os.getenv("PROMPT_RETRY_SECONDS", "5"))
+        self.max_retry = float(os.getenv("PROMPT_MAX_RETRY_SECONDS", "60"))
+        self.stats_counters = {"rendered": 0, "reused": 0, "failed": 0}
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Cache key for a prompt text"""
+        return hashlib.sha256(f"{PROMPT_VOICE}\n{text}".encode("utf-8")).hexdigest()[:32]
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.wav"
+
+    def url_for(self, text: str) -> Optional[str]:
+        """URL Twilio can <Play> for the text, or None if it isn't rendered yet"""
+        key = self.key(text)
+        if not self.enabled or not self.path(key).exists():
+            return None
+        return f"{self.public_url}/prompts/{key}.wav"
+
+    async def prepare(self, http: aiohttp.ClientSession, prompts: Iterable[str]):
+        """
+        Render every static prompt that isn't already on disk
+
+        Prompts that fail (e.g. the backend isn't up yet) are retried with
+        exponential backoff until all of them are rendered.
+        """
+        if not self.enabled:
+            logger.warning("VOICE_PUBLIC_URL is not set; prompts are spoken with <Say>, not pre-rendered")
+            return
+
+        self.http = http
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        prompts = list(dict.fromkeys(prompts))
+        self.static_keys = {self.key(text) for text in prompts}
+
+        pending = prompts
+        delay = self.retry
+        while True:
+            results = await asyncio.gather(*(self.render(text) for text in pending))
+            pending = [text for text, url in zip(pending, results) if not url]
+            if not pending:
+                logger.info(f"Prompt registry ready: {len(prompts)} prompts rendered")
+                return
+            logger.warning(f"{len(pending)}/{len(prompts)} prompts not rendered; retrying in {delay:g}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry)
+
+    async def render(self, text: str) -> Optional[str]:
+        """Render a text (once, even if requested concurrently) and return its URL"""
+        if not self.enabled:
+            return None
+        url = self.url_for(text)
+        if url:
+            self.stats_counters["reused"] += 1
+            return url
+
+        key = self.key(text)
+        task = self._rendering.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render(key, text))
+            self._rendering[key] = task
+            task.add_done_callback(lambda _: self._rendering.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _render(self, key: str, text: str) -> Optional[str]:
+        try:
+            async with self._limit:
+                async with self.http.post(
+                    "/voice/synthesize",
+                    json={"text": text, "voice": PROMPT_VOICE, "speed": 1.0, "output_format": "mulaw"}
+                ) as response:
+                    # The backend answers 503 rather than sending error audio, which would be kept forever
+                    if response.status != 200:
+                        raise RuntimeError(f"synthesis returned {response.status}")
+                    audio = await response.read()
+                    if not audio:
+                        raise RuntimeError("synthesis returned no audio")
+
+            # Write-then-rename so a half-written file is never served
+            path = self.path(key)
+            partial = path.with_suffix(".part")
+            await asyncio.to_thread(partial.write_bytes, audio)
+            partial.replace(path)
+            self.stats_counters["rendered"] += 1
+
+            if key not in self.static_keys:
+                await asyncio.to_thread(self._prune_dynamic)
+            return self.url_for(text)
+
+        except Exception as e:
+            self.stats_counters["failed"] += 1
+            logger.error(f"Error rendering prompt: {str(e)}")
+            return None
+
+    def _prune_dynamic(self):
+        """Drop the oldest on-demand renders beyond max_dynamic"""
+        dynamic = [
+            path for path in self.cache_dir.glob("*.wav")
+            if path.stem not in self.static_keys
+        ]
+        if len(dynamic) <= self.max_dynamic:
+            return
+        dynamic.sort(key=lambda path: path.stat().st_mtime)
+        for path in dynamic[:len(dynamic) - self.max_dynamic]:
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Registry counters for health reporting"""
+        ready = sum(1 for key in self.static_keys if self.path(key).exists())
+        return {**self.stats_counters, "enabled": self.enabled, "static_prompts": len(self.static_keys), "static_ready": ready}
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Twilio Media Streams replay client
+
+Plays a recorded clip into the voice handler's /media WebSocket the way
+Twilio would (connected/start events, then 20 ms base64 mu-law media frames
+in real time), and records the audio streamed back. Reports how long after
+the end of the clip the answer started arriving.
+
+The clip must be an 8 kHz mono WAV, either mu-law or 16-bit PCM (e.g. a
+Twilio recording, or `ffmpeg -i in.mp3 -ar 8000 -ac 1 -acodec pcm_mulaw out.wav`).
+
+Usage:
+    python replay_media_stream.py question.wav --url ws://localhost:5001/media --output answer.wav
+"""
+
+import sys
+import json
+import time
+import uuid
+import base64
+import struct
+import asyncio
+import argparse
+from typing import Tuple
+
+import aiohttp
+
+from media_stream import SAMPLE_RATE, FRAME_BYTES, FRAME_SECONDS, linear_to_mulaw, wav_data
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_MULAW = 7
+
+
+def read_clip(path: str) -> bytes:
+    """Load an 8 kHz mono WAV as mu-law bytes"""
+    with open(path, "rb") as file:
+        data = file.read()
+    audio_format, channels, sample_rate, bits = _wav_format(data)
+    if channels != 1 or sample_rate != SAMPLE_RATE:
+        raise ValueError(f"Expected 8 kHz mono audio, got {sample_rate} Hz x {channels}")
+    samples = wav_data(data)
+    if audio_format == WAVE_FORMAT_MULAW:
+        return samples
+    if audio_format == WAVE_FORMAT_PCM and bits == 16:
+        pcm = struct.unpack(f"<{len(samples) // 2}h", samples[:len(samples) // 2 * 2])
+        return bytes(linear_to_mulaw(sample) for sample in pcm)
+    raise ValueError(f"Unsupported WAV format {audio_format} ({bits} bits)")
+
+
+def _wav_format(data: bytes) -> Tuple[int, int, int, int]:
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack("<4sI", data[offset:offset + 8])
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", data[offset + 8:offset + 24])
+            return audio_format, channels, sample_rate, bits
+        offset += 8 + size + (size & 1)
+    raise ValueError("Not a WAV file")
+
+
+def write_mulaw_wav(path: str, payload: bytes):
+    """Save mu-law bytes as an 8 kHz mono WAV"""
+    fmt = struct.pack("<HHIIHHH", WAVE_FORMAT_MULAW, 1, SAMPLE_RATE, SAMPLE_RATE, 1, 8, 0)
+    chunks = (
+        b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", len(payload)) + payload
+        + (b"\x00" if len(payload) & 1 else b"")
+    )
+    with open(path, "wb") as file:
+        file.write(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+
+
+async def replay(url: str, clip: bytes, output: str, trailing_silence: float, wait: float, fast: bool):
+    stream_sid = f"MZ{uuid.uuid4().hex}"
+    call_sid = f"CA{uuid.uuid4().hex}"
+    # Caller goes quiet after the question (0xFF is mu-law silence)
+    audio = clip + b"\xff" * int(trailing_silence * SAMPLE_RATE)
+    received = bytearray()
+    first_audio_at = None
+    clip_ended_at = None
+
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as ws:
+            async def receive():
+                nonlocal first_audio_at
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        continue
+                    event = json.loads(message.data)
+                    if event.get("event") == "media":
+                        if first_audio_at is None:
+                            first_audio_at = time.monotonic()
+                        received.extend(base64.b64decode(event["media"]["payload"]))
+                    elif event.get("event") == "mark":
+                        # Echo the mark, as Twilio does when playback reaches it
+                        await ws.send_str(json.dumps({"event": "mark", "streamSid": stream_sid, "mark": event["mark"]}))
+                        return
+
+            receiver = asyncio.create_task(receive())
+            await ws.send_str(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+            await ws.send_str(json.dumps({
+                "event": "start",
+                "streamSid": stream_sid,
+                "start": {
+                    "streamSid": stream_sid,
+                    "callSid": call_sid,
+                    "tracks": ["inbound"],
+                    "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": SAMPLE_RATE, "channels": 1}
+                }
+            }))
+
+            started = time.monotonic()
+            for chunk_index, offset in enumerate(range(0, len(audio), FRAME_BYTES)):
+                if offset >= len(clip) and clip_ended_at is None:
+                    clip_ended_at = time.monotonic()
+                await ws.send_str(json.dumps({
+                    "event": "media",
+                    "streamSid": stream_sid,
+                    "media": {
+                        "track": "inbound",
+                        "chunk": str(chunk_index + 1),
+                        "timestamp": str(int(offset / SAMPLE_RATE * 1000)),
+                        "payload": base64.b64encode(audio[offset:offset + FRAME_BYTES]).decode("ascii")
+                    }
+                }))
+                if not fast:
+                    # Pace frames in real time, like a live call
+                    await asyncio.sleep(max(0.0, started + (chunk_index + 1) * FRAME_SECONDS - time.monotonic()))
+
+            try:
+                await asyncio.wait_for(receiver, timeout=wait)
+            except asyncio.TimeoutError:
+                print(f"No complete answer within {wait}s")
+            await ws.send_str(json.dumps({"event": "stop", "streamSid": stream_sid}))
+
+    print(f"Sent {len(clip) / SAMPLE_RATE:.2f}s of speech + {trailing_silence:.1f}s of silence")
+    if first_audio_at is not None:
+        print(f"First answer audio {first_audio_at - (clip_ended_at or started):.2f}s after the end of the clip")
+        print(f"Received {len(received) / SAMPLE_RATE:.2f}s of audio")
+    if received and output:
+        write_mulaw_wav(output, bytes(received))
+        print(f"Answer written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded clip into the Media Streams gateway")
+    parser.add_argument("clip", help="8 kHz mono WAV (mu-law or 16-bit PCM)")
+    parser.add_argument("--url", default="ws://localhost:5001/media")
+    parser.add_argument("--output", default="answer.wav", help="Where to save the streamed answer")
+    parser.add_argument("--trailing-silence", type=float, default=3.0, help="Seconds of silence sent after the clip")
+    parser.add_argument("--wait", type=float, default=60.0, help="Seconds to wait for the answer")
+    parser.add_argument("--fast", action="store_true", help="Send frames as fast as possible instead of in real time")
+    args = parser.parse_args()
+
+    try:
+        clip = read_clip(args.clip)
+    except (OSError, ValueError) as e:
+        print(f"Can't read {args.clip}: {e}")
+        sys.exit(1)
+
+    asyncio.run(replay(args.url, clip, args.output, args.trailing_silence, args.wait, args.fast))
+
+
+if __name__ == "__main__":
+    main()
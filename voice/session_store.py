@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """
+    Per-call session state, keyed by call SID.
+
+    Sessions expire `ttl` seconds after their last update, so state for calls
+    that ended is dropped without a hang-up callback.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, call_sid: str) -> Dict[str, Any]:
+        """Session fields for a call ({} when unknown or expired)"""
+
+    @abstractmethod
+    async def update(self, call_sid: str, fields: Dict[str, Any]):
+        """Merge fields into a call's session and restart its TTL"""
+
+    @abstractmethod
+    async def delete(self, call_sid: str):
+        """Forget a call"""
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        """Store statistics for health reporting"""
+
+    async def close(self):
+        """Release connections"""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process store with TTL expiry and a cap on the number of sessions
+    (least recently updated sessions are evicted first). State is local to
+    the process, so it only suits a single voice-handler instance.
+    """
+
+    def __init__(self, ttl: float, max_sessions: int):
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        # call_sid -> (expires_at, fields), least recently updated first
+        self.sessions: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.evicted = 0
+        self.expired = 0
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        # Updates move sessions to the end, so expiry times are in order
+        while self.sessions:
+            call_sid, (expires_at, _) = next(iter(self.sessions.items()))
+            if expires_at > now:
+                break
+            del self.sessions[call_sid]
+            self.expired += 1
+
+    async def get(self, call_sid: str) -> Dict[str, Any]:
+        self._purge_expired()
+        entry = self.sessions.get(call_sid)
+        return dict(entry[1]) if entry else {}
+
+    async def update(self, call_sid: str, fields: Dict[str, Any]):
+        self._purge_expired()
+        _, session = self.sessions.pop(call_sid, (0.0, {}))
+        session.update(fields)
+        self.sessions[call_sid] = (time.monotonic() + self.ttl, session)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+
+    async def delete(self, call_sid: str):
+        self.sessions.pop(call_sid, None)
+
+    async def stats(self) -> Dict[str, Any]:
+        self._purge_expired()
+        return {
+            "backend": "memory",
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Redis-backed store shared by all voice-handler instances, so any replica
+    can serve any turn of a call. Each session is a hash of JSON-encoded
+    fields with a key TTL. A sorted set indexes sessions by last update, so
+    at most `max_sessions` are kept: beyond that the least recently updated
+    are deleted, as in the memory store.
+    """
+
+    KEY_PREFIX = "voice:session:"
+    INDEX_KEY = "voice:sessions"
+
+    def __init__(self, url: str, ttl: float, max_sessions: int):
+        super().__init__(ttl)
+        import redis.asyncio as redis
+
+        # Connects lazily; create_session_store pings it before use
+        self.redis = redis.from_url(url)
+        self.max_sessions = max_sessions
+        self.evicted = 0
+
+    def _key(self, call_sid: str) -> str:
+        return f"{self.KEY_PREFIX}{call_sid}"
+
+    async def get(self, call_sid: str) -> Dict[str, Any]:
+        fields = await self.redis.hgetall(self._key(call_sid))
+        return {name.decode(): json.loads(value) for name, value in fields.items()}
+
+    async def update(self, call_sid: str, fields: Dict[str, Any]):
+        key = self._key(call_sid)
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+            pipe.expire(key, int(self.ttl))
+            pipe.zadd(self.INDEX_KEY, {call_sid: now})
+            # Index entries of sessions whose keys have expired
+            pipe.zremrangebyscore(self.INDEX_KEY, 0, now - self.ttl)
+            pipe.zcard(self.INDEX_KEY)
+            count = (await pipe.execute())[-1]
+
+        if count > self.max_sessions:
+            oldest = await self.redis.zpopmin(self.INDEX_KEY, count - self.max_sessions)
+            if oldest:
+                await self.redis.delete(*[self._key(sid.decode()) for sid, _ in oldest])
+                self.evicted += len(oldest)
+
+    async def delete(self, call_sid: str):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(call_sid))
+            pipe.zrem(self.INDEX_KEY, call_sid)
+            await pipe.execute()
+
+    async def ping(self):
+        """Raise if Redis can't be reached"""
+        await self.redis.ping()
+
+    async def stats(self) -> Dict[str, Any]:
+        stats = {"backend": "redis", "ttl": self.ttl, "max_sessions": self.max_sessions, "evicted": self.evicted}
+        try:
+            stats["sessions"] = await self.redis.zcount(self.INDEX_KEY, time.time() - self.ttl, "+inf")
+            stats["connected"] = True
+        except Exception as e:
+            logger.error(f"Redis session store unreachable: {str(e)}")
+            stats["connected"] = False
+        return stats
+
+    async def close(self):
+        await self.redis.close()
+
+
+async def create_session_store() -> SessionStore:
+    """
+    Build the store selected by SESSION_STORE ("memory" or "redis").
+    Falls back to memory when Redis is requested but can't be reached.
+    """
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    ttl = float(os.getenv("VOICE_SESSION_TTL", "3600"))
+    max_sessions = int(os.getenv("VOICE_SESSION_MAX", "10000"))
+
+    if backend == "redis":
+        store = None
+        try:
+            store = RedisSessionStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"), ttl, max_sessions)
+            await store.ping()
+            logger.info("Using Redis session store")
+            return store
+        except Exception as e:
+            logger.error(f"Redis session store unavailable, using memory: {str(e)}")
+            if store is not None:
+                await store.close()
+
+    return MemorySessionStore(ttl, max_sessions)
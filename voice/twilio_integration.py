@@ -1,50 +1,148 @@
 import os
+import time
+import uuid
 import logging
-import requests
-import json
 from typing import Dict, Any, Optional
-from flask import Flask, request, Response
-from twilio.twiml.voice_response import VoiceResponse
-from twilio.rest import Client
+from twilio.twiml.voice_response import VoiceResponse, Connect
 import asyncio
 import aiohttp
+from aiohttp import web
 from dotenv import load_dotenv
 
+from session_store import SessionStore, create_session_store
+from media_stream import MediaStreamGateway
+from prompt_registry import PromptRegistry
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-
 # Twilio configuration
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
 # Backend services
 RASA_WEBHOOK_URL = os.getenv("RASA_WEBHOOK_URL", "http://localhost:5005/webhooks/rest/webhook")
 BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://localhost:8000")
+# Backend base URL as reachable by Twilio (e.g. https://example.org/api behind
+# nginx); synthesized audio is only played with <Play> when this is set
+BACKEND_PUBLIC_URL = os.getenv("BACKEND_PUBLIC_URL", "").rstrip("/")
+
+# Public wss:// URL of this handler's /media endpoint; when set, calls use
+# Twilio Media Streams instead of <Record> for every turn
+MEDIA_STREAM_URL = os.getenv("VOICE_MEDIA_STREAM_URL", "")
+
+# Remaining request budget (ms) forwarded to the backend so it can stop work
+# the caller is no longer waiting for
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# Twilio abandons webhooks after ~15s, so each caller turn gets slightly less
+TURN_BUDGET_SECONDS = float(os.getenv("VOICE_TURN_BUDGET_SECONDS", "14"))
+
+# Turns run as background jobs so slow answers outlive Twilio's webhook
+# timeout: the webhook waits briefly for the answer, then plays a hold prompt
+# and redirects Twilio to /turn_result, which long-polls the job
+JOB_BUDGET_SECONDS = float(os.getenv("VOICE_JOB_BUDGET_SECONDS", "60"))
+INLINE_WAIT_SECONDS = float(os.getenv("VOICE_INLINE_WAIT_SECONDS", "4"))
+POLL_WAIT_SECONDS = float(os.getenv("VOICE_POLL_WAIT_SECONDS", "8"))
+POLL_INTERVAL_SECONDS = 0.2
 
-# Initialize Twilio client
-twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN) if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN else None
+# Keep-alive connections held open to the backend
+HTTP_POOL_SIZE = int(os.getenv("VOICE_HTTP_POOL_SIZE", "100"))
+
+# This handler's base URL as reachable by Twilio, for pre-rendered prompts
+# (empty: prompts are not pre-rendered and are spoken with <Say>)
+VOICE_PUBLIC_URL = os.getenv("VOICE_PUBLIC_URL", "").rstrip("/")
+PROMPT_CACHE_DIR = os.getenv("PROMPT_CACHE_DIR", "./cache/prompts")
+PROMPT_CACHE_MAX_DYNAMIC = int(os.getenv("PROMPT_CACHE_MAX_DYNAMIC", "500"))
+
+# Fixed IVR prompts, rendered to audio once and played with <Play>
+PROMPTS = {
+    "welcome": (
+        "Hello! Welcome to the Public Service Navigation Assistant. I can help you with SNAP benefits, housing assistance, healthcare programs, and more. "
+        + ("How can I help you today?" if MEDIA_STREAM_URL else "Please speak after the beep.")
+    ),
+    "no_recording_heard": "I didn't hear anything. Please call back and try again.",
+    "hold": "One moment while I look that up.",
+    "still_working": "Still working on it, thank you for waiting.",
+    "menu": "Press 1 to repeat the information, press 2 to ask another question, or press 3 to speak with a human representative.",
+    "farewell": "Thank you for calling. Have a great day!",
+    "goodbye": "Thank you for calling. Goodbye.",
+    "nothing_to_repeat": "I don't have a previous response to repeat.",
+    "next_question": "Please ask your next question after the beep.",
+    "transfer": "I'm transferring you to a human representative. Please hold.",
+    "transfer_fallback": "For immediate assistance, please call 2-1-1 or visit your local public services office.",
+    "invalid_selection": "I didn't understand your selection. Please try again.",
+    "call_error": "I'm sorry, there was an error processing your call. Please try again.",
+    "request_error": "I'm sorry, there was an error processing your request. Please try again.",
+    "selection_error": "I'm sorry, there was an error processing your selection.",
+    "trouble": "I'm having trouble processing your request. Please try again.",
+    "too_long": "I'm sorry, that is taking too long. Please try again.",
+    "not_understood": "I couldn't understand what you said. Please speak clearly and try again.",
+    "no_recording": "No recording received.",
+    "no_input": "No input received.",
+}
 
 class TwilioVoiceHandler:
     """Handles Twilio voice call interactions"""
     
     def __init__(self):
-        self.session_data = {}
-        
+        # Per-call state, created on startup; Redis-backed when SESSION_STORE=redis so replicas share it
+        self.sessions: Optional[SessionStore] = None
+        # Pooled, keep-alive backend session, created on startup
+        self.backend_http: Optional[aiohttp.ClientSession] = None
+        # Turn jobs running in this process, by job ID
+        self.jobs: Dict[str, asyncio.Task] = {}
+        # Pre-rendered prompt audio, served from /prompts
+        self.prompts = PromptRegistry(PROMPT_CACHE_DIR, VOICE_PUBLIC_URL, PROMPT_CACHE_MAX_DYNAMIC)
+        self.prompts_task: Optional[asyncio.Task] = None
+    
+    async def start(self, app: web.Application):
+        """Connect the session store, open the shared HTTP session and render the prompts in the background"""
+        self.sessions = await create_session_store()
+        self.backend_http = aiohttp.ClientSession(
+            base_url=BACKEND_API_URL,
+            connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, keepalive_timeout=60)
+        )
+        # Calls are answered with <Say> until each prompt's audio is ready
+        self.prompts_task = asyncio.create_task(self.prompts.prepare(self.backend_http, PROMPTS.values()))
+    
+    async def stop(self, app: web.Application):
+        """Cancel running turn jobs and close the shared HTTP session and the session store"""
+        if self.prompts_task:
+            self.prompts_task.cancel()
+        for task in self.jobs.values():
+            task.cancel()
+        if self.backend_http:
+            await self.backend_http.close()
+        if self.sessions:
+            await self.sessions.close()
+    
+    def _timeout(self, deadline: float) -> aiohttp.ClientTimeout:
+        """Client timeout for the rest of the turn"""
+        return aiohttp.ClientTimeout(total=self._remaining(deadline))
+    
+    def _say(self, response: VoiceResponse, text: str):
+        """Play the text's pre-rendered audio if it is ready, otherwise <Say> it"""
+        url = self.prompts.url_for(text)
+        if url:
+            response.play(url)
+        else:
+            response.say(text, voice="alice", language="en-US")
+    
     def handle_incoming_call(self) -> str:
         """Handle incoming voice call"""
         try:
             response = VoiceResponse()
             
             # Welcome message
-            response.say(
-                "Hello! Welcome to the Public Service Navigation Assistant. I can help you with SNAP benefits, housing assistance, healthcare programs, and more. Please speak after the beep.",
-                voice="alice",
-                language="en-US"
-            )
+            self._say(response, PROMPTS["welcome"])
+            
+            if MEDIA_STREAM_URL:
+                # Stream the call audio both ways; turns are detected as the caller speaks
+                connect = Connect()
+                connect.stream(url=MEDIA_STREAM_URL)
+                response.append(connect)
+                return str(response)
             
             # Record user's question
             response.record(
@@ -56,46 +154,68 @@ class TwilioVoiceHandler:
             )
             
             # Fallback if no recording
-            response.say(
-                "I didn't hear anything. Please call back and try again.",
-                voice="alice",
-                language="en-US"
-            )
+            self._say(response, PROMPTS["no_recording_heard"])
             
             return str(response)
             
         except Exception as e:
             logger.error(f"Error handling incoming call: {str(e)}")
-            return self._create_error_response("I'm sorry, there was an error processing your call. Please try again.")
+            return self._create_error_response(PROMPTS["call_error"])
     
-    def handle_audio_processing(self, recording_url: str, call_sid: str) -> str:
-        """Process recorded audio and generate response"""
+    async def handle_audio_processing(self, recording_url: str, call_sid: str) -> str:
+        """Start a turn job for the recording and answer it, or put the caller on hold"""
         try:
-            # Download the recording
-            recording_data = self._download_recording(recording_url)
-            if not recording_data:
-                return self._create_error_response("I couldn't access your recording. Please try again.")
+            job_id = uuid.uuid4().hex
+            job = {"id": job_id, "status": "pending", "started": time.time()}
+            await self.sessions.update(call_sid, {"turn_job": job})
             
-            # Transcribe audio
-            transcription = self._transcribe_audio(recording_data)
-            if not transcription:
-                return self._create_error_response("I couldn't understand what you said. Please speak clearly and try again.")
+            task = asyncio.create_task(self._run_turn_job(job, recording_url, call_sid))
+            self.jobs[job_id] = task
+            task.add_done_callback(lambda _: self.jobs.pop(job_id, None))
             
-            # Process with Rasa
-            rasa_response = self._process_with_rasa(transcription, call_sid)
-            if not rasa_response:
-                return self._create_error_response("I'm having trouble processing your request. Please try again.")
+            # Fast answers go straight back in the webhook response
+            await asyncio.wait({task}, timeout=INLINE_WAIT_SECONDS)
+            if task.done():
+                return await self.handle_turn_result(job_id, call_sid)
             
-            # Create TwiML response with text-to-speech
             response = VoiceResponse()
-            response.say(rasa_response, voice="alice", language="en-US")
+            self._say(response, PROMPTS["hold"])
+            response.redirect(f"/turn_result?job={job_id}", method="POST")
+            return str(response)
+            
+        except Exception as e:
+            logger.error(f"Error processing audio: {str(e)}")
+            return self._create_error_response(PROMPTS["request_error"])
+    
+    async def handle_turn_result(self, job_id: str, call_sid: str) -> str:
+        """Serve a turn job's answer once ready, redirecting back here while it runs"""
+        try:
+            job = await self._wait_for_job(job_id, call_sid, POLL_WAIT_SECONDS)
+            if job is None:
+                return self._create_error_response(PROMPTS["trouble"])
+            
+            if job["status"] == "pending":
+                if time.time() - job["started"] > JOB_BUDGET_SECONDS:
+                    return self._create_error_response(PROMPTS["too_long"])
+                response = VoiceResponse()
+                self._say(response, PROMPTS["still_working"])
+                response.redirect(f"/turn_result?job={job_id}", method="POST")
+                return str(response)
+            
+            if job["status"] == "no_speech":
+                return self._create_error_response(PROMPTS["not_understood"])
+            if job["status"] != "done":
+                return self._create_error_response(PROMPTS["trouble"])
+            
+            # Create TwiML response, playing the synthesized answer when Twilio can reach it
+            response = VoiceResponse()
+            if job.get("audio_url") and BACKEND_PUBLIC_URL:
+                response.play(f"{BACKEND_PUBLIC_URL}{job['audio_url']}")
+            else:
+                response.say(job["response"], voice="alice", language="en-US")
             
             # Add follow-up options
-            response.say(
-                "Press 1 to repeat the information, press 2 to ask another question, or press 3 to speak with a human representative.",
-                voice="alice",
-                language="en-US"
-            )
+            self._say(response, PROMPTS["menu"])
             
             # Gather DTMF input
             gather = response.gather(
@@ -106,42 +226,82 @@ class TwilioVoiceHandler:
             )
             
             # Fallback if no input
-            response.say(
-                "Thank you for calling. Have a great day!",
-                voice="alice",
-                language="en-US"
-            )
+            self._say(response, PROMPTS["farewell"])
             
             return str(response)
             
         except Exception as e:
-            logger.error(f"Error processing audio: {str(e)}")
-            return self._create_error_response("I'm sorry, there was an error processing your request. Please try again.")
+            logger.error(f"Error serving turn result: {str(e)}")
+            return self._create_error_response(PROMPTS["request_error"])
+    
+    async def _run_turn_job(self, job: Dict[str, Any], recording_url: str, call_sid: str):
+        """Run a turn in the background and record the outcome in the call's session"""
+        try:
+            # Fetch, transcribe, answer and synthesize in one backend call
+            turn = await self._process_turn(recording_url, call_sid, time.monotonic() + JOB_BUDGET_SECONDS)
+            if turn is None or (turn.get("transcription") and not turn.get("response")):
+                job = {**job, "status": "failed"}
+            elif not turn.get("transcription"):
+                job = {**job, "status": "no_speech"}
+            else:
+                job = {**job, "status": "done", "response": turn["response"], "audio_url": turn.get("audio_url")}
+            
+            fields = {"turn_job": job}
+            if job["status"] == "done":
+                # Store in session for potential repetition, with its audio if Twilio can reach it
+                fields["last_response"] = turn["response"]
+                fields["last_audio_url"] = f"{BACKEND_PUBLIC_URL}{job['audio_url']}" if job["audio_url"] and BACKEND_PUBLIC_URL else None
+            await self.sessions.update(call_sid, fields)
+            
+        except Exception as e:
+            logger.error(f"Error running turn job {job['id']}: {str(e)}")
+            await self.sessions.update(call_sid, {"turn_job": {**job, "status": "failed"}})
+    
+    async def _wait_for_job(self, job_id: str, call_sid: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait up to `timeout` for a turn job to finish and return its state, or
+        None if the call has no such job. Jobs started by another replica are
+        followed through the shared session store.
+        """
+        task = self.jobs.get(job_id)
+        if task:
+            await asyncio.wait({task}, timeout=timeout)
+        
+        wait_until = time.monotonic() + (0 if task else timeout)
+        while True:
+            job = (await self.sessions.get(call_sid)).get("turn_job")
+            if not job or job.get("id") != job_id:
+                return None
+            if job["status"] != "pending" or time.monotonic() >= wait_until:
+                return job
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
     
-    def handle_dtmf_input(self, digits: str, call_sid: str) -> str:
+    async def handle_dtmf_input(self, digits: str, call_sid: str) -> str:
         """Handle DTMF input from user"""
         try:
             response = VoiceResponse()
             
             if digits == "1":
-                # Repeat last response
-                last_response = self.session_data.get(call_sid, {}).get("last_response", "")
+                # Repeat last response: replay the answer's audio, or render it once
+                session = await self.sessions.get(call_sid)
+                last_response = session.get("last_response", "")
                 if last_response:
-                    audio_url = self._synthesize_speech(last_response)
+                    audio_url = session.get("last_audio_url")
+                    if not audio_url:
+                        try:
+                            audio_url = await asyncio.wait_for(self.prompts.render(last_response), TURN_BUDGET_SECONDS)
+                        except asyncio.TimeoutError:
+                            audio_url = None
                     if audio_url:
                         response.play(audio_url)
                     else:
                         response.say(last_response, voice="alice", language="en-US")
                 else:
-                    response.say("I don't have a previous response to repeat.", voice="alice", language="en-US")
+                    self._say(response, PROMPTS["nothing_to_repeat"])
                     
             elif digits == "2":
                 # Ask another question
-                response.say(
-                    "Please ask your next question after the beep.",
-                    voice="alice",
-                    language="en-US"
-                )
+                self._say(response, PROMPTS["next_question"])
                 response.record(
                     action="/process_audio",
                     method="POST",
@@ -152,171 +312,83 @@ class TwilioVoiceHandler:
                 
             elif digits == "3":
                 # Connect to human
-                response.say(
-                    "I'm transferring you to a human representative. Please hold.",
-                    voice="alice",
-                    language="en-US"
-                )
+                self._say(response, PROMPTS["transfer"])
                 # In a real implementation, you would transfer the call here
-                response.say(
-                    "For immediate assistance, please call 2-1-1 or visit your local public services office.",
-                    voice="alice",
-                    language="en-US"
-                )
+                self._say(response, PROMPTS["transfer_fallback"])
                 
             else:
-                response.say(
-                    "I didn't understand your selection. Please try again.",
-                    voice="alice",
-                    language="en-US"
-                )
+                self._say(response, PROMPTS["invalid_selection"])
             
             return str(response)
             
         except Exception as e:
             logger.error(f"Error handling DTMF input: {str(e)}")
-            return self._create_error_response("I'm sorry, there was an error processing your selection.")
+            return self._create_error_response(PROMPTS["selection_error"])
     
-    def _download_recording(self, recording_url: str) -> Optional[bytes]:
-        """Download recording from Twilio"""
-        try:
-            # Use Twilio client to get the recording with proper authentication
-            if twilio_client:
-                # Extract recording SID from URL
-                recording_sid = recording_url.split('/')[-1].split('.')[0]
-                logger.info(f"Extracted recording SID: {recording_sid}")
-                
-                # Use the direct Twilio API to get the recording file
-                # The recording URL format is: https://api.twilio.com/2010-04-01/Accounts/{AccountSid}/Recordings/{RecordingSid}.wav
-                direct_url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Recordings/{recording_sid}.wav"
-                logger.info(f"Direct download URL: {direct_url}")
-                
-                # Download the recording with Basic Auth
-                response = requests.get(direct_url, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN), timeout=30)
-                if response.status_code == 200:
-                    logger.info(f"Successfully downloaded recording, size: {len(response.content)} bytes")
-                    return response.content
-                else:
-                    logger.error(f"Failed to download recording: {response.status_code}")
-                    logger.error(f"Response content: {response.text}")
-                    return None
-            else:
-                logger.error("Twilio client not initialized")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error downloading recording: {str(e)}")
-            return None
+    def _remaining(self, deadline: float) -> float:
+        """Seconds left before the turn deadline"""
+        return max(0.0, deadline - time.monotonic())
     
-    def _transcribe_audio(self, audio_data: bytes) -> Optional[str]:
-        """Transcribe audio using backend service"""
-        try:
-            # Send audio to backend for transcription
-            files = {"audio_file": ("recording.wav", audio_data, "audio/wav")}
-            response = requests.post(
-                f"{BACKEND_API_URL}/voice/transcribe",
-                files=files,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("transcription", "")
-            else:
-                logger.error(f"Transcription failed: {response.status_code}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error transcribing audio: {str(e)}")
-            return None
+    def _deadline_headers(self, deadline: float) -> Dict[str, str]:
+        """Headers that carry the remaining budget to the backend"""
+        return {DEADLINE_HEADER: str(int(self._remaining(deadline) * 1000))}
     
-    def _process_with_rasa(self, text: str, call_sid: str) -> Optional[str]:
-        """Process text with backend RAG service"""
+    async def _process_turn(self, recording_url: str, call_sid: str, deadline: float) -> Optional[Dict[str, Any]]:
+        """Run the whole turn in the backend (/voice/turn), which fetches the recording itself"""
         try:
-            # Send query to backend RAG service
-            payload = {
-                "query": text
-            }
-            
-            response = requests.post(
-                f"{BACKEND_API_URL}/query",
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                rag_response = result.get("response", "")
-                
-                # Store in session for potential repetition
-                if call_sid not in self.session_data:
-                    self.session_data[call_sid] = {}
-                self.session_data[call_sid]["last_response"] = rag_response
-                
-                return rag_response
-            else:
-                logger.error(f"Backend processing failed: {response.status_code}")
+            if self._remaining(deadline) <= 0:
+                logger.warning("Turn deadline passed before reaching the backend")
                 return None
-                
-        except Exception as e:
-            logger.error(f"Error processing with backend: {str(e)}")
-            return None
-    
-    def _synthesize_speech(self, text: str) -> Optional[str]:
-        """Synthesize speech using backend service"""
-        try:
-            # Send text to backend for synthesis
+            
             payload = {
-                "text": text,
-                "voice": "neutral",
-                "speed": 1.0
+                "call_sid": call_sid,
+                "recording_url": recording_url,
+                "synthesize": bool(BACKEND_PUBLIC_URL),
+                "output_format": "mulaw"  # 8 kHz mu-law: what the call carries anyway
             }
             
-            response = requests.post(
-                f"{BACKEND_API_URL}/voice/synthesize",
+            async with self.backend_http.post(
+                "/voice/turn",
                 json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                audio_data = result.get("audio_data")
-                
-                if audio_data:
-                    # In a real implementation, you would save this to a file server
-                    # and return the URL. For now, we'll return None and use TTS
-                    return None
+                headers=self._deadline_headers(deadline),
+                timeout=self._timeout(deadline)
+            ) as response:
+                if response.status == 200:
+                    turn = await response.json()
+                    logger.info(f"Turn for {call_sid} processed in {turn.get('timings', {}).get('total')}s")
+                    return turn
                 else:
-                    logger.warning("No audio data in response")
+                    logger.error(f"Turn processing failed: {response.status} {await response.text()}")
                     return None
-            else:
-                logger.error(f"Speech synthesis failed: {response.status_code}")
-                return None
                 
         except Exception as e:
-            logger.error(f"Error synthesizing speech: {str(e)}")
+            logger.error(f"Error processing turn: {str(e)}")
             return None
     
     def _create_error_response(self, message: str) -> str:
         """Create error response"""
         response = VoiceResponse()
-        response.say(message, voice="alice", language="en-US")
-        response.say("Thank you for calling. Goodbye.", voice="alice", language="en-US")
+        self._say(response, message)
+        self._say(response, PROMPTS["goodbye"])
         return str(response)
 
 # Initialize handler
 voice_handler = TwilioVoiceHandler()
+media_gateway = MediaStreamGateway(voice_handler)
+
+def twiml(body: str) -> web.Response:
+    """TwiML response"""
+    return web.Response(text=body, content_type="text/xml")
 
-@app.route("/", methods=["POST"])
-def incoming_call():
+async def incoming_call(request: web.Request) -> web.Response:
     """Handle incoming voice calls"""
-    return voice_handler.handle_incoming_call()
+    return twiml(voice_handler.handle_incoming_call())
 
-@app.route("/process_audio", methods=["POST"])
-def process_audio():
+async def process_audio(request: web.Request) -> web.Response:
     """Process recorded audio"""
-    recording_url = request.form.get("RecordingUrl")
-    call_sid = request.form.get("CallSid")
+    form = await request.post()
+    recording_url = form.get("RecordingUrl")
+    call_sid = form.get("CallSid")
     
     # Debug logging
     logger.info(f"Received recording URL: {recording_url}")
@@ -324,25 +396,65 @@ def process_audio():
     
     if not recording_url:
         logger.error("No recording URL received")
-        return voice_handler._create_error_response("No recording received.")
+        return twiml(voice_handler._create_error_response(PROMPTS["no_recording"]))
     
-    return voice_handler.handle_audio_processing(recording_url, call_sid)
+    return twiml(await voice_handler.handle_audio_processing(recording_url, call_sid))
 
-@app.route("/handle_dtmf", methods=["POST"])
-def handle_dtmf():
+async def turn_result(request: web.Request) -> web.Response:
+    """Poll a background turn job (Twilio follows the <Redirect> here)"""
+    form = await request.post()
+    job_id = request.query.get("job")
+    call_sid = form.get("CallSid")
+    
+    if not job_id or not call_sid:
+        return twiml(voice_handler._create_error_response(PROMPTS["trouble"]))
+    
+    return twiml(await voice_handler.handle_turn_result(job_id, call_sid))
+
+async def handle_dtmf(request: web.Request) -> web.Response:
     """Handle DTMF input"""
-    digits = request.form.get("Digits")
-    call_sid = request.form.get("CallSid")
+    form = await request.post()
+    digits = form.get("Digits")
+    call_sid = form.get("CallSid")
     
     if not digits:
-        return voice_handler._create_error_response("No input received.")
+        return twiml(voice_handler._create_error_response(PROMPTS["no_input"]))
     
-    return voice_handler.handle_dtmf_input(digits, call_sid)
+    return twiml(await voice_handler.handle_dtmf_input(digits, call_sid))
 
-@app.route("/health", methods=["GET"])
-def health_check():
+async def prompt_audio(request: web.Request) -> web.StreamResponse:
+    """Serve pre-rendered prompt audio"""
+    key = request.match_info["key"]
+    path = voice_handler.prompts.path(key)
+    if not key.isalnum() or not path.exists():
+        raise web.HTTPNotFound()
+    return web.FileResponse(path, headers={"Content-Type": "audio/wav", "Cache-Control": "public, max-age=86400"})
+
+async def health_check(request: web.Request) -> web.Response:
     """Health check endpoint"""
-    return {"status": "healthy", "service": "twilio_voice_handler"}
+    return web.json_response({
+        "status": "healthy",
+        "service": "twilio_voice_handler",
+        "sessions": await voice_handler.sessions.stats(),
+        "running_jobs": len(voice_handler.jobs),
+        "media_streams": media_gateway.stats(),
+        "prompts": voice_handler.prompts.stats()
+    })
+
+def create_app() -> web.Application:
+    """Build the voice handler application"""
+    app = web.Application()
+    app.on_startup.append(voice_handler.start)
+    app.on_cleanup.append(voice_handler.stop)
+    app.router.add_post("/", incoming_call)
+    app.router.add_post("/process_audio", process_audio)
+    app.router.add_post("/turn_result", turn_result)
+    app.router.add_post("/handle_dtmf", handle_dtmf)
+    app.router.add_get("/media", media_gateway.handle)
+    app.router.add_get("/prompts/{key}.wav", prompt_audio)
+    app.router.add_get("/health", health_check)
+    return app
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True) 
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(create_app(), host="0.0.0.0", port=5001)